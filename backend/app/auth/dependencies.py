@@ -1,41 +1,91 @@
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.auth.jwt import verify_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import hmac
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.metrics import chat_stage_seconds
+from app.auth.jwt import decode_token
+from app.auth.user_cache import AuthenticatedUser, auth_cache
 from app.models.user import User
 
 
-def get_current_user(
+async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
     """
     Dependency para obter o usuário autenticado a partir do HttpOnly Cookie.
     
     O token JWT é enviado automaticamente pelo browser no cookie 'access_token'.
-    """
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-    )
-    
-    # Buscar token no cookie
-    token = request.cookies.get("access_token")
     
-    if not token:
-        raise credentials_exception
-    
-    # Verificar e decodificar o token
-    user_id = verify_token(token)
+    Tokens e usuários vistos recentemente ficam em cache (AuthCache), evitando
+    decodificar o JWT e consultar o banco a cada requisição. A duração é registrada
+    na métrica de etapas (stage="auth").
+    """
     
-    if user_id is None:
-        raise credentials_exception
+    with chat_stage_seconds.time(stage="auth"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+        
+        # Buscar token no cookie
+        token = request.cookies.get("access_token")
+        
+        if not token:
+            raise credentials_exception
+        
+        # Verificar e decodificar o token (ou reaproveitar a validação em cache)
+        user_id = auth_cache.get_token(token)
+        
+        if user_id is None:
+            payload = decode_token(token)
+            
+            if payload is None or payload.get("sub") is None:
+                raise credentials_exception
+            
+            user_id = int(payload["sub"])
+            auth_cache.set_token(token, user_id, payload.get("exp"))
+        
+        # Buscar o usuário no cache ou no banco de dados
+        current_user = auth_cache.get_user(user_id)
+        
+        if current_user is None:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user = result.scalar_one_or_none()
+            
+            if user is None:
+                raise credentials_exception
+            
+            current_user = AuthenticatedUser.from_user(user)
+            auth_cache.set_user(current_user)
+        
+        return current_user
+
+
+async def require_monitoring_access(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+) -> None:
+    """
+    Dependency que protege os endpoints de monitoramento (/stats e /metrics).
     
-    # Buscar o usuário no banco de dados
-    user = db.query(User).filter(User.id == user_id).first()
+    Com METRICS_TOKEN configurado, exige o header 'Authorization: Bearer <token>'
+    (formato aceito pelo scrape do Prometheus). Sem token, exige um usuário
+    autenticado pelo cookie, como as demais rotas.
+    """
     
-    if user is None:
-        raise credentials_exception
+    if not settings.metrics_token:
+        await get_current_user(request, db)
+        return
     
-    return user
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.strip().encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
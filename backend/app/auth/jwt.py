@@ -33,15 +33,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[int]:
-    """Verifica e decodifica um token JWT, retornando o user_id"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verifica e decodifica um token JWT, retornando o payload completo"""
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id = payload.get("sub")
-        
-        if user_id is None:
-            return None
-            
-        return int(user_id)
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
+
+
+def verify_token(token: str) -> Optional[int]:
+    """Verifica e decodifica um token JWT, retornando o user_id"""
+    payload = decode_token(token)
+    
+    if payload is None:
+        return None
+    
+    user_id = payload.get("sub")
+    
+    if user_id is None:
+        return None
+        
+    return int(user_id)
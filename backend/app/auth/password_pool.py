@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from typing import Optional
+import asyncio
+import multiprocessing
+import time
+from app.core.config import settings
+from app.auth.jwt import get_password_hash, verify_password
+
+
+class PasswordHashPool:
+    """
+    Pool de processos dedicado ao bcrypt, com controle de admissão.
+
+    O bcrypt é intencionalmente caro em CPU. Rodá-lo no threadpool compartilhado
+    do Starlette faz um pico de logins atrasar todas as outras rotas. Aqui ele roda
+    em processos separados, com:
+    - Limite de hashes simultâneos (PASSWORD_HASH_WORKERS)
+    - Fila limitada (PASSWORD_HASH_MAX_QUEUE) e tempo máximo de espera
+    - Erro 503 imediato quando o pool está saturado
+    - Métricas de fila e de latência
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.password_hash_workers,
+        max_queue: int = settings.password_hash_max_queue,
+        queue_timeout: float = settings.password_hash_queue_timeout_seconds
+    ):
+        """Configura o pool (os processos só são criados no primeiro uso)"""
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Cria o pool de processos sob demanda"""
+        if self._executor is None:
+            # spawn: evita herdar threads e o event loop do processo do servidor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Cria o semáforo de concorrência sob demanda (dentro do event loop)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    def _reject(self) -> HTTPException:
+        """Erro retornado quando o pool está saturado"""
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
+
+    async def _run(self, func, *args):
+        """
+        Executa uma função de hash no pool, respeitando o limite de fila.
+
+        Raises:
+            HTTPException: 503 se a fila estiver cheia ou a espera exceder o limite
+        """
+        if self.queue_depth >= self.max_queue:
+            raise self._reject()
+
+        semaphore = self._get_semaphore()
+
+        self.queue_depth += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject()
+        finally:
+            self.queue_depth -= 1
+
+        self.in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            semaphore.release()
+
+    async def hash_password(self, password: str) -> str:
+        """Gera o hash da senha fora do processo do servidor"""
+        return await self._run(get_password_hash, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica a senha contra o hash fora do processo do servidor"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Estatísticas de fila, rejeições e latência dos hashes"""
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_seconds": round(self.total_seconds / self.completed, 4) if self.completed else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+    def shutdown(self) -> None:
+        """Encerra os processos do pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instância única do pool
+password_pool = PasswordHashPool()
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from typing import Dict, Optional, Set, Tuple
+import time
+from app.core.cache_invalidation import cache_invalidator
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    Usuário autenticado (principal) repassado às rotas.
+
+    Objeto leve e imutável, desacoplado da sessão do banco, que pode ser
+    mantido em cache entre requisições no lugar do modelo User.
+    """
+    id: int
+    email: str
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        """Cria o principal a partir do modelo do banco"""
+        return cls(id=user.id, email=user.email, created_at=user.created_at)
+
+
+class AuthCache:
+    """
+    Cache com TTL da autenticação, usado pela dependency get_current_user.
+
+    Responsável por:
+    - Memorizar tokens já validados (evita decodificar o JWT novamente)
+    - Memorizar usuários por ID (evita a consulta ao banco a cada requisição)
+    - Respeitar o `exp` do JWT: uma entrada nunca vive além da expiração do token
+    - Invalidar as entradas de um usuário alterado ou deletado (também nos
+      demais workers, via cache_invalidator)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.auth_cache_ttl_seconds,
+        max_entries: int = settings.auth_cache_max_entries
+    ):
+        """Inicializa os caches vazios"""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # token -> (user_id, expira_em)
+        self._tokens: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        # user_id -> (principal, expira_em)
+        self._users: "OrderedDict[int, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+        # user_id -> tokens em cache daquele usuário (para invalidação)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+
+    def get_token(self, token: str) -> Optional[int]:
+        """
+        Retorna o user_id de um token já validado, se ainda estiver no cache.
+
+        Args:
+            token: Token JWT
+
+        Returns:
+            ID do usuário, ou None se o token não estiver em cache ou tiver expirado
+        """
+        entry = self._tokens.get(token)
+        if entry is None:
+            return None
+
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            self._remove_token(token)
+            return None
+
+        self._tokens.move_to_end(token)
+        return user_id
+
+    def set_token(self, token: str, user_id: int, token_exp: Optional[float]) -> None:
+        """
+        Armazena um token validado.
+
+        Args:
+            token: Token JWT
+            user_id: ID do usuário do token
+            token_exp: Expiração do token (timestamp do claim `exp`)
+        """
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        self._tokens[token] = (user_id, expires_at)
+        self._tokens.move_to_end(token)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+
+        while len(self._tokens) > self.max_entries:
+            oldest_token = next(iter(self._tokens))
+            self._remove_token(oldest_token)
+
+    def get_user(self, user_id: int) -> Optional[AuthenticatedUser]:
+        """
+        Retorna o principal de um usuário, se ainda estiver no cache.
+
+        Args:
+            user_id: ID do usuário
+
+        Returns:
+            Usuário autenticado, ou None se não estiver em cache ou tiver expirado
+        """
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+
+        principal, expires_at = entry
+        if expires_at <= time.time():
+            del self._users[user_id]
+            return None
+
+        self._users.move_to_end(user_id)
+        return principal
+
+    def set_user(self, principal: AuthenticatedUser) -> None:
+        """
+        Armazena o principal de um usuário.
+
+        Args:
+            principal: Usuário autenticado
+        """
+        self._users[principal.id] = (principal, time.time() + self.ttl_seconds)
+        self._users.move_to_end(principal.id)
+
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Remove do cache o usuário e todos os seus tokens (usuário alterado ou deletado).
+
+        Args:
+            user_id: ID do usuário
+        """
+        self._users.pop(user_id, None)
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._tokens.pop(token, None)
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache"""
+        self._tokens.clear()
+        self._users.clear()
+        self._tokens_by_user.clear()
+
+    def _remove_token(self, token: str) -> None:
+        """Remove um token do cache e do índice por usuário"""
+        entry = self._tokens.pop(token, None)
+        if entry is None:
+            return
+
+        user_tokens = self._tokens_by_user.get(entry[0])
+        if user_tokens is not None:
+            user_tokens.discard(token)
+            if not user_tokens:
+                del self._tokens_by_user[entry[0]]
+
+
+# Instância única do cache
+auth_cache = AuthCache()
+
+
+# Alterações de usuários em outros workers removem o usuário do cache local
+cache_invalidator.register("user", auth_cache.invalidate_user, auth_cache.clear)
+
+# Chave em Session.info com os usuários alterados na transação atual
+_PENDING_USER_INVALIDATIONS = "pending_user_invalidations"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Invalida o cache de autenticação sempre que um usuário é alterado ou deletado"""
+    auth_cache.invalidate_user(target.id)
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_USER_INVALIDATIONS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_invalidations(session: Session) -> None:
+    """
+    Publica as invalidações dos usuários alterados para os demais workers.
+
+    Só após o commit: publicar antes permitiria a outro worker recarregar
+    o usuário antigo do banco logo após descartá-lo.
+    """
+    for user_id in session.info.pop(_PENDING_USER_INVALIDATIONS, ()):
+        cache_invalidator.publish_nowait("user", user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_invalidations(session: Session) -> None:
+    """Descarta as invalidações pendentes de uma transação desfeita"""
+    session.info.pop(_PENDING_USER_INVALIDATIONS, None)
@@ -0,0 +1,348 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Função chamada com cada mensagem recebida em um canal
+MessageHandler = Callable[[str], None]
+# Função chamada quando a assinatura é (re)estabelecida após uma falha
+ReconnectHandler = Callable[[], None]
+
+
+class CacheBackend(ABC):
+    """
+    Interface dos backends de cache compartilháveis entre workers.
+
+    Armazena valores textuais com TTL e oferece publicação/assinatura de
+    mensagens, usada para invalidar os caches em memória de todos os workers.
+
+    Atributos:
+        name: Nome do backend (exposto em /stats)
+        shared: True se o armazenamento é compartilhado entre processos
+    """
+
+    name = "base"
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Busca um valor.
+
+        Args:
+            key: Chave
+
+        Returns:
+            Valor armazenado, ou None se não existir ou tiver expirado
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Armazena um valor.
+
+        Args:
+            key: Chave
+            value: Valor
+            ttl_seconds: Tempo de vida (None = sem expiração)
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Remove um valor.
+
+        Args:
+            key: Chave
+        """
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        """
+        Publica uma mensagem para todos os assinantes do canal.
+
+        Args:
+            channel: Nome do canal
+            message: Conteúdo da mensagem
+        """
+
+    @abstractmethod
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        """
+        Assina um canal. O handler é chamado no event loop para cada mensagem.
+
+        Args:
+            channel: Nome do canal
+            handler: Função chamada com cada mensagem recebida
+            on_reconnect: Função chamada quando a assinatura é restabelecida
+                (mensagens publicadas durante a falha foram perdidas)
+        """
+
+    async def close(self) -> None:
+        """Encerra as assinaturas e as conexões do backend"""
+
+    def stats(self) -> dict:
+        """Estatísticas do backend"""
+        return {"backend": self.name, "shared": self.shared}
+
+
+class InProcessCacheBackend(CacheBackend):
+    """
+    Backend em memória do próprio processo (padrão, um único worker).
+
+    LRU limitado por quantidade de entradas e com TTL por chave. A
+    publicação entrega as mensagens apenas aos assinantes deste processo.
+    """
+
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_entries: int = settings.cache_memory_max_entries):
+        """Inicializa o armazenamento vazio"""
+        self.max_entries = max_entries
+
+        # key -> (valor, expira_em monotônico ou None)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._subscribers: Dict[str, List[MessageHandler]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for handler in list(self._subscribers.get(channel, [])):
+            handler(message)
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        self._subscribers.setdefault(channel, []).append(handler)
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartilhado sobre o protocolo do Redis (redis-py asyncio).
+
+    Todas as chaves recebem o prefixo CACHE_KEY_PREFIX, permitindo dividir o
+    mesmo servidor entre ambientes. Funciona com qualquer servidor compatível
+    (Redis, Valkey, KeyDB) e, em testes, com o fakeredis:
+
+        backend = RedisCacheBackend(client=fakeredis.FakeAsyncRedis())
+
+    As assinaturas rodam em uma task que reconecta automaticamente. Como as
+    mensagens publicadas durante a queda são perdidas, `on_reconnect` é chamado
+    ao restabelecer a assinatura (os caches locais devem ser descartados).
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(
+        self,
+        url: Optional[str] = settings.redis_url,
+        key_prefix: str = settings.cache_key_prefix,
+        client: Any = None,
+        reconnect_delay: float = 1.0
+    ):
+        """
+        Inicializa o cliente do Redis.
+
+        Args:
+            url: URL de conexão (ex: redis://localhost:6379/0)
+            key_prefix: Prefixo de todas as chaves e canais
+            client: Cliente asyncio já criado (ex: fakeredis.FakeAsyncRedis)
+            reconnect_delay: Espera, em segundos, antes de reassinar após uma falha
+
+        Raises:
+            ValueError: Se a URL não for informada
+            RuntimeError: Se o pacote redis não estiver instalado
+        """
+        if client is None:
+            if not url:
+                raise ValueError("REDIS_URL é obrigatória com CACHE_BACKEND=redis")
+            try:
+                # Import tardio: o pacote redis só é necessário com CACHE_BACKEND=redis
+                import redis.asyncio as redis_asyncio
+            except ImportError as exc:
+                raise RuntimeError(
+                    "CACHE_BACKEND=redis requer o pacote redis (pip install redis)"
+                ) from exc
+            client = redis_asyncio.from_url(url, decode_responses=True)
+
+        self.client = client
+        self.key_prefix = key_prefix
+        self.reconnect_delay = reconnect_delay
+        self._tasks: List[asyncio.Task] = []
+
+        self.errors = 0
+        self.reconnects = 0
+
+    def _key(self, key: str) -> str:
+        """Aplica o prefixo a uma chave ou canal"""
+        return f"{self.key_prefix}:{key}"
+
+    @staticmethod
+    def _decode(value: Any) -> Optional[str]:
+        """Converte a resposta do cliente para texto (com ou sem decode_responses)"""
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._decode(await self.client.get(self._key(key)))
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        if ttl_seconds:
+            await self.client.set(self._key(key), value, px=int(ttl_seconds * 1000))
+        else:
+            await self.client.set(self._key(key), value)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(self._key(channel), message)
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_reconnect: Optional[ReconnectHandler] = None
+    ) -> None:
+        pubsub = self.client.pubsub()
+        # Assina antes de retornar: mensagens publicadas a partir daqui não são perdidas
+        await pubsub.subscribe(self._key(channel))
+
+        task = asyncio.create_task(
+            self._listen(pubsub, channel, handler, on_reconnect),
+            name=f"cache-subscribe-{channel}"
+        )
+        self._tasks.append(task)
+
+    async def _listen(
+        self,
+        pubsub: Any,
+        channel: str,
+        handler: MessageHandler,
+        on_reconnect: Optional[ReconnectHandler]
+    ) -> None:
+        """Entrega as mensagens do canal ao handler, reassinando após falhas de conexão"""
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        handler(self._decode(message["data"]))
+                    except Exception:
+                        logger.warning("Falha ao processar mensagem do canal %s", channel, exc_info=True)
+            except asyncio.CancelledError:
+                await self._close_pubsub(pubsub)
+                raise
+            except Exception:
+                self.errors += 1
+                logger.warning("Conexão de pub/sub perdida no canal %s; reconectando", channel, exc_info=True)
+
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._close_pubsub(pubsub)
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(self._key(channel))
+            except Exception:
+                self.errors += 1
+                continue
+
+            self.reconnects += 1
+            if on_reconnect is not None:
+                on_reconnect()
+
+    @staticmethod
+    async def _close_pubsub(pubsub: Any) -> None:
+        """Encerra uma assinatura, ignorando falhas de conexão"""
+        try:
+            await pubsub.aclose()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "subscriptions": len(self._tasks),
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+        }
+
+
+def create_cache_backend() -> CacheBackend:
+    """
+    Cria o backend de cache configurado em CACHE_BACKEND.
+
+    Returns:
+        InProcessCacheBackend ("memory") ou RedisCacheBackend ("redis")
+
+    Raises:
+        ValueError: Se o backend configurado não existir
+    """
+    backend = settings.cache_backend.lower()
+
+    if backend == "memory":
+        return InProcessCacheBackend()
+    if backend == "redis":
+        return RedisCacheBackend()
+
+    raise ValueError(f"CACHE_BACKEND inválido: {settings.cache_backend}")
+
+
+# Instância única do backend
+cache_backend = create_cache_backend()
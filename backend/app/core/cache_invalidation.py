@@ -0,0 +1,150 @@
+from typing import Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import uuid
+from app.core.cache_backend import CacheBackend, cache_backend
+
+logger = logging.getLogger(__name__)
+
+# Canal de pub/sub das invalidações (recebe o prefixo das chaves no backend)
+INVALIDATION_CHANNEL = "invalidate"
+
+# Função que invalida a entrada local de uma chave (ex: auth_cache.invalidate_user)
+InvalidationHandler = Callable[[int], None]
+# Função que descarta todo o cache local (ex: auth_cache.clear)
+ClearHandler = Callable[[], None]
+
+
+class CacheInvalidator:
+    """
+    Invalidação dos caches em memória entre workers via pub/sub do backend de cache.
+
+    Cada cache local (autenticação, histórico) registra um handler por tipo de
+    entidade ("user", "conversation"). Quando um worker altera uma entidade, publica
+    uma invalidação; os demais workers removem a entrada correspondente dos seus
+    caches. O worker de origem ignora a própria mensagem, pois já atualizou o seu
+    cache no caminho de escrita.
+
+    Se a assinatura cair, as mensagens do intervalo se perdem: ao reconectar, todos
+    os caches locais são descartados para nunca servir dados desatualizados.
+    Com o backend em memória (um único worker) a publicação é descartada.
+    """
+
+    def __init__(self, backend: CacheBackend = cache_backend):
+        """Inicializa o invalidador sem handlers registrados"""
+        self.backend = backend
+        self.worker_id = uuid.uuid4().hex
+
+        self._handlers: Dict[str, List[InvalidationHandler]] = {}
+        self._clear_handlers: List[ClearHandler] = []
+        self._pending: Set[asyncio.Task] = set()
+        self._started = False
+
+        self.published = 0
+        self.received = 0
+        self.publish_errors = 0
+        self.resets = 0
+
+    def register(self, kind: str, handler: InvalidationHandler, clear: Optional[ClearHandler] = None) -> None:
+        """
+        Registra o handler de invalidação de um tipo de entidade.
+
+        Args:
+            kind: Tipo da entidade ("user", "conversation")
+            handler: Função que remove a entrada local de uma chave
+            clear: Função que descarta todo o cache local (usada após reconexão)
+        """
+        self._handlers.setdefault(kind, []).append(handler)
+        if clear is not None:
+            self._clear_handlers.append(clear)
+
+    async def start(self) -> None:
+        """Assina o canal de invalidações (chamado na inicialização do app)"""
+        if self._started or not self.backend.shared:
+            return
+
+        await self.backend.subscribe(INVALIDATION_CHANNEL, self._on_message, self._on_reconnect)
+        self._started = True
+
+    async def stop(self) -> None:
+        """Aguarda as publicações pendentes (chamado no encerramento do app)"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        self._started = False
+
+    async def publish(self, kind: str, key: int) -> None:
+        """
+        Publica a invalidação de uma entidade para os demais workers.
+
+        Falhas são registradas e não propagadas: o TTL dos caches locais limita
+        o tempo em que um worker pode servir o dado desatualizado.
+
+        Args:
+            kind: Tipo da entidade ("user", "conversation")
+            key: ID da entidade
+        """
+        if not self.backend.shared:
+            return
+
+        message = json.dumps({"worker": self.worker_id, "kind": kind, "key": key})
+        try:
+            await self.backend.publish(INVALIDATION_CHANNEL, message)
+            self.published += 1
+        except Exception:
+            self.publish_errors += 1
+            logger.warning("Falha ao publicar invalidação de %s %s", kind, key, exc_info=True)
+
+    def publish_nowait(self, kind: str, key: int) -> None:
+        """
+        Agenda a publicação de uma invalidação sem aguardá-la.
+
+        Usado em código síncrono (ex: eventos do SQLAlchemy). Fora de um event
+        loop em execução a publicação é descartada.
+
+        Args:
+            kind: Tipo da entidade ("user", "conversation")
+            key: ID da entidade
+        """
+        if not self.backend.shared:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        task = loop.create_task(self.publish(kind, key))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> dict:
+        """Estatísticas do backend e das invalidações publicadas/recebidas"""
+        return {
+            **self.backend.stats(),
+            "invalidations_published": self.published,
+            "invalidations_received": self.received,
+            "publish_errors": self.publish_errors,
+            "resets": self.resets,
+        }
+
+    def _on_message(self, raw_message: str) -> None:
+        """Aplica uma invalidação recebida de outro worker"""
+        message = json.loads(raw_message)
+        if message.get("worker") == self.worker_id:
+            return
+
+        self.received += 1
+        for handler in self._handlers.get(message.get("kind"), []):
+            handler(message["key"])
+
+    def _on_reconnect(self) -> None:
+        """Descarta os caches locais após perder mensagens de invalidação"""
+        self.resets += 1
+        logger.warning("Assinatura de invalidações restabelecida; descartando os caches locais")
+        for clear in self._clear_handlers:
+            clear()
+
+
+# Instância única do invalidador
+cache_invalidator = CacheInvalidator()
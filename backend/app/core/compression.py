@@ -0,0 +1,72 @@
+from typing import Optional, Union
+import threading
+import zstandard
+from app.core.config import settings
+
+# Contextos do zstd não podem ser usados por duas threads ao mesmo tempo
+# (ex: event loop e compactação em segundo plano): um por thread
+_local = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    """Compressor zstd da thread atual"""
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=settings.message_compression_level)
+    return compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    """Descompressor zstd da thread atual"""
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def compress_text(
+    text: str,
+    min_bytes: int = settings.message_compression_min_bytes,
+    enabled: bool = settings.message_compression_enabled
+) -> Union[str, bytes]:
+    """
+    Converte um texto para o formato armazenado no banco.
+
+    Textos a partir de `min_bytes` (em UTF-8) são gravados como BLOB zstd; os
+    demais continuam como TEXT. No SQLite as duas formas convivem na mesma coluna,
+    e o tipo do valor (bytes ou str) indica se ele está comprimido.
+
+    Args:
+        text: Texto original
+        min_bytes: Tamanho mínimo para comprimir
+        enabled: Se False, o texto é sempre armazenado sem compressão
+
+    Returns:
+        Bytes comprimidos, ou o próprio texto se a compressão não compensar
+    """
+    if not enabled:
+        return text
+
+    encoded = text.encode("utf-8")
+    if len(encoded) < min_bytes:
+        return text
+
+    compressed = _compressor().compress(encoded)
+    if len(compressed) >= len(encoded):
+        return text
+    return compressed
+
+
+def decompress_text(value: Optional[Union[str, bytes]]) -> Optional[str]:
+    """
+    Converte um valor armazenado com `compress_text` de volta para texto.
+
+    Args:
+        value: Valor lido do banco (TEXT ou BLOB zstd)
+
+    Returns:
+        Texto original
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _decompressor().decompress(bytes(value)).decode("utf-8")
+    return value
@@ -11,16 +11,132 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./data/chat.db"
+    sqlite_journal_mode: str = "WAL"  # WAL permite leituras concorrentes com uma escrita
+    sqlite_synchronous: str = "NORMAL"  # Seguro com WAL e com bem menos fsyncs que FULL
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # Leitura via mmap (256 MB)
+    sqlite_busy_timeout_ms: int = 5000  # Espera pelo lock em vez de falhar com "database is locked"
     
     # JWT - SECRET_KEY deve vir obrigatoriamente do .env
     secret_key: str  # OBRIGATÓRIO no .env
     algorithm: str = "HS256"  # Opcional (tem padrão)
     access_token_expire_minutes: int = 10080  # Opcional (tem padrão - 7 dias)
+    auth_cache_ttl_seconds: float = 60  # Cache de tokens/usuários autenticados (0 desativa)
+    auth_cache_max_entries: int = 10000  # Máximo de tokens e de usuários em cache
     
-    # Google Gemini - API_KEY deve vir obrigatoriamente do .env
-    google_api_key: str  # OBRIGATÓRIO no .env
+    # Bcrypt - pool de processos dedicado com controle de admissão
+    password_hash_workers: int = 2  # Hashes simultâneos (processos)
+    password_hash_max_queue: int = 32  # Requisições aguardando antes de responder 503
+    password_hash_queue_timeout_seconds: float = 5  # Espera máxima na fila antes de responder 503
+    
+    # Acesso aos endpoints de monitoramento
+    metrics_token: Optional[str] = None  # Bearer token exigido em /stats e /metrics (sem token: exige usuário autenticado)
+    
+    # Google Gemini - API_KEY deve vir obrigatoriamente do .env (exceto com LLM_PROVIDER=fake)
+    google_api_key: Optional[str] = None  # OBRIGATÓRIO no .env com o provedor gemini
     qtd_tokens_default: int = 8192  # Opcional (tem padrão)
     
+    # Provedor do modelo de linguagem
+    llm_provider: str = "gemini"  # "gemini" ou "fake" (local, para testes de carga sem custo)
+    llm_model: str = "gemini-2.5-flash-lite"  # Modelo usado pelo provedor gemini
+    llm_temperature: float = 0.5
+    llm_max_output_tokens: int = 2048  # Limita o tamanho da resposta
+    
+    # Provedor fake - latência, streaming, tamanho da resposta e falhas simuladas
+    fake_llm_latency_distribution: str = "lognormal"  # fixed, uniform, normal ou lognormal
+    fake_llm_latency_mean_ms: float = 800  # Latência média até o primeiro token
+    fake_llm_latency_stddev_ms: float = 200  # Desvio padrão da latência
+    fake_llm_response_tokens: int = 150  # Tokens de cada resposta
+    fake_llm_stream_tokens_per_second: float = 200  # Velocidade de geração (0 = instantânea)
+    fake_llm_stream_chunk_tokens: int = 5  # Tokens por trecho no streaming
+    fake_llm_error_rate: float = 0.0  # Probabilidade de erro transitório (503) por chamada
+    fake_llm_hang_rate: float = 0.0  # Probabilidade de a chamada nunca responder
+    fake_llm_seed: Optional[int] = None  # Semente para latências e falhas reprodutíveis
+    
+    # Contexto - compactação com resumo incremental (rolling summary)
+    context_compaction_enabled: bool = True  # Se False, envia o histórico completo (limite acumulado)
+    context_recent_turns: int = 5  # Turnos (usuário + assistente) mantidos literalmente no prompt
+    context_summary_batch_turns: int = 3  # Turnos excedentes acumulados antes de atualizar o resumo
+    context_reply_reserve_tokens: int = 2048  # Tokens reservados para a nova mensagem e a resposta
+    context_summary_max_tokens: int = 1024  # Espaço reservado para o resumo ao escolher as mensagens recentes
+    
+    # Tokenização (tiktoken) em pool de threads
+    tokenizer_workers: int = 2  # Threads dedicadas à tokenização
+    tokenizer_inline_max_chars: int = 2048  # Textos até este tamanho são contados direto no event loop
+    tokenizer_batch_window_ms: float = 2.0  # Janela para agrupar requisições concorrentes em um lote
+    tokenizer_max_batch_size: int = 64  # Tamanho máximo do lote enviado ao pool
+    
+    # Cache em memória do histórico formatado das conversas
+    history_cache_max_entries: int = 1024  # Conversas mantidas em cache
+    history_cache_max_bytes: int = 32 * 1024 * 1024  # Memória máxima estimada (32 MB)
+    history_cache_ttl_seconds: float = 600  # Tempo de vida de cada entrada (10 minutos)
+    
+    # Escalonador das chamadas ao modelo (concorrência global e fila justa por usuário)
+    llm_max_concurrency: int = 8  # Chamadas simultâneas ao provedor
+    llm_max_queue: int = 100  # Requisições aguardando antes de responder 503
+    llm_queue_timeout_seconds: float = 10  # Espera máxima na fila antes de responder 503
+    
+    # Prazo, novas tentativas e hedge das chamadas ao modelo
+    llm_timeout_seconds: float = 30  # Prazo de cada tentativa (no stream, da espera por cada trecho)
+    llm_max_retries: int = 2  # Novas tentativas em falhas transitórias (timeout, 429, 5xx)
+    llm_retry_base_delay_seconds: float = 0.5  # Espera base do backoff exponencial (com jitter)
+    llm_retry_max_delay_seconds: float = 4  # Espera máxima entre tentativas
+    llm_hedge_enabled: bool = False  # Dispara uma segunda chamada quando a primeira demora demais
+    llm_hedge_percentile: float = 0.95  # Percentil das latências recentes que dispara o hedge
+    llm_hedge_min_samples: int = 20  # Latências observadas antes de ativar o hedge
+    
+    # Cache exact-match das respostas do modelo (mesmo contexto -> mesma resposta)
+    response_cache_enabled: bool = False  # Ativado por deployment
+    response_cache_max_entries: int = 1000  # Respostas mantidas em memória
+    response_cache_ttl_seconds: float = 3600  # Tempo de vida de cada resposta (1 hora)
+    response_cache_persistent: bool = False  # Também grava no SQLite (compartilhado entre workers)
+    
+    # Monitor de bloqueios do event loop
+    loop_monitor_enabled: bool = True  # Mede o lag do event loop e registra bloqueios
+    loop_monitor_interval_ms: float = 100  # Intervalo entre medições do lag
+    loop_block_threshold_ms: float = 200  # Bloqueio mínimo para registrar a pilha (log + métrica)
+    
+    # Profiling sob demanda (amostragem de pilha, saída collapsed para flamegraphs)
+    profiling_enabled: bool = False  # Adiciona o middleware de profiling
+    profiling_token: Optional[str] = None  # Valor do header X-Profile-Token / ?__profile= que ativa o profiling
+    profiling_sample_rate: float = 0.0  # Fração das requisições perfiladas automaticamente (ex: 0.001)
+    profiling_interval_ms: float = 5  # Intervalo entre amostras de pilha
+    profiling_dir: str = "data/profiles"  # Diretório dos perfis gravados
+    profiling_max_bytes: int = 50 * 1024 * 1024  # Tamanho máximo do diretório (remove os mais antigos)
+    
+    # Backend de cache compartilhado e invalidação entre workers
+    cache_backend: str = "memory"  # "memory" (um worker) ou "redis" (vários workers)
+    redis_url: Optional[str] = None  # URL do Redis com CACHE_BACKEND=redis (ex: redis://localhost:6379/0)
+    cache_key_prefix: str = "genai"  # Prefixo das chaves e canais no Redis
+    cache_memory_max_entries: int = 10000  # Entradas mantidas pelo backend em memória
+    
+    # Compressão (zstd) do conteúdo das mensagens armazenadas
+    message_compression_enabled: bool = True  # Comprime novas mensagens e migra as antigas em segundo plano
+    message_compression_min_bytes: int = 1024  # Mensagens menores são armazenadas sem compressão
+    message_compression_level: int = 3  # Nível do zstd (1 = mais rápido, 19 = menor)
+    message_compaction_batch_size: int = 200  # Mensagens antigas comprimidas por transação
+    message_compaction_pause_ms: float = 50  # Pausa entre lotes (libera o lock de escrita)
+    
+    # Fila durável de tarefas em segundo plano (título e resumo das conversas)
+    job_workers: int = 2  # Tarefas executadas simultaneamente por processo
+    job_poll_interval_seconds: float = 1.0  # Intervalo de consulta à fila quando ociosa
+    job_max_attempts: int = 5  # Tentativas de cada tarefa antes de marcá-la como falha
+    job_retry_base_delay_seconds: float = 2  # Espera base do backoff exponencial entre tentativas
+    job_retry_max_delay_seconds: float = 300  # Espera máxima entre tentativas (5 minutos)
+    job_lease_seconds: float = 120  # Prazo de cada execução; depois disso outra instância pode reexecutá-la
+    job_retention_seconds: float = 86400  # Tempo que tarefas concluídas ficam na tabela (1 dia)
+    llm_title_enabled: bool = True  # Gera o título da conversa com o modelo após o primeiro turno
+    context_summary_async: bool = True  # Atualiza o resumo em segundo plano, fora do tempo da requisição
+    
+    # Compressão negociada das respostas HTTP (brotli, se instalado, ou gzip)
+    response_compression_enabled: bool = True  # Adiciona o middleware de compressão
+    response_compression_min_bytes: int = 1024  # Respostas menores são enviadas sem compressão
+    response_compression_gzip_level: int = 6  # Nível do gzip (1 = mais rápido, 9 = menor)
+    response_compression_brotli_quality: int = 4  # Qualidade do brotli (0 = mais rápido, 11 = menor)
+    
+    # Exportação NDJSON das conversas (GET /conversations/export)
+    export_yield_per: int = 500  # Linhas lidas do banco por lote (cursor no servidor)
+    export_chunk_bytes: int = 64 * 1024  # Tamanho dos blocos enviados na resposta (64 KB)
+    
     class Config:
         env_file = str(BASE_DIR / ".env")
         env_file_encoding = "utf-8"
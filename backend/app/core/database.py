@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.core.compression import decompress_text
 from app.core.config import settings
 import os
 
@@ -13,9 +15,72 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Necessário para SQLite
 )
 
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Aplica os PRAGMAs de produção do SQLite em cada nova conexão.
+    
+    - journal_mode=WAL: leitores não bloqueiam o escritor (e vice-versa)
+    - synchronous: reduz fsyncs mantendo a durabilidade adequada com WAL
+    - mmap_size: leitura das páginas via memória mapeada
+    - busy_timeout: aguarda o lock de escrita em vez de falhar imediatamente
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size = {settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}")
+    cursor.close()
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    """
+    Registra as funções SQL do app em cada nova conexão.
+    
+    - message_text(content): texto original de uma mensagem (descomprime o BLOB zstd).
+      Usada pela view messages_fts_content, de onde o índice de busca (messages_fts)
+      lê o texto dos snippets e do 'rebuild', e pela expressão SQL de Message.content
+    
+    Conexões abertas fora do app (ex: sqlite3 CLI) não têm a função: escritas e
+    leituras em messages funcionam normalmente, mas consultas aos snippets ou um
+    'rebuild' do índice falham com "no such function: message_text". Scripts que
+    precisem deles devem registrá-la com este mesmo create_function.
+    """
+    dbapi_connection.create_function("message_text", 1, decompress_text, deterministic=True)
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(engine, "connect", _register_sqlite_functions)
+
 # Criar SessionLocal para gerenciar sessões do banco
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(database_url: str) -> str:
+    """Converte a URL síncrona do SQLite para o driver assíncrono (aiosqlite)"""
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+
+# Engine assíncrona (mesmo banco, driver aiosqlite) para rotas async
+async_engine = create_async_engine(get_async_database_url(settings.database_url))
+
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _register_sqlite_functions)
+
+# AsyncSessionLocal para sessões assíncronas
+# expire_on_commit=False evita lazy loads (I/O implícito) ao acessar atributos após o commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base para os modelos
 Base = declarative_base()
 
@@ -27,3 +92,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency para obter sessão assíncrona do banco de dados (não bloqueia o event loop)"""
+    async with AsyncSessionLocal() as db:
+        yield db
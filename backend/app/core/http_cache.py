@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from typing import Dict, Optional
+import hashlib
+
+# Sempre revalidar com o servidor (requisição condicional), sem cache compartilhado
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Gera uma ETag fraca a partir das partes que identificam a versão do recurso.
+
+    É fraca (W/) porque a mesma versão pode ser enviada com ou sem compressão.
+
+    Args:
+        parts: Valores que mudam sempre que o conteúdo muda (ex: id e versão)
+
+    Returns:
+        ETag no formato W/"..."
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def format_http_date(value: datetime) -> str:
+    """Formata uma data (UTC, com ou sem timezone) para o padrão HTTP (RFC 7231)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """
+    Headers de validação de cache de uma resposta.
+
+    Args:
+        etag: ETag da versão atual
+        last_modified: Data da última alteração (None se desconhecida)
+
+    Returns:
+        Headers ETag, Last-Modified e Cache-Control
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca de ETags (If-None-Match pode ter várias, ou *)"""
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Verifica se o cliente já tem a versão atual (requisição condicional).
+
+    If-None-Match tem prioridade; If-Modified-Since só é considerado sem ele.
+
+    Args:
+        request: Requisição recebida
+        etag: ETag da versão atual
+        last_modified: Data da última alteração
+
+    Returns:
+        True se a resposta pode ser 304 Not Modified
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+    # Datas HTTP têm resolução de segundos
+    return modified.replace(microsecond=0) <= since
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """Resposta 304 Not Modified (sem corpo) com os headers de validação"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,200 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import zlib
+from app.core.config import settings
+
+try:
+    # Opcional: sem o pacote brotli, apenas gzip é negociado
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas que não devem ser comprimidas: streaming de eventos (cada evento precisa
+# chegar imediatamente) e conteúdos já comprimidos
+_EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta a partir do header Accept-Encoding.
+
+    Prefere brotli (menor) e depois gzip; respeita `q=0` e o curinga `*`.
+
+    Args:
+        accept_encoding: Valor do header Accept-Encoding
+        brotli_available: Se o pacote brotli está instalado
+
+    Returns:
+        "br", "gzip" ou None (sem compressão)
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    for encoding in candidates:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class _Encoder:
+    """Compressor incremental de uma resposta (gzip ou brotli)"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: formato gzip (cabeçalho e checksum)
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Comprime um trecho; com `flush`, entrega tudo o que já foi recebido"""
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + self._brotli.flush() if flush else output
+
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Comprime o último trecho e encerra o fluxo"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão negociada das respostas (brotli ou gzip).
+
+    Só comprime respostas a partir de RESPONSE_COMPRESSION_MIN_BYTES, que ainda
+    não tenham Content-Encoding e cujo tipo não esteja na lista de exclusão
+    (o streaming SSE do chat nunca é comprimido). Respostas em streaming são
+    comprimidas trecho a trecho, com flush a cada trecho.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.response_compression_min_bytes,
+        gzip_level: int = settings.response_compression_gzip_level,
+        brotli_quality: int = settings.response_compression_brotli_quality
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Estado da compressão de uma única resposta"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream_send = send
+
+        self.start_message: Optional[Message] = None
+        # Definidos no primeiro trecho do corpo: comprime (encoder) ou repassa (passthrough)
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Adia o início até saber se o corpo será comprimido
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream_send(message)
+            return
+
+        if self.passthrough:
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not self._should_compress(headers, body, more_body):
+                self.passthrough = True
+                await self.downstream_send(self.start_message)
+                await self.downstream_send(message)
+                return
+
+            self.encoder = _Encoder(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                # Corpo completo: comprime de uma vez e informa o tamanho final
+                compressed = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream_send(self.start_message)
+                await self.downstream_send({"type": "http.response.body", "body": compressed})
+                return
+
+            del headers["Content-Length"]
+            await self.downstream_send(self.start_message)
+
+        if more_body:
+            chunk = self.encoder.compress(body, flush=True)
+        else:
+            chunk = self.encoder.finish(body)
+        await self.downstream_send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        """Decide, no primeiro trecho do corpo, se a resposta será comprimida"""
+        if "content-encoding" in headers:
+            return False
+
+        content_type = headers.get("content-type", "")
+        if any(content_type.startswith(excluded) for excluded in _EXCLUDED_CONTENT_TYPES):
+            return False
+
+        if more_body:
+            # Streaming: usa o Content-Length, se informado; senão comprime
+            content_length = headers.get("content-length")
+            return content_length is None or int(content_length) >= self.middleware.minimum_size
+
+        return len(body) >= self.middleware.minimum_size
@@ -0,0 +1,162 @@
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from app.core.config import settings
+from app.core.metrics import event_loop_blocks_total, event_loop_lag_seconds
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de bloqueios recentes mantidos para /stats
+_RECENT_BLOCKS = 20
+
+# Quantidade de frames (a partir do topo) guardados de cada pilha
+_STACK_LIMIT = 30
+
+
+class LoopLagMonitor:
+    """
+    Detector de bloqueios do event loop.
+
+    Um callback síncrono demorado (consulta síncrona ao banco, tokenização
+    grande, CPU em geral) atrasa todas as outras requisições do worker. Aqui:
+    - Uma tarefa no event loop acorda a cada LOOP_MONITOR_INTERVAL_MS e mede
+      quanto acordou atrasada (lag de agendamento), registrado em histograma
+    - Uma thread watchdog verifica se a tarefa continua acordando. Se o loop
+      ficar mais de LOOP_BLOCK_THRESHOLD_MS sem rodá-la, captura a pilha da
+      thread do loop naquele momento, ou seja, o código que está bloqueando
+
+    Cada bloqueio é registrado uma única vez: log WARNING com a pilha, métrica
+    event_loop_blocks_total e lista dos bloqueios recentes em /stats.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = settings.loop_monitor_interval_ms,
+        threshold_ms: float = settings.loop_block_threshold_ms
+    ):
+        """Configura o monitor (iniciado com `start`, dentro do event loop)"""
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+
+        # Última vez (monotônico) em que a tarefa do monitor rodou no loop
+        self._last_beat = 0.0
+        # Batida em que o bloqueio atual já foi registrado (evita registros repetidos)
+        self._reported_beat = 0.0
+
+        self.recent_blocks: Deque[dict] = deque(maxlen=_RECENT_BLOCKS)
+        self.blocks = 0
+        self.max_lag_seconds = 0.0
+        self.total_lag_seconds = 0.0
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Inicia a tarefa de medição e a thread watchdog (chamar dentro do event loop)"""
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Encerra a tarefa de medição e a thread watchdog"""
+        self._stop.set()
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _beat(self) -> None:
+        """Mede o atraso com que o loop executa a tarefa a cada intervalo"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+
+            lag = max(0.0, now - expected)
+            event_loop_lag_seconds.observe(lag)
+            self.samples += 1
+            self.total_lag_seconds += lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def _watch(self) -> None:
+        """Thread watchdog: captura a pilha do loop quando ele para de responder"""
+        check_interval = min(self.interval, self.threshold) / 2
+
+        while not self._stop.wait(check_interval):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+
+            if stalled > self.threshold and last_beat != self._reported_beat:
+                self._reported_beat = last_beat
+                self._record_block(stalled)
+
+    def _record_block(self, stalled: float) -> None:
+        """Registra um bloqueio com a pilha atual da thread do event loop"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack: List[str] = []
+        if frame is not None:
+            stack = [
+                line.rstrip()
+                for line in traceback.format_stack(frame)[-_STACK_LIMIT:]
+            ]
+
+        self.blocks += 1
+        event_loop_blocks_total.inc()
+        self.recent_blocks.append({
+            "detected_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "blocked_ms": round(stalled * 1000, 1),
+            "stack": stack,
+        })
+
+        logger.warning(
+            "Event loop bloqueado há %.0f ms (limite: %.0f ms). Pilha da thread do loop:\n%s",
+            stalled * 1000,
+            self.threshold * 1000,
+            "\n".join(stack)
+        )
+
+    def stats(self) -> dict:
+        """Estatísticas de lag e bloqueios recentes"""
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "samples": self.samples,
+            "avg_lag_ms": round(self.total_lag_seconds / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 3),
+            "blocks": self.blocks,
+            "recent_blocks": list(self.recent_blocks),
+        }
+
+
+# Instância única do monitor
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,242 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import time
+
+# Limites dos buckets (segundos) para latências: de 1 ms a 60 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Limites dos buckets para contagens de tokens
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Formata os labels no padrão Prometheus ({a="1",b="2"})"""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Formata um valor numérico (inteiros sem casas decimais)"""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Timer:
+    """Context manager que observa a duração do bloco em um histograma"""
+
+    __slots__ = ("_histogram", "_key", "_started_at")
+
+    def __init__(self, histogram: "Histogram", key: Tuple[str, ...]):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self) -> "_Timer":
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram._observe_key(self._key, time.perf_counter() - self._started_at)
+
+
+class Counter:
+    """Contador monotônico com labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Incrementa o contador da combinação de labels informada"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        """Linhas no formato de exposição do Prometheus"""
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Histograma com buckets fixos e labels.
+
+    Cada observação custa uma busca binária e três somas, sem locks: as
+    observações acontecem no event loop.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de labels: [contagens por bucket (+Inf ao final), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Registra uma observação"""
+        self._observe_key(tuple(str(labels[name]) for name in self.labelnames), value)
+
+    def time(self, **labels) -> _Timer:
+        """Context manager que observa a duração do bloco (segundos)"""
+        return _Timer(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def _observe_key(self, key: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        """Linhas no formato de exposição do Prometheus (buckets cumulativos, soma e total)"""
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class MetricsRegistry:
+    """
+    Registro das métricas do backend, exportadas em /metrics no formato texto do Prometheus.
+
+    Implementação mínima (contadores e histogramas) para não adicionar dependências
+    nem custo relevante ao caminho crítico.
+    """
+
+    def __init__(self, namespace: str = "genai"):
+        self.namespace = namespace
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Cria e registra um contador"""
+        metric = Counter(f"{self.namespace}_{name}", documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Cria e registra um histograma"""
+        metric = Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, gauges: Optional[Dict[str, dict]] = None) -> str:
+        """
+        Gera o texto de exposição de todas as métricas.
+
+        Args:
+            gauges: Estatísticas de componentes ({"componente": stats()}), exportadas
+                    como gauges `<namespace>_<componente>_<chave>` (apenas valores numéricos)
+
+        Returns:
+            Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)
+        """
+        lines = []
+
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        for component, stats in (gauges or {}).items():
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Registro único das métricas
+metrics = MetricsRegistry()
+
+# Duração de cada etapa do processamento de uma mensagem de chat
+chat_stage_seconds = metrics.histogram(
+    "chat_stage_seconds",
+    "Duração de cada etapa do processamento do chat (auth, context, token_check, llm, tokenize, persist, commit)",
+    ["stage"]
+)
+
+# Requisições de chat por resultado
+chat_requests_total = metrics.counter(
+    "chat_requests_total",
+    "Requisições de chat por endpoint, status HTTP e causa",
+    ["endpoint", "status", "cause"]
+)
+
+chat_request_seconds = metrics.histogram(
+    "chat_request_seconds",
+    "Duração total do processamento de uma mensagem de chat",
+    ["endpoint"]
+)
+
+# Chamadas ao modelo
+llm_request_seconds = metrics.histogram(
+    "llm_request_seconds",
+    "Latência das chamadas ao modelo (sem a espera na fila do escalonador)",
+    ["operation", "outcome"]
+)
+
+llm_queue_wait_seconds = metrics.histogram(
+    "llm_queue_wait_seconds",
+    "Espera por uma vaga no escalonador de chamadas ao modelo"
+)
+
+llm_prompt_tokens = metrics.histogram(
+    "llm_prompt_tokens",
+    "Tokens do contexto enviado ao modelo (resumo + histórico + nova mensagem)",
+    buckets=TOKEN_BUCKETS
+)
+
+llm_response_tokens = metrics.histogram(
+    "llm_response_tokens",
+    "Tokens das respostas do modelo",
+    buckets=TOKEN_BUCKETS
+)
+
+llm_response_cache_lookups_total = metrics.counter(
+    "llm_response_cache_lookups_total",
+    "Consultas ao cache de respostas do modelo por resultado (memory, shared, sqlite, miss)",
+    ["result"]
+)
+
+# Event loop
+event_loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds",
+    "Atraso de agendamento do event loop (tempo além do esperado para um callback rodar)"
+)
+
+event_loop_blocks_total = metrics.counter(
+    "event_loop_blocks_total",
+    "Vezes em que o event loop ficou bloqueado por mais que LOOP_BLOCK_THRESHOLD_MS"
+)
@@ -0,0 +1,241 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable, List, Tuple
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """Adiciona uma coluna a uma tabela existente (create_all não altera tabelas já criadas)"""
+    existing_columns = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column not in existing_columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_baseline_schema(conn: Connection) -> None:
+    """Versão 0: esquema original (antes do controle de versões por migrações)"""
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER NOT NULL,
+            email VARCHAR NOT NULL,
+            hashed_password VARCHAR NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+        "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+        """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            title VARCHAR NOT NULL,
+            qtd_tokens INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES users (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_conversations_id ON conversations (id)",
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER NOT NULL,
+            conversation_id INTEGER NOT NULL,
+            role VARCHAR NOT NULL,
+            content TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id),
+            FOREIGN KEY(conversation_id) REFERENCES conversations (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_messages_id ON messages (id)",
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _migration_001_conversation_summary(conn: Connection) -> None:
+    """Colunas do resumo incremental (rolling summary) da conversa"""
+    _add_column_if_missing(conn, "conversations", "summary", "TEXT")
+    _add_column_if_missing(conn, "conversations", "summarized_until_id", "INTEGER NOT NULL DEFAULT 0")
+
+
+def _migration_002_token_counts(conn: Connection) -> None:
+    """Contagem de tokens armazenada por mensagem e do resumo, com backfill dos registros existentes"""
+    # Import tardio: o service carrega o tokenizer, desnecessário para as demais migrações
+    from app.services.tokenizer_service import tokenizer_service
+
+    _add_column_if_missing(conn, "messages", "token_count", "INTEGER")
+    _add_column_if_missing(conn, "conversations", "summary_token_count", "INTEGER NOT NULL DEFAULT 0")
+
+    # Backfill em lotes para não carregar a tabela inteira em memória
+    batch_size = 500
+    while True:
+        rows = conn.execute(
+            text("SELECT id, content FROM messages WHERE token_count IS NULL LIMIT :limit"),
+            {"limit": batch_size}
+        ).fetchall()
+
+        if not rows:
+            break
+
+        token_counts = tokenizer_service.count_batch_sync([row.content for row in rows])
+        conn.execute(
+            text("UPDATE messages SET token_count = :token_count WHERE id = :id"),
+            [
+                {"id": row.id, "token_count": token_count}
+                for row, token_count in zip(rows, token_counts)
+            ]
+        )
+
+    summaries = conn.execute(
+        text("SELECT id, summary FROM conversations WHERE summary IS NOT NULL")
+    ).fetchall()
+    for row in summaries:
+        conn.execute(
+            text("UPDATE conversations SET summary_token_count = :token_count WHERE id = :id"),
+            {"id": row.id, "token_count": tokenizer_service.count_sync(row.summary)}
+        )
+
+
+def _migration_003_composite_indexes(conn: Connection) -> None:
+    """Índices compostos das consultas mais frequentes (histórico e listagem de conversas)"""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id_created_at "
+        "ON messages (conversation_id, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_user_id_created_at "
+        "ON conversations (user_id, created_at)"
+    ))
+    # Atualiza as estatísticas usadas pelo planejador de consultas
+    conn.execute(text("ANALYZE"))
+
+
+def _migration_004_keyset_indexes(conn: Connection) -> None:
+    """Índices para paginação keyset por id (conversas de um usuário e mensagens de uma conversa)"""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_conversations_user_id_id ON conversations (user_id, id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id_id ON messages (conversation_id, id)"
+    ))
+
+
+def _migration_005_response_cache(conn: Connection) -> None:
+    """Tabela do cache persistente de respostas do modelo"""
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            key VARCHAR NOT NULL,
+            response TEXT NOT NULL,
+            created_at FLOAT NOT NULL,
+            expires_at FLOAT NOT NULL,
+            PRIMARY KEY (key)
+        )
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_expires_at ON llm_response_cache (expires_at)"
+    ))
+
+
+def _migration_006_messages_fts(conn: Connection) -> None:
+    """Índice de busca textual (FTS5) sobre o conteúdo das mensagens, com backfill"""
+    # FTS5 com conteúdo externo: o índice guarda apenas os termos e lê o texto
+    # (snippets) da view messages_fts_content, pelo rowid = id da mensagem. A view
+    # descomprime o conteúdo com message_text(), registrada em cada conexão do app
+    # (app.core.database). Não há triggers: o SearchService indexa cada mensagem ao
+    # salvá-la e a remove do índice junto com a conversa (o comando 'delete' precisa
+    # do texto original).
+    conn.execute(text(
+        "CREATE VIEW IF NOT EXISTS messages_fts_content AS "
+        "SELECT id, message_text(content) AS content FROM messages"
+    ))
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+        "content, content = 'messages_fts_content', content_rowid = 'id', "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')"))
+
+
+def _migration_007_jobs(conn: Connection) -> None:
+    """Tabela da fila durável de tarefas em segundo plano"""
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER NOT NULL,
+            kind VARCHAR NOT NULL,
+            payload TEXT NOT NULL,
+            dedupe_key VARCHAR,
+            status VARCHAR NOT NULL,
+            attempts INTEGER NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            run_after FLOAT NOT NULL,
+            locked_until FLOAT,
+            last_error TEXT,
+            created_at FLOAT NOT NULL,
+            updated_at FLOAT NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_status_run_after ON jobs (status, run_after)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_dedupe_key_active ON jobs (dedupe_key) "
+        "WHERE status IN ('pending', 'running')"
+    ))
+
+
+def _migration_008_conversation_version(conn: Connection) -> None:
+    """Versão e data da última alteração de cada conversa (ETag/Last-Modified)"""
+    _add_column_if_missing(conn, "conversations", "version", "INTEGER NOT NULL DEFAULT 1")
+    _add_column_if_missing(conn, "conversations", "updated_at", "DATETIME")
+    conn.execute(text("UPDATE conversations SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+# Migrações versionadas (versão, função). A versão aplicada fica em PRAGMA user_version.
+# Novas migrações devem ser adicionadas ao final, com versão incremental.
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (1, _migration_001_conversation_summary),
+    (2, _migration_002_token_counts),
+    (3, _migration_003_composite_indexes),
+    (4, _migration_004_keyset_indexes),
+    (5, _migration_005_response_cache),
+    (6, _migration_006_messages_fts),
+    (7, _migration_007_jobs),
+    (8, _migration_008_conversation_version),
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    Cria e atualiza o esquema do banco de dados aplicando as migrações pendentes.
+
+    Substitui o `Base.metadata.create_all`: o esquema é definido apenas pelas
+    migrações. Todas as migrações pendentes rodam em uma única transação
+    `BEGIN IMMEDIATE`, que adquire o lock de escrita do SQLite antes de ler o
+    PRAGMA user_version. Assim, vários workers iniciando ao mesmo tempo aplicam
+    cada migração uma única vez.
+
+    Args:
+        engine: Engine síncrona do SQLAlchemy
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        current_version = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+        if current_version == 0:
+            _create_baseline_schema(conn)
+
+        for version, migration in MIGRATIONS:
+            if version <= current_version:
+                continue
+
+            migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+
+        conn.commit()
@@ -0,0 +1,45 @@
+from fastapi import HTTPException, status
+from typing import Optional
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Gera um cursor opaco para paginação keyset a partir do último ID retornado.
+    
+    Args:
+        last_id: ID do último registro da página atual
+        
+    Returns:
+        Cursor em base64 (url-safe)
+    """
+    payload = json.dumps({"id": last_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+    
+    Args:
+        cursor: Cursor recebido do cliente (ou None na primeira página)
+        
+    Returns:
+        ID a partir do qual a próxima página começa, ou None
+        
+    Raises:
+        HTTPException: 400 se o cursor for inválido
+    """
+    if not cursor:
+        return None
+    
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
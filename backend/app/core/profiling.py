@@ -0,0 +1,247 @@
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+import asyncio
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Header e parâmetro de query que ativam o profiling de uma requisição (valor = PROFILING_TOKEN)
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_QUERY_PARAM = "__profile"
+
+# Caracteres trocados nos nomes dos arquivos gerados
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Prefixos removidos dos caminhos nos frames (deixa as pilhas legíveis)
+_PATH_PREFIXES = sorted(
+    {path for path in sys.path if path} | {str(Path(__file__).resolve().parents[2])},
+    key=len,
+    reverse=True
+)
+
+
+def _short_filename(filename: str) -> str:
+    """Caminho do arquivo relativo ao sys.path (ex: app/services/chat_service.py)"""
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):].lstrip(os.sep)
+    return filename
+
+
+class StackSampler:
+    """
+    Amostrador de pilha de uma thread (a do event loop), em uma thread separada.
+
+    A cada intervalo lê o frame atual da thread alvo com `sys._current_frames()`
+    e acumula a pilha no formato collapsed (`raiz;...;folha contagem`), usado
+    pelo flamegraph.pl, speedscope e similares. Não instrumenta o código
+    amostrado: o custo fica na thread do amostrador.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        """
+        Args:
+            thread_id: Thread a ser amostrada
+            interval: Intervalo entre amostras (segundos)
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._frame_names: Dict[object, str] = {}
+
+    def start(self) -> None:
+        """Inicia a amostragem"""
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Encerra a amostragem e retorna as pilhas amostradas"""
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _frame_name(self, code) -> str:
+        """Nome do frame no formato `função (arquivo:linha)`"""
+        name = self._frame_names.get(code)
+        if name is None:
+            name = f"{code.co_name} ({_short_filename(code.co_filename)}:{code.co_firstlineno})"
+            # ";" separa frames no formato collapsed
+            name = self._frame_names[code] = name.replace(";", ":")
+        return name
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+
+
+class ProfileWriter:
+    """Grava os perfis em arquivos collapsed, com rotação por tamanho total do diretório"""
+
+    def __init__(
+        self,
+        directory: str = settings.profiling_dir,
+        max_bytes: int = settings.profiling_max_bytes
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_filename(method: str, path: str) -> str:
+        """
+        Nome do arquivo do perfil de uma requisição (definido no início, para o header).
+
+        Args:
+            method: Método HTTP da requisição
+            path: Caminho da requisição
+
+        Returns:
+            Nome do arquivo (`<timestamp>-<método>-<caminho>.folded`)
+        """
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = _UNSAFE_FILENAME_RE.sub("_", path.strip("/")) or "root"
+        return f"{stamp}-{method}-{slug[:60]}.folded"
+
+    def write(self, filename: str, samples: Counter) -> Path:
+        """
+        Grava um perfil e remove os mais antigos se o diretório exceder o limite.
+
+        Args:
+            filename: Nome do arquivo (ver `new_filename`)
+            samples: Pilhas amostradas (collapsed -> contagem)
+
+        Returns:
+            Caminho do arquivo gravado
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            output = self.directory / filename
+            output.write_text(
+                "".join(f"{stack} {count}\n" for stack, count in samples.most_common()),
+                encoding="utf-8"
+            )
+            self._rotate()
+
+        return output
+
+    def _rotate(self) -> None:
+        """Remove os perfis mais antigos até o diretório respeitar PROFILING_MAX_BYTES"""
+        files = sorted(self.directory.glob("*.folded"), key=lambda file: file.stat().st_mtime)
+        total = sum(file.stat().st_size for file in files)
+        while files and total > self.max_bytes:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI de profiling sob demanda, por amostragem de pilha.
+
+    Uma requisição é perfilada quando:
+    - Envia o header `X-Profile-Token` ou o parâmetro `?__profile=` com o valor
+      de PROFILING_TOKEN (restrito a quem tem o token), ou
+    - É sorteada pela taxa de amostragem PROFILING_SAMPLE_RATE
+
+    O perfil cobre todo o handler (dependências como get_current_user, a rota e
+    o envio da resposta, inclusive streams) e é gravado em PROFILING_DIR no
+    formato collapsed. O nome do arquivo volta no header `X-Profile-File`.
+
+    A amostragem é da thread do event loop: requisições concorrentes aparecem
+    no mesmo perfil, e a espera por I/O aparece como frames do event loop.
+    Apenas um perfil é capturado por vez; as demais requisições seguem sem profiling.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: Optional[str] = settings.profiling_token,
+        sample_rate: float = settings.profiling_sample_rate,
+        interval_ms: float = settings.profiling_interval_ms,
+        writer: Optional[ProfileWriter] = None
+    ):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.writer = writer or ProfileWriter()
+        self._active = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        """Indica se a requisição pediu profiling com o token correto"""
+        if not self.token:
+            return False
+
+        candidates = [value for name, value in scope["headers"] if name == PROFILE_HEADER]
+        query = scope.get("query_string", b"")
+        if PROFILE_QUERY_PARAM.encode() in query:
+            candidates.extend(
+                value.encode() for value in parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM, [])
+            )
+
+        expected = self.token.encode()
+        return any(hmac.compare_digest(candidate, expected) for candidate in candidates)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wanted = self._requested(scope) or (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+
+        if not wanted or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._active.release()
+
+    async def _profile(self, scope, receive, send) -> None:
+        """Executa a requisição com o amostrador ativo e grava o perfil"""
+        method, path = scope["method"], scope["path"]
+        filename = self.writer.new_filename(method, path)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", filename.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started_at = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            # join da thread e escrita do arquivo fora do event loop
+            samples = await asyncio.to_thread(sampler.stop)
+            try:
+                output = await asyncio.to_thread(self.writer.write, filename, samples)
+                logger.info("Perfil de %s %s (%.0f ms) gravado em %s", method, path, elapsed * 1000, output)
+            except OSError:
+                logger.warning("Falha ao gravar o perfil de %s %s", method, path, exc_info=True)
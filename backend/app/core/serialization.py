@@ -0,0 +1,74 @@
+from fastapi.responses import ORJSONResponse
+from typing import Any, Dict, Iterable, List, Optional
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+# Serialização direta (orjson) dos payloads mais pesados da API.
+#
+# As rotas de listagem e detalhe retornam um ORJSONResponse montado com os
+# dicionários abaixo, em vez de devolver os modelos do banco para o FastAPI
+# validar novamente contra o response_model (Pydantic com from_attributes) e
+# serializar com o encoder padrão. Os response_model continuam declarados nas
+# rotas para a documentação (OpenAPI): os dicionários têm os mesmos campos, na
+# mesma ordem, de ConversationResponse, MessageResponse, ConversationWithMessages
+# e MessagePage, e devem ser mantidos em sincronia com esses schemas.
+
+
+def conversation_to_dict(conversation: Conversation) -> Dict[str, Any]:
+    """Conversa no formato de ConversationResponse"""
+    return {
+        "title": conversation.title,
+        "id": conversation.id,
+        "user_id": conversation.user_id,
+        "created_at": conversation.created_at,
+    }
+
+
+def message_to_dict(message: Message) -> Dict[str, Any]:
+    """Mensagem no formato de MessageResponse"""
+    return {
+        "role": message.role,
+        "content": message.content,
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "created_at": message.created_at,
+    }
+
+
+def conversation_with_messages_to_dict(conversation: Conversation) -> Dict[str, Any]:
+    """Conversa com as mensagens já carregadas, no formato de ConversationWithMessages"""
+    payload = conversation_to_dict(conversation)
+    payload["messages"] = [message_to_dict(message) for message in conversation.messages]
+    return payload
+
+
+def message_page_to_dict(messages: Iterable[Message], next_cursor: Optional[str]) -> Dict[str, Any]:
+    """Página de mensagens no formato de MessagePage"""
+    return {
+        "items": [message_to_dict(message) for message in messages],
+        "next_cursor": next_cursor,
+    }
+
+
+def conversations_to_list(conversations: Iterable[Conversation]) -> List[Dict[str, Any]]:
+    """Lista de conversas no formato de List[ConversationResponse]"""
+    return [conversation_to_dict(conversation) for conversation in conversations]
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """
+    Resposta JSON serializada com orjson (datas em ISO 8601, como o Pydantic).
+
+    Args:
+        content: Dicionários/listas já no formato do schema da rota
+        status_code: Status HTTP
+        headers: Headers adicionais da resposta
+
+    Returns:
+        Resposta pronta, que o FastAPI envia sem validar contra o response_model
+    """
+    return ORJSONResponse(content=content, status_code=status_code, headers=headers)
@@ -1,22 +1,69 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
+from app.core.database import engine
+from app.core.cache_backend import cache_backend
+from app.core.cache_invalidation import cache_invalidator
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics as metrics_registry
+from app.core.migrations import run_migrations
+from app.core.http_compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware
 
 
-# Importar todos os modelos para criar as tabelas
+# Importar todos os modelos (registra os mapeamentos do SQLAlchemy)
 from app.models.user import User
 from app.models.conversation import Conversation
 from app.models.message import Message
+from app.models.response_cache import ResponseCacheEntry
+from app.models.job import Job
 from app.routers import auth, conversations, chat
+from app.auth.dependencies import require_monitoring_access
+from app.services.history_cache import history_cache
+from app.services.response_cache import response_cache
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_call_policy import llm_call_policy
+from app.services.message_compaction import message_compaction
+from app.services.job_queue import job_queue
+from app.auth.password_pool import password_pool
+
+# Criar/atualizar o esquema do banco de dados via migrações versionadas
+run_migrations(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialização e encerramento dos recursos do backend"""
+    # Monitorar bloqueios do event loop
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    # Receber as invalidações de cache publicadas pelos demais workers
+    await cache_invalidator.start()
+    # Comprimir em segundo plano as mensagens gravadas antes da compressão
+    if settings.message_compression_enabled:
+        message_compaction.start()
+    # Workers da fila de tarefas em segundo plano (retomam as pendentes de execuções anteriores)
+    job_queue.start()
+    
+    yield
+    
+    await job_queue.stop()
+    await message_compaction.stop()
+    await loop_monitor.stop()
+    await cache_invalidator.stop()
+    await cache_backend.close()
+    # Encerrar os processos do pool de hash de senhas
+    password_pool.shutdown()
 
-# Criar tabelas no banco de dados
-Base.metadata.create_all(bind=engine)
 
 # Inicializar aplicação FastAPI
 app = FastAPI(
     title="GenAI Chatbot API",
     description="API para chatbot com Google Gemini e LangChain",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -26,8 +73,17 @@ app.add_middleware(
     allow_credentials=True,  # Necessário para cookies
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],  # Cursor de paginação e validação de cache legíveis pelo frontend
 )
 
+# Profiling sob demanda (desativado por padrão)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Compressão das respostas (adicionado por último: envolve os demais middlewares)
+if settings.response_compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(conversations.router)
@@ -42,3 +98,38 @@ def root():
         "version": "1.0.0",
         "docs": "/docs"
     }
+
+
+def component_stats() -> dict:
+    """Estatísticas dos caches, pools e do escalonador, por componente"""
+    return {
+        "cache_backend": cache_invalidator.stats(),
+        "history_cache": history_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_calls": llm_call_policy.stats(),
+        "password_pool": password_pool.stats(),
+        "message_compaction": message_compaction.stats(),
+        "jobs": job_queue.stats(),
+        "event_loop": loop_monitor.stats()
+    }
+
+
+@app.get("/stats", dependencies=[Depends(require_monitoring_access)])
+def stats():
+    """Estatísticas internas dos caches e pools do backend"""
+    return component_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_monitoring_access)])
+def metrics():
+    """
+    Métricas no formato de exposição do Prometheus.
+    
+    Inclui os histogramas de latência por etapa do chat, chamadas ao modelo,
+    tokens e resultados por causa, além das estatísticas dos componentes como gauges.
+    """
+    return PlainTextResponse(
+        metrics_registry.render(component_stats()),
+        media_type="text/plain; version=0.0.4"
+    )
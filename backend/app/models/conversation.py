@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -7,13 +7,29 @@ from app.core.database import Base
 class Conversation(Base):
     """Modelo para a tabela de conversas"""
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Listagem das conversas de um usuário por data
+        Index("ix_conversations_user_id_created_at", "user_id", "created_at"),
+        # Paginação keyset das conversas de um usuário
+        Index("ix_conversations_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
     qtd_tokens = Column(Integer, nullable=False, default=0)
+    summary = Column(Text, nullable=True)  # Resumo incremental das mensagens antigas
+    summary_token_count = Column(Integer, nullable=False, default=0, server_default="0")  # Tokens do resumo
+    summarized_until_id = Column(Integer, nullable=False, default=0, server_default="0")  # Última mensagem incluída no resumo
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Incrementada a cada alteração (ETag)
+    updated_at = Column(DateTime(timezone=True), default=func.now())  # Última alteração (Last-Modified)
     
     # Relacionamentos
     user = relationship("User", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message", 
+        back_populates="conversation", 
+        cascade="all, delete-orphan",
+        order_by="Message.id"  # Ordem cronológica, a mesma das páginas de mensagens
+    )
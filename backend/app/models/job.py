@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Float, Index, Integer, String, Text, text
+from app.core.database import Base
+
+
+class Job(Base):
+    """Modelo para a tabela de tarefas em segundo plano (fila durável)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Próxima tarefa a executar
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # No máximo uma tarefa pendente/em execução por chave de deduplicação
+        Index(
+            "ux_jobs_dedupe_key_active",
+            "dedupe_key",
+            unique=True,
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # Tipo da tarefa (ex: "conversation_title")
+    payload = Column(Text, nullable=False)  # Parâmetros da tarefa em JSON
+    dedupe_key = Column(String, nullable=True)  # Evita tarefas repetidas (ex: "summary:42")
+    status = Column(String, nullable=False, default="pending")  # pending, running, done ou failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(Float, nullable=False)  # Timestamp Unix a partir do qual pode executar
+    locked_until = Column(Float, nullable=True)  # Fim da reserva do worker (tarefa em execução)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(Float, nullable=False)  # Timestamp Unix
+    updated_at = Column(Float, nullable=False)  # Timestamp Unix
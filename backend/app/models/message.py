@@ -1,18 +1,60 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from app.core.compression import compress_text, decompress_text
 from app.core.database import Base
 
 
 class Message(Base):
-    """Modelo para a tabela de mensagens"""
+    """
+    Modelo para a tabela de mensagens.
+    
+    O conteúdo é armazenado comprimido (zstd) a partir de MESSAGE_COMPRESSION_MIN_BYTES.
+    O atributo `content` é transparente: comprime ao atribuir e só descomprime no
+    primeiro acesso (o resultado fica memorizado na instância). Em consultas, 
+    `Message.content` é o texto original, descomprimido no SQL por message_text()
+    (registrada nas conexões do app por app.core.database).
+    """
     __tablename__ = "messages"
+    __table_args__ = (
+        # Histórico de uma conversa em ordem cronológica
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+        # Paginação keyset e janela de contexto (filtros por id)
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
     role = Column(String, nullable=False)  # "user" ou "assistant"
-    content = Column(Text, nullable=False)
+    _content = Column("content", Text, nullable=False)  # TEXT ou BLOB zstd (app.core.compression)
+    token_count = Column(Integer, nullable=True)  # Calculado uma única vez, ao salvar a mensagem
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relacionamento
     conversation = relationship("Conversation", back_populates="messages")
+    
+    # (valor armazenado, texto descomprimido) do último acesso a `content`
+    _content_cache = None
+    
+    @hybrid_property
+    def content(self) -> str:
+        stored = self._content
+        cached = self._content_cache
+        if cached is not None and cached[0] is stored:
+            return cached[1]
+        
+        text = decompress_text(stored)
+        self._content_cache = (stored, text)
+        return text
+    
+    @content.setter
+    def content(self, value: str) -> None:
+        stored = compress_text(value)
+        self._content = stored
+        self._content_cache = (stored, value)
+    
+    @content.expression
+    def content(cls):
+        # A coluna guarda TEXT ou BLOB: comparações e selects precisam do texto
+        return func.message_text(cls._content, type_=Text)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Float, Index, String, Text
+from app.core.database import Base
+
+
+class ResponseCacheEntry(Base):
+    """Modelo para a tabela do cache persistente de respostas do modelo"""
+    __tablename__ = "llm_response_cache"
+    __table_args__ = (
+        # Limpeza das entradas expiradas
+        Index("ix_llm_response_cache_expires_at", "expires_at"),
+    )
+    
+    key = Column(String, primary_key=True)  # Hash SHA-256 do contexto normalizado
+    response = Column(Text, nullable=False)
+    created_at = Column(Float, nullable=False)  # Timestamp Unix
+    expires_at = Column(Float, nullable=False)  # Timestamp Unix
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, Response, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.schemas.auth import LoginRequest, LoginResponse, LogoutResponse
 from app.schemas.user import UserCreate, UserResponse
 from app.services import user_service
 from app.auth.dependencies import get_current_user
 from app.auth.jwt import create_access_token
 from app.auth.cookies import set_auth_cookie, clear_auth_cookie
-from app.models.user import User
+from app.auth.user_cache import AuthenticatedUser
 
 
 router = APIRouter(
@@ -17,9 +17,9 @@ router = APIRouter(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Registra um novo usuário.
@@ -27,15 +27,15 @@ def register(
     - **email**: Email válido (será normalizado para lowercase)
     - **password**: Senha com no mínimo 8 caracteres, 1 número, 1 maiúscula e 1 caractere especial
     """
-    new_user = user_service.create_user(db, user_data)
+    new_user = await user_service.create_user(db, user_data)
     return new_user
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(
+async def login(
     credentials: LoginRequest,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Realiza login do usuário e define um cookie HttpOnly com o token JWT.
@@ -46,7 +46,7 @@ def login(
     O token é armazenado em um cookie HttpOnly (não acessível via JavaScript).
     """
     # Autenticar usuário
-    user = user_service.authenticate_user(db, credentials.email, credentials.password)
+    user = await user_service.authenticate_user(db, credentials.email, credentials.password)
     
     # Criar token JWT
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -72,7 +72,7 @@ def logout(response: Response):
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Retorna os dados do usuário autenticado.
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.auth.dependencies import get_current_user
-from app.models.user import User
+from app.auth.user_cache import AuthenticatedUser
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.services.chat_service import chat_service
 
@@ -16,8 +17,8 @@ router = APIRouter(
 @router.post("", response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Envia uma mensagem em uma conversa e recebe a resposta do assistente.
@@ -45,3 +46,40 @@ async def send_message(
         user_message=user_message,
         assistant_message=assistant_message
     )
+
+
+@router.post("/stream")
+async def send_message_stream(
+    chat_request: ChatRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Envia uma mensagem e recebe a resposta do assistente em streaming (Server-Sent Events).
+    
+    - **conversation_id**: ID da conversa
+    - **message**: Mensagem do usuário
+    
+    Eventos enviados:
+    - `chunk`: trecho da resposta assim que é gerado pelo Gemini
+    - `done`: mensagens do usuário e do assistente já salvas (mesmo formato de `POST /chat`)
+    - `error`: erro durante a geração (nenhuma mensagem é salva)
+    
+    As mensagens e a contagem de tokens só são persistidas quando o stream termina.
+    Retorna erro 404/429 (antes de iniciar o stream) nas mesmas condições de `POST /chat`.
+    """
+    events = await chat_service.stream_chat_message(
+        db=db,
+        conversation_id=chat_request.conversation_id,
+        user_id=current_user.id,
+        message_content=chat_request.message
+    )
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Evita buffering no Nginx
+        }
+    )
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.database import get_async_db
 from app.auth.dependencies import get_current_user
-from app.models.user import User
+from app.auth.user_cache import AuthenticatedUser
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import (
+    conversation_with_messages_to_dict,
+    conversations_to_list,
+    json_response,
+    message_page_to_dict
+)
 from app.schemas.conversation import (
     ConversationCreate, 
     ConversationResponse,
     ConversationWithMessages
 )
+from app.schemas.message import MessagePage
+from app.schemas.search import SearchPage
 from app.services.chat_service import chat_service
+from app.services.export_service import export_service
+from app.services.search_service import search_service
 
 
 router = APIRouter(
@@ -23,64 +37,209 @@ router = APIRouter(
     response_model=ConversationResponse, 
     status_code=status.HTTP_201_CREATED
 )
-def create_conversation(
+async def create_conversation(
     conversation_data: ConversationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cria uma nova conversa para o usuário autenticado.
     
     - **title**: Título da conversa
     """
-    return chat_service.create_conversation(db, current_user.id, conversation_data)
+    return await chat_service.create_conversation(db, current_user.id, conversation_data)
 
 
 @router.get("", response_model=List[ConversationResponse])
-def list_conversations(
+async def list_conversations(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lista as conversas do usuário autenticado, da mais recente para a mais antiga.
+    
+    - **limit**: Limite de registros a retornar
+    - **cursor**: Cursor da próxima página (valor do header `X-Next-Cursor` da resposta anterior)
+    - **skip**: Paginação por offset (legado; mais lenta em históricos grandes)
+    
+    Quando existem mais conversas, a resposta inclui o header `X-Next-Cursor`.
+    `skip` e `cursor` são modos de paginação diferentes e não podem ser combinados.
+    
+    A resposta inclui `ETag` e `Last-Modified`; com `If-None-Match` (ou
+    `If-Modified-Since`) de uma lista que não mudou, responde 304 sem corpo.
+    """
+    # skip e limit mantêm a semântica original (limit sem validação); o cursor
+    # só existe na paginação keyset, que precisa de páginas com ao menos 1 item
+    legacy = bool(skip) or limit < 1
+    if cursor and legacy:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor não pode ser combinado com skip nem com limit menor que 1"
+        )
+    
+    list_version, last_modified = await chat_service.get_user_conversations_version(db, current_user.id)
+    headers = cache_headers(
+        make_etag("conversations", current_user.id, list_version, skip, limit, cursor),
+        last_modified
+    )
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
+    
+    if legacy:
+        conversations = await chat_service.get_user_conversations(db, current_user.id, skip, limit)
+        return json_response(conversations_to_list(conversations), headers=headers)
+    
+    conversations, next_before_id = await chat_service.get_user_conversations_page(
+        db, 
+        current_user.id, 
+        limit, 
+        decode_cursor(cursor)
+    )
+    
+    if next_before_id is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_before_id)
+    
+    return json_response(conversations_to_list(conversations), headers=headers)
+
+
+# Declaradas antes de /{conversation_id} para não serem capturadas por ela
+@router.get("/search", response_model=SearchPage)
+async def search_conversations(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Busca textual nas mensagens de todas as conversas do usuário autenticado.
+    
+    - **q**: Texto da busca (todos os termos precisam aparecer; o último também por prefixo)
+    - **limit**: Limite de resultados por página (máximo 50)
+    - **cursor**: Cursor da próxima página (`next_cursor` da página anterior)
+    
+    Os resultados vêm ordenados por relevância, com um trecho da mensagem em que
+    os termos encontrados aparecem entre `<mark>` e `</mark>`.
+    """
+    results, next_offset = await search_service.search(
+        db, 
+        current_user.id, 
+        q, 
+        limit, 
+        decode_cursor(cursor) or 0
+    )
+    
+    return SearchPage(
+        items=results,
+        next_cursor=encode_cursor(next_offset) if next_offset is not None else None
+    )
+
+
+@router.get("/export")
+async def export_conversations(
+    gzip: bool = False,
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
-    Lista todas as conversas do usuário autenticado.
+    Exporta todas as conversas e mensagens do usuário autenticado em NDJSON (streaming).
+    
+    - **gzip**: Se true, o arquivo é comprimido em gzip (`.ndjson.gz`)
     
-    - **skip**: Quantidade de registros para pular (paginação)
-    - **limit**: Limite de registros a retornar (máximo 100)
+    Cada linha é um objeto JSON: uma linha `"type": "conversation"` seguida das
+    linhas `"type": "message"` da conversa, em ordem cronológica.
     """
-    return chat_service.get_user_conversations(db, current_user.id, skip, limit)
+    filename = f"conversations-{current_user.id}-{date.today().isoformat()}.ndjson"
+    if gzip:
+        filename += ".gz"
+    
+    return StreamingResponse(
+        export_service.export_user_conversations(current_user.id, compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{conversation_id}", response_model=ConversationWithMessages)
-def get_conversation(
+async def get_conversation(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Busca uma conversa específica com todas as suas mensagens.
     
     - **conversation_id**: ID da conversa
+    
+    A resposta inclui `ETag` e `Last-Modified`; com `If-None-Match` (ou
+    `If-Modified-Since`) de uma versão que não mudou, responde 304 sem carregar
+    as mensagens.
     """
-    conversation = chat_service.get_conversation_by_id(
+    version, last_modified = await chat_service.get_conversation_version(
         db, 
         conversation_id, 
         current_user.id
     )
-    return conversation
+    headers = cache_headers(make_etag("conversation", conversation_id, version), last_modified)
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
+    
+    conversation = await chat_service.get_conversation_by_id(
+        db, 
+        conversation_id, 
+        current_user.id,
+        with_messages=True
+    )
+    return json_response(conversation_with_messages_to_dict(conversation), headers=headers)
+
+
+@router.get("/{conversation_id}/messages", response_model=MessagePage)
+async def list_conversation_messages(
+    conversation_id: int,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Busca as mensagens de uma conversa em páginas, começando pelas mais recentes.
+    
+    - **conversation_id**: ID da conversa
+    - **before**: Cursor para buscar mensagens mais antigas (`next_cursor` da página anterior)
+    - **limit**: Limite de mensagens por página (máximo 100)
+    
+    As mensagens de cada página vêm em ordem cronológica.
+    """
+    # Verifica ownership
+    await chat_service.get_conversation_by_id(db, conversation_id, current_user.id)
+    
+    messages, next_before_id = await chat_service.get_conversation_messages_page(
+        db, 
+        conversation_id, 
+        limit, 
+        decode_cursor(before)
+    )
+    
+    return json_response(message_page_to_dict(
+        messages,
+        encode_cursor(next_before_id) if next_before_id is not None else None
+    ))
 
 
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Deleta uma conversa e todas as suas mensagens.
     
     - **conversation_id**: ID da conversa
     """
-    chat_service.delete_conversation(db, conversation_id, current_user.id)
+    await chat_service.delete_conversation(db, conversation_id, current_user.id)
     return None
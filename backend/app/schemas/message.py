@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 
 class MessageBase(BaseModel):
@@ -22,3 +22,9 @@ class MessageResponse(MessageBase):
     
     class Config:
         from_attributes = True
+
+
+class MessagePage(BaseModel):
+    """Schema de uma página de mensagens (paginação por cursor)"""
+    items: List[MessageResponse]
+    next_cursor: Optional[str] = None  # Cursor para buscar mensagens mais antigas (None se não houver)
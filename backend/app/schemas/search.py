@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class SearchResult(BaseModel):
+    """Schema de uma mensagem encontrada na busca textual"""
+    message_id: int
+    conversation_id: int
+    conversation_title: str
+    role: str
+    snippet: str  # Trecho da mensagem com os termos encontrados entre <mark> e </mark>
+    created_at: datetime
+
+
+class SearchPage(BaseModel):
+    """Schema de uma página de resultados da busca (ordenados por relevância)"""
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None  # Cursor da próxima página (None se não houver)
@@ -1,11 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
-from typing import List, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+import json
+import time
+from app.core.cache_invalidation import cache_invalidator
+from app.core.config import settings
+from app.core.metrics import (
+    chat_request_seconds,
+    chat_requests_total,
+    chat_stage_seconds,
+    llm_prompt_tokens,
+    llm_response_tokens,
+)
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.schemas.conversation import ConversationCreate
+from app.schemas.message import MessageResponse
 from app.services.langchain_service import langchain_service
+from app.services.context_service import context_service
+from app.services.history_cache import CachedMessage, history_cache
+from app.services.job_queue import job_queue
+from app.services.search_service import search_service
 
 
 class ChatService:
@@ -19,9 +38,9 @@ class ChatService:
     - Controle de limite de tokens
     """
     
-    def create_conversation(
+    async def create_conversation(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: int, 
         conversation_data: ConversationCreate
     ) -> Conversation:
@@ -44,27 +63,30 @@ class ChatService:
             )
             
             db.add(new_conversation)
-            db.commit()
-            db.refresh(new_conversation)
+            await db.commit()
+            await db.refresh(new_conversation)
             
             return new_conversation
         
         except SQLAlchemyError as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao criar conversa: {str(e)}"
             )
     
-    def get_user_conversations(
+    async def get_user_conversations(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[Conversation]:
         """
-        Lista todas as conversas de um usuário.
+        Lista todas as conversas de um usuário (paginação por offset, legado).
+        
+        Usa a mesma ordem da paginação por cursor (id decrescente, ou seja, ordem
+        de criação), para que a rota retorne a mesma sequência nos dois modos.
         
         Args:
             db: Sessão do banco de dados
@@ -75,18 +97,59 @@ class ChatService:
         Returns:
             Lista de conversas do usuário
         """
-        return db.query(Conversation)\
-            .filter(Conversation.user_id == user_id)\
-            .order_by(Conversation.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        result = await db.execute(
+            select(Conversation)
+            .where(Conversation.user_id == user_id)
+            .order_by(Conversation.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    async def get_user_conversations_page(
+        self, 
+        db: AsyncSession, 
+        user_id: int,
+        limit: int = 100,
+        before_id: Optional[int] = None
+    ) -> tuple[List[Conversation], Optional[int]]:
+        """
+        Lista as conversas de um usuário com paginação keyset (cursor).
+        
+        Em vez de OFFSET, que lê e descarta todas as linhas anteriores, filtra por
+        `id < before_id`. O custo de cada página não cresce com o histórico. Como o
+        id é autoincremental, a ordem por id decrescente é a ordem de criação.
+        
+        Args:
+            db: Sessão do banco de dados
+            user_id: ID do usuário
+            limit: Limite de registros a retornar
+            before_id: Retorna apenas conversas com id menor (None na primeira página)
+            
+        Returns:
+            Tupla (conversas, id_para_proxima_pagina ou None se não houver mais)
+        """
+        query = select(Conversation).where(Conversation.user_id == user_id)
+        
+        if before_id is not None:
+            query = query.where(Conversation.id < before_id)
+        
+        # Busca um registro a mais para saber se existe próxima página
+        result = await db.execute(query.order_by(Conversation.id.desc()).limit(limit + 1))
+        conversations = list(result.scalars().all())
+        
+        has_more = len(conversations) > limit
+        conversations = conversations[:limit]
+        next_before_id = conversations[-1].id if has_more else None
+        
+        return conversations, next_before_id
     
-    def get_conversation_by_id(
+    async def get_conversation_by_id(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         conversation_id: int,
-        user_id: int
+        user_id: int,
+        with_messages: bool = False
     ) -> Conversation:
         """
         Busca uma conversa específica por ID.
@@ -95,6 +158,7 @@ class ChatService:
             db: Sessão do banco de dados
             conversation_id: ID da conversa
             user_id: ID do usuário (para verificar ownership)
+            with_messages: Se True, carrega as mensagens junto (sessões async não fazem lazy load)
             
         Returns:
             Conversa encontrada
@@ -102,12 +166,16 @@ class ChatService:
         Raises:
             HTTPException: Se conversa não existir ou não pertencer ao usuário
         """
-        conversation = db.query(Conversation)\
-            .filter(
-                Conversation.id == conversation_id,
-                Conversation.user_id == user_id
-            )\
-            .first()
+        query = select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == user_id
+        )
+        
+        if with_messages:
+            query = query.options(selectinload(Conversation.messages))
+        
+        result = await db.execute(query)
+        conversation = result.scalar_one_or_none()
         
         if not conversation:
             raise HTTPException(
@@ -117,14 +185,87 @@ class ChatService:
         
         return conversation
     
-    def delete_conversation(
+    async def get_conversation_version(
         self, 
-        db: Session, 
+        db: AsyncSession, 
+        conversation_id: int,
+        user_id: int
+    ) -> tuple[int, Optional[datetime]]:
+        """
+        Busca apenas a versão e a data da última alteração de uma conversa.
+        
+        Usada nas requisições condicionais (If-None-Match): responde 304 sem
+        carregar a conversa nem as mensagens.
+        
+        Args:
+            db: Sessão do banco de dados
+            conversation_id: ID da conversa
+            user_id: ID do usuário (para verificar ownership)
+            
+        Returns:
+            Tupla (versão, data_da_última_alteração)
+            
+        Raises:
+            HTTPException: Se conversa não existir ou não pertencer ao usuário
+        """
+        result = await db.execute(
+            select(Conversation.version, Conversation.updated_at).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id
+            )
+        )
+        row = result.one_or_none()
+        
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversa não encontrada ou você não tem permissão para acessá-la"
+            )
+        
+        return row.version, row.updated_at
+    
+    async def get_user_conversations_version(
+        self, 
+        db: AsyncSession, 
+        user_id: int
+    ) -> tuple[str, Optional[datetime]]:
+        """
+        Calcula a versão da lista de conversas de um usuário em uma única agregação.
+        
+        A versão muda quando uma conversa é criada ou removida (quantidade e maior id)
+        ou alterada (soma das versões), sem carregar as conversas.
+        
+        Args:
+            db: Sessão do banco de dados
+            user_id: ID do usuário
+            
+        Returns:
+            Tupla (versão, data_da_última_alteração ou None se não houver conversas)
+        """
+        result = await db.execute(
+            select(
+                func.count(Conversation.id),
+                func.max(Conversation.id),
+                func.sum(Conversation.version),
+                func.max(func.coalesce(Conversation.updated_at, Conversation.created_at))
+            ).where(Conversation.user_id == user_id)
+        )
+        count, max_id, version_sum, last_modified = result.one()
+        
+        # MAX sobre uma expressão volta como texto no SQLite
+        if isinstance(last_modified, str):
+            last_modified = datetime.fromisoformat(last_modified)
+        
+        return f"{count}:{max_id or 0}:{version_sum or 0}", last_modified
+    
+    async def delete_conversation(
+        self, 
+        db: AsyncSession, 
         conversation_id: int,
         user_id: int
     ) -> None:
         """
-        Deleta uma conversa (e todas suas mensagens em cascata).
+        Deleta uma conversa (e todas suas mensagens em cascata, também no índice de busca).
         
         Args:
             db: Sessão do banco de dados
@@ -134,21 +275,24 @@ class ChatService:
         Raises:
             HTTPException: Se conversa não existir ou não pertencer ao usuário
         """
-        conversation = self.get_conversation_by_id(db, conversation_id, user_id)
+        conversation = await self.get_conversation_by_id(db, conversation_id, user_id)
         
         try:
-            db.delete(conversation)
-            db.commit()
+            await search_service.remove_conversation(db, conversation_id)
+            await db.delete(conversation)
+            await db.commit()
+            history_cache.evict(conversation_id)
+            cache_invalidator.publish_nowait("conversation", conversation_id)
         except SQLAlchemyError as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao deletar conversa: {str(e)}"
             )
     
-    def get_conversation_messages(
+    async def get_conversation_messages(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         conversation_id: int
     ) -> List[Message]:
         """
@@ -159,46 +303,101 @@ class ChatService:
             conversation_id: ID da conversa
             
         Returns:
-            Lista de mensagens ordenadas por data de criação
+            Lista de mensagens em ordem cronológica (id, a mesma ordem das páginas)
+        """
+        result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.id.asc())
+        )
+        return list(result.scalars().all())
+    
+    async def get_conversation_messages_page(
+        self, 
+        db: AsyncSession, 
+        conversation_id: int,
+        limit: int = 50,
+        before_id: Optional[int] = None
+    ) -> tuple[List[Message], Optional[int]]:
+        """
+        Busca uma página de mensagens de uma conversa, da mais recente para a mais antiga.
+        
+        A primeira página traz as últimas mensagens. As seguintes, obtidas com
+        `before_id`, trazem mensagens cada vez mais antigas (paginação keyset).
+        
+        Args:
+            db: Sessão do banco de dados
+            conversation_id: ID da conversa
+            limit: Limite de mensagens a retornar
+            before_id: Retorna apenas mensagens com id menor (None para as mais recentes)
+            
+        Returns:
+            Tupla (mensagens em ordem cronológica, id_para_pagina_anterior ou None)
         """
-        return db.query(Message)\
-            .filter(Message.conversation_id == conversation_id)\
-            .order_by(Message.created_at.asc())\
-            .all()
+        query = select(Message).where(Message.conversation_id == conversation_id)
+        
+        if before_id is not None:
+            query = query.where(Message.id < before_id)
+        
+        # Busca um registro a mais para saber se existem mensagens mais antigas
+        result = await db.execute(query.order_by(Message.id.desc()).limit(limit + 1))
+        messages = list(result.scalars().all())
+        
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        next_before_id = messages[-1].id if has_more else None
+        
+        # Página retornada em ordem cronológica
+        messages.reverse()
+        
+        return messages, next_before_id
     
-    def _save_message(
+    async def _save_message(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         conversation_id: int, 
         role: str, 
-        content: str
+        content: str,
+        token_count: Optional[int] = None
     ) -> Message:
         """
         Salva uma mensagem no banco de dados.
         
+        A contagem de tokens é calculada aqui, uma única vez, e armazenada na mensagem
+        para que o orçamento de tokens e a janela de contexto não precisem tokenizar
+        o histórico novamente. A mensagem também é indexada para a busca textual,
+        na mesma transação.
+        
         Args:
             db: Sessão do banco de dados
             conversation_id: ID da conversa
             role: Papel da mensagem ("user" ou "assistant")
             content: Conteúdo da mensagem
+            token_count: Tokens da mensagem, se já calculados (ex: na verificação de limite)
             
         Returns:
             Mensagem salva
         """
+        if token_count is None:
+            with chat_stage_seconds.time(stage="tokenize"):
+                token_count = await langchain_service.count_tokens(content)
+        
         message = Message(
             conversation_id=conversation_id,
             role=role,
-            content=content
+            content=content,
+            token_count=token_count
         )
         
         db.add(message)
-        db.flush()  # Flush para obter o ID, mas não commita ainda
+        await db.flush()  # Flush para obter o ID, mas não commita ainda
+        await search_service.index_message(db, message)
         
         return message
     
-    def _update_conversation_tokens(
+    async def _update_conversation_tokens(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         conversation: Conversation, 
         tokens_used: int
     ) -> None:
@@ -211,25 +410,105 @@ class ChatService:
             tokens_used: Tokens utilizados nesta interação
         """
         conversation.qtd_tokens += tokens_used
-        db.flush()
+        self._touch_conversation(conversation)
+        await db.flush()
     
-    async def process_chat_message(
+    def _touch_conversation(self, conversation: Conversation) -> None:
+        """
+        Marca uma conversa como alterada: incrementa a versão e a data da última
+        alteração (usadas em ETag/Last-Modified), gravadas no próximo flush.
+        
+        O incremento é feito no banco (version = version + 1), sem perder alterações
+        concorrentes. Os dois atributos ficam expirados após o flush e não devem ser
+        lidos depois na sessão async (recarregue com `db.refresh` se necessário).
+        
+        Args:
+            conversation: Conversa alterada
+        """
+        conversation.version = Conversation.version + 1
+        conversation.updated_at = func.now()
+    
+    @staticmethod
+    def _is_placeholder_title(title: Optional[str], first_message: str) -> bool:
+        """
+        Indica se o título é provisório: vazio ou um trecho do início da primeira
+        mensagem (o frontend cria a conversa com os primeiros caracteres dela).
+        
+        Args:
+            title: Título atual da conversa
+            first_message: Primeira mensagem do usuário
+            
+        Returns:
+            True se o título pode ser substituído pelo gerado pelo modelo
+        """
+        stem = (title or "").strip().removesuffix("...").rstrip()
+        return not stem or first_message.strip().startswith(stem)
+    
+    async def generate_title(self, db: AsyncSession, payload: dict) -> None:
+        """
+        Tarefa em segundo plano (fila "conversation_title") que gera o título da conversa
+        com o modelo, a partir da primeira mensagem do usuário.
+        
+        Só substitui um título provisório (vazio ou trecho da primeira mensagem) e
+        apenas se ele não mudou desde o enfileiramento: um título escolhido pelo
+        cliente nunca é sobrescrito.
+        
+        Falhas são propagadas para que a fila tente novamente; o título original
+        é mantido até lá.
+        
+        Args:
+            db: Sessão própria da tarefa
+            payload: {"conversation_id": ..., "title": título no enfileiramento}
+        """
+        conversation = await db.get(Conversation, payload["conversation_id"])
+        if conversation is None:
+            # Conversa deletada depois do enfileiramento
+            return
+        
+        expected_title = payload.get("title", conversation.title)
+        if conversation.title != expected_title:
+            return
+        
+        result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation.id, Message.role == "user")
+            .order_by(Message.id.asc())
+            .limit(1)
+        )
+        first_message = result.scalar_one_or_none()
+        if first_message is None or not self._is_placeholder_title(expected_title, first_message.content):
+            return
+        
+        new_title = await langchain_service.generate_conversation_title(
+            first_message.content,
+            conversation.user_id
+        )
+        
+        # Condicional no banco: ignora se o título mudou durante a geração
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation.id, Conversation.title == expected_title)
+            .values(
+                title=new_title,
+                version=Conversation.version + 1,
+                updated_at=func.now()
+            )
+        )
+        await db.commit()
+    
+    async def _prepare_chat_turn(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         conversation_id: int,
         user_id: int,
         message_content: str
-    ) -> tuple[Message, Message]:
+    ) -> tuple[Conversation, Optional[str], List[CachedMessage], int]:
         """
-        Processa uma mensagem de chat completa.
+        Valida a conversa e o limite de tokens e monta o contexto antes de chamar o modelo.
         
-        Este método:
-        1. Valida se a conversa existe e pertence ao usuário
-        2. Verifica se há tokens disponíveis
-        3. Busca o histórico de mensagens
-        4. Envia para o LangChain processar
-        5. Salva ambas as mensagens (usuário e assistente)
-        6. Atualiza a contagem de tokens
+        Com a compactação de contexto ativa, o limite de tokens é verificado sobre o
+        contexto enviado (resumo + mensagens recentes), e não sobre o total acumulado
+        da conversa, permitindo continuar conversas longas.
         
         Args:
             db: Sessão do banco de dados
@@ -238,70 +517,368 @@ class ChatService:
             message_content: Conteúdo da mensagem do usuário
             
         Returns:
-            Tupla (mensagem_do_usuario, mensagem_do_assistente)
+            Tupla (conversa, resumo, histórico_de_mensagens, tokens_da_nova_mensagem)
             
         Raises:
-            HTTPException: Se limite de tokens for excedido ou erro no processamento
+            HTTPException: Se a conversa não existir ou o limite de tokens for excedido
         """
         # 1. Valida conversa
-        conversation = self.get_conversation_by_id(db, conversation_id, user_id)
+        conversation = await self.get_conversation_by_id(db, conversation_id, user_id)
         
-        # 2. Verifica limite de tokens
-        can_send, estimated_tokens = langchain_service.check_token_limit(
-            conversation.qtd_tokens, 
-            message_content
-        )
+        with chat_stage_seconds.time(stage="tokenize"):
+            message_tokens = await langchain_service.count_tokens(message_content)
+        
+        # 2. Monta o contexto (resumo + mensagens recentes) ou busca o histórico completo
+        with chat_stage_seconds.time(stage="context"):
+            summary, message_history = await context_service.build_context(
+                db, 
+                conversation, 
+                message_tokens
+            )
+        
+        if context_service.enabled:
+            current_tokens = langchain_service.calculate_context_tokens(
+                message_history, 
+                conversation.summary_token_count
+            )
+        else:
+            current_tokens = conversation.qtd_tokens
+        
+        # 3. Verifica limite de tokens
+        with chat_stage_seconds.time(stage="token_check"):
+            can_send, estimated_tokens = await langchain_service.check_token_limit(
+                current_tokens, 
+                message_content,
+                message_tokens
+            )
         
         if not can_send:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail=f"Limite de tokens atingido para esta conversa. "
-                       f"Tokens usados: {conversation.qtd_tokens}/{langchain_service.max_tokens}. "
+                       f"Tokens usados: {current_tokens}/{langchain_service.max_tokens}. "
                        f"Crie uma nova conversa para continuar."
             )
         
-        # 3. Busca histórico
-        message_history = self.get_conversation_messages(db, conversation_id)
+        llm_prompt_tokens.observe(current_tokens + estimated_tokens)
         
-        try:
-            # 4. Processa com LangChain
-            assistant_response, tokens_used = await langchain_service.generate_response(
-                message_history,
-                message_content
-            )
+        return conversation, summary, message_history, estimated_tokens
+    
+    async def _persist_chat_turn(
+        self, 
+        db: AsyncSession, 
+        conversation: Conversation,
+        message_content: str,
+        message_tokens: int,
+        assistant_response: str,
+        message_history: List[CachedMessage]
+    ) -> tuple[Message, Message]:
+        """
+        Salva as mensagens do usuário e do assistente e atualiza os tokens da conversa.
+        
+        Args:
+            db: Sessão do banco de dados
+            conversation: Conversa da interação
+            message_content: Conteúdo da mensagem do usuário
+            message_tokens: Tokens da mensagem do usuário (já calculados na verificação de limite)
+            assistant_response: Resposta gerada pelo modelo
+            message_history: Mensagens enviadas literalmente ao modelo neste turno
             
-            # 5. Salva mensagens
-            user_message = self._save_message(
+        Returns:
+            Tupla (mensagem_do_usuario, mensagem_do_assistente)
+        """
+        # 5. Salva mensagens
+        with chat_stage_seconds.time(stage="persist"):
+            user_message = await self._save_message(
                 db, 
-                conversation_id, 
+                conversation.id, 
                 "user", 
-                message_content
+                message_content,
+                message_tokens
             )
             
-            assistant_message = self._save_message(
+            assistant_message = await self._save_message(
                 db, 
-                conversation_id, 
+                conversation.id, 
                 "assistant", 
                 assistant_response
             )
             
-            # 6. Atualiza tokens
-            self._update_conversation_tokens(db, conversation, tokens_used)
+            # Primeiro turno: título gerado pelo modelo em segundo plano
+            if settings.llm_title_enabled and conversation.qtd_tokens == 0:
+                await job_queue.enqueue(
+                    db,
+                    "conversation_title",
+                    {"conversation_id": conversation.id, "title": conversation.title},
+                    dedupe_key=f"title:{conversation.id}"
+                )
+            
+            # Resumo atrasado: atualizado em segundo plano. Enfileirado só aqui, depois
+            # da geração, para não manter o lock de escrita do SQLite durante o modelo
+            if context_service.needs_summary_refresh(message_history):
+                await job_queue.enqueue(
+                    db,
+                    "conversation_summary",
+                    {"conversation_id": conversation.id},
+                    dedupe_key=f"summary:{conversation.id}"
+                )
+            
+            # 6. Atualiza tokens (usuário + assistente, com as contagens já salvas)
+            tokens_used = user_message.token_count + assistant_message.token_count
+            await self._update_conversation_tokens(db, conversation, tokens_used)
+        
+        # Commit final
+        with chat_stage_seconds.time(stage="commit"):
+            await db.commit()
+            await db.refresh(user_message)
+            await db.refresh(assistant_message)
+        
+        llm_response_tokens.observe(assistant_message.token_count)
+        
+        # Tarefas enfileiradas no turno (título, resumo) já podem ser executadas
+        job_queue.notify()
+        
+        # Write-through: anexa o turno ao histórico em cache (e invalida nos demais workers)
+        history_cache.append(conversation.id, [user_message, assistant_message])
+        cache_invalidator.publish_nowait("conversation", conversation.id)
+        
+        return user_message, assistant_message
+    
+    async def process_chat_message(
+        self, 
+        db: AsyncSession, 
+        conversation_id: int,
+        user_id: int,
+        message_content: str
+    ) -> tuple[Message, Message]:
+        """
+        Processa uma mensagem de chat completa.
+        
+        Este método:
+        1. Valida se a conversa existe e pertence ao usuário
+        2. Monta o contexto (resumo incremental + mensagens recentes)
+        3. Verifica se há tokens disponíveis
+        4. Envia para o LangChain processar
+        5. Salva ambas as mensagens (usuário e assistente)
+        6. Atualiza a contagem de tokens
+        
+        Args:
+            db: Sessão do banco de dados
+            conversation_id: ID da conversa
+            user_id: ID do usuário
+            message_content: Conteúdo da mensagem do usuário
             
-            # Commit final
-            db.commit()
-            db.refresh(user_message)
-            db.refresh(assistant_message)
+        Returns:
+            Tupla (mensagem_do_usuario, mensagem_do_assistente)
             
-            return user_message, assistant_message
+        Raises:
+            HTTPException: Se limite de tokens for excedido ou erro no processamento
+        """
+        started_at = time.perf_counter()
+        
+        try:
+            conversation, summary, message_history, message_tokens = await self._prepare_chat_turn(
+                db, 
+                conversation_id, 
+                user_id, 
+                message_content
+            )
+        except HTTPException as e:
+            record_chat_result("chat", e.status_code)
+            raise
+        
+        stage = "llm"
+        try:
+            # 4. Processa com LangChain
+            with chat_stage_seconds.time(stage="llm"):
+                assistant_response = await langchain_service.generate_response(
+                    message_history,
+                    message_content,
+                    summary,
+                    user_id
+                )
+            
+            stage = "persist"
+            result = await self._persist_chat_turn(
+                db, 
+                conversation, 
+                message_content, 
+                message_tokens, 
+                assistant_response,
+                message_history
+            )
+        
+        except HTTPException as e:
+            # Erros HTTP já tratados (ex: 503 do escalonador) são repassados
+            await db.rollback()
+            record_chat_result("chat", e.status_code)
+            raise
         
         except Exception as e:
-            db.rollback()
+            await db.rollback()
+            record_chat_result("chat", status.HTTP_500_INTERNAL_SERVER_ERROR, f"{stage}_error")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao processar mensagem: {str(e)}"
             )
+        
+        record_chat_result("chat", status.HTTP_200_OK)
+        chat_request_seconds.observe(time.perf_counter() - started_at, endpoint="chat")
+        return result
+    
+    async def stream_chat_message(
+        self, 
+        db: AsyncSession, 
+        conversation_id: int,
+        user_id: int,
+        message_content: str
+    ) -> AsyncIterator[str]:
+        """
+        Processa uma mensagem de chat em streaming (Server-Sent Events).
+        
+        As validações (conversa e limite de tokens) acontecem antes do stream começar,
+        para que erros 404/429 sejam retornados como respostas HTTP normais. Os eventos
+        produzidos são:
+        - `chunk`: trecho da resposta ({"content": "..."})
+        - `done`: mensagens salvas ({"user_message": {...}, "assistant_message": {...}})
+        - `error`: falha durante a geração ({"detail": "..."})
+        
+        Args:
+            db: Sessão do banco de dados
+            conversation_id: ID da conversa
+            user_id: ID do usuário
+            message_content: Conteúdo da mensagem do usuário
+            
+        Returns:
+            Iterador assíncrono de eventos SSE já formatados
+            
+        Raises:
+            HTTPException: Se a conversa não existir ou o limite de tokens for excedido
+        """
+        started_at = time.perf_counter()
+        
+        try:
+            conversation, summary, message_history, message_tokens = await self._prepare_chat_turn(
+                db, 
+                conversation_id, 
+                user_id, 
+                message_content
+            )
+        except HTTPException as e:
+            record_chat_result("stream", e.status_code)
+            raise
+        
+        return self._stream_chat_events(
+            db, 
+            conversation, 
+            summary, 
+            message_history, 
+            message_content, 
+            message_tokens,
+            started_at
+        )
+    
+    async def _stream_chat_events(
+        self, 
+        db: AsyncSession, 
+        conversation: Conversation,
+        summary: Optional[str],
+        message_history: List[CachedMessage],
+        message_content: str,
+        message_tokens: int,
+        started_at: float
+    ) -> AsyncIterator[str]:
+        """
+        Gera os eventos SSE da resposta e persiste as mensagens ao final do stream.
+        
+        Se o cliente desconectar antes do fim, nada é salvo.
+        """
+        chunks: List[str] = []
+        stage = "llm"
+        
+        try:
+            with chat_stage_seconds.time(stage="llm_stream"):
+                async for chunk in langchain_service.stream_response(
+                    message_history, 
+                    message_content, 
+                    summary,
+                    conversation.user_id
+                ):
+                    chunks.append(chunk)
+                    yield format_sse_event("chunk", {"content": chunk})
+            
+            stage = "persist"
+            user_message, assistant_message = await self._persist_chat_turn(
+                db, 
+                conversation, 
+                message_content, 
+                message_tokens, 
+                "".join(chunks),
+                message_history
+            )
+        
+        except HTTPException as e:
+            await db.rollback()
+            record_chat_result("stream", e.status_code)
+            yield format_sse_event("error", {"detail": e.detail, "status_code": e.status_code})
+            return
+        
+        except Exception as e:
+            await db.rollback()
+            record_chat_result("stream", status.HTTP_500_INTERNAL_SERVER_ERROR, f"{stage}_error")
+            yield format_sse_event("error", {"detail": f"Erro ao processar mensagem: {str(e)}"})
+            return
+        
+        record_chat_result("stream", status.HTTP_200_OK)
+        chat_request_seconds.observe(time.perf_counter() - started_at, endpoint="stream")
+        
+        yield format_sse_event("done", {
+            "user_message": MessageResponse.model_validate(user_message).model_dump(mode="json"),
+            "assistant_message": MessageResponse.model_validate(assistant_message).model_dump(mode="json"),
+        })
+
+
+# Causa padrão de cada status HTTP nas métricas de requisições de chat
+CHAT_RESULT_CAUSES = {
+    status.HTTP_200_OK: "ok",
+    status.HTTP_404_NOT_FOUND: "conversation_not_found",
+    status.HTTP_429_TOO_MANY_REQUESTS: "token_limit",
+    status.HTTP_503_SERVICE_UNAVAILABLE: "llm_unavailable",
+    status.HTTP_504_GATEWAY_TIMEOUT: "llm_timeout",
+}
+
+
+def record_chat_result(endpoint: str, status_code: int, cause: Optional[str] = None) -> None:
+    """
+    Registra o resultado de uma requisição de chat na métrica por status e causa.
+    
+    Args:
+        endpoint: "chat" ou "stream"
+        status_code: Status HTTP do resultado
+        cause: Causa do erro (padrão: derivada do status, ver CHAT_RESULT_CAUSES)
+    """
+    chat_requests_total.inc(
+        endpoint=endpoint,
+        status=status_code,
+        cause=cause or CHAT_RESULT_CAUSES.get(status_code, "other")
+    )
+
+
+def format_sse_event(event: str, data: dict) -> str:
+    """
+    Formata um evento no padrão Server-Sent Events.
+    
+    Args:
+        event: Nome do evento
+        data: Payload serializado como JSON na linha `data`
+        
+    Returns:
+        Evento SSE pronto para ser enviado
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 # Instância única do serviço
 chat_service = ChatService()
+
+job_queue.register("conversation_title", chat_service.generate_title)
@@ -0,0 +1,258 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+import logging
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.history_cache import CachedMessage, history_cache
+from app.services.job_queue import job_queue
+from app.services.langchain_service import langchain_service
+
+logger = logging.getLogger(__name__)
+
+
+class ContextService:
+    """
+    Service para montar o contexto enviado ao modelo em cada turno.
+
+    Mantém as mensagens mais recentes literalmente e incorpora as mais antigas
+    em um resumo incremental (rolling summary) persistido em cada Conversation.
+    Assim o tamanho do prompt fica limitado, independente do tamanho da conversa.
+
+    A janela recente é limitada em turnos (CONTEXT_RECENT_TURNS) e em tokens: o
+    contexto (resumo + mensagens literais) nunca passa de QTD_TOKENS_DEFAULT menos
+    a reserva da nova mensagem e da resposta, para que o limite de tokens do turno
+    não seja atingido em conversas longas.
+
+    O resumo nunca é recalculado do zero: a cada atualização apenas o resumo
+    anterior e as mensagens que saíram da janela são enviados ao modelo.
+    """
+
+    def __init__(self):
+        """Inicializa os tamanhos da janela a partir das configurações"""
+        self.enabled = settings.context_compaction_enabled
+        # Cada turno tem duas mensagens (usuário + assistente)
+        self.recent_messages = settings.context_recent_turns * 2
+        self.summary_threshold = (settings.context_recent_turns + settings.context_summary_batch_turns) * 2
+        self.summarize_async = settings.context_summary_async
+        self.max_tokens = settings.qtd_tokens_default
+        self.reply_reserve_tokens = settings.context_reply_reserve_tokens
+        self.summary_max_tokens = settings.context_summary_max_tokens
+
+    def _context_budget(self, incoming_tokens: int = 0) -> int:
+        """
+        Tokens disponíveis para o contexto (resumo + mensagens literais).
+
+        Args:
+            incoming_tokens: Tokens da nova mensagem (a resposta é estimada do mesmo tamanho)
+
+        Returns:
+            QTD_TOKENS_DEFAULT menos a reserva da nova mensagem e da resposta
+        """
+        return self.max_tokens - max(self.reply_reserve_tokens, incoming_tokens * 2)
+
+    def _recent_window(self, messages: List[CachedMessage], budget: int) -> List[CachedMessage]:
+        """
+        Escolhe as mensagens mais recentes mantidas literalmente.
+
+        Mantém no máximo CONTEXT_RECENT_TURNS turnos, cuja soma de tokens cabe em
+        `budget`, começando sempre em uma mensagem do usuário (turno completo).
+
+        Args:
+            messages: Mensagens posteriores ao resumo, em ordem cronológica
+            budget: Tokens disponíveis para as mensagens literais
+
+        Returns:
+            Sufixo de `messages` mantido literalmente
+        """
+        start = len(messages)
+        used = 0
+        for index in range(len(messages) - 1, max(len(messages) - self.recent_messages, 0) - 1, -1):
+            used += messages[index].token_count
+            if used > budget:
+                break
+            start = index
+
+        while start < len(messages) and messages[start].role != "user":
+            start += 1
+
+        return messages[start:]
+
+    async def _get_history(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        after_id: int
+    ) -> List[CachedMessage]:
+        """
+        Busca as mensagens da conversa posteriores a `after_id`, usando o cache de histórico.
+
+        Args:
+            db: Sessão do banco de dados
+            conversation: Conversa
+            after_id: Id da última mensagem já incorporada ao resumo
+
+        Returns:
+            Mensagens posteriores ao resumo, em ordem cronológica
+        """
+        cached_messages = history_cache.get(conversation.id, after_id)
+        if cached_messages is not None:
+            return cached_messages
+
+        load_token = history_cache.load_token(conversation.id)
+        result = await db.execute(
+            select(Message)
+            .where(
+                Message.conversation_id == conversation.id,
+                Message.id > after_id
+            )
+            .order_by(Message.id.asc())
+        )
+        messages = [CachedMessage.from_message(msg) for msg in result.scalars().all()]
+
+        history_cache.set(conversation.id, after_id, messages, load_token)
+        return messages
+
+    async def build_context(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        incoming_tokens: int = 0
+    ) -> Tuple[Optional[str], List[CachedMessage]]:
+        """
+        Monta o contexto (resumo + mensagens recentes) para o próximo turno.
+
+        Quando o contexto não cabe no orçamento de tokens (QTD_TOKENS_DEFAULT menos a
+        reserva do turno), as mensagens mais antigas são incorporadas ao resumo
+        antes da chamada ao modelo. Quando cabe, mas as mensagens fora do resumo
+        ultrapassam a janela recente mais um lote (CONTEXT_SUMMARY_BATCH_TURNS), o
+        resumo também é atualizado; com CONTEXT_SUMMARY_ASYNC, essa atualização fica
+        para uma tarefa em segundo plano (`needs_summary_refresh`). Atualizar em lotes evita uma chamada
+        extra ao modelo a cada turno. Com a compactação desativada, retorna o
+        histórico completo.
+
+        Args:
+            db: Sessão do banco de dados
+            conversation: Conversa
+            incoming_tokens: Tokens da nova mensagem do usuário
+
+        Returns:
+            Tupla (resumo, mensagens_recentes)
+        """
+        if not self.enabled:
+            return None, await self._get_history(db, conversation, 0)
+
+        pending_messages = await self._get_history(db, conversation, conversation.summarized_until_id)
+
+        budget = self._context_budget(incoming_tokens)
+        pending_tokens = sum(msg.token_count for msg in pending_messages)
+        fits = (conversation.summary_token_count or 0) + pending_tokens <= budget
+
+        if fits and len(pending_messages) <= self.summary_threshold:
+            return conversation.summary, pending_messages
+
+        # Em segundo plano só enquanto o turno atual cabe no orçamento; senão resume
+        # aqui mesmo, para que o turno não seja recusado pelo limite de tokens.
+        # A tarefa é enfileirada pelo ChatService depois da resposta do modelo
+        # (veja `needs_summary_refresh`)
+        if fits and self.summarize_async:
+            return conversation.summary, pending_messages
+
+        try:
+            return await self._fold_summary(db, conversation, pending_messages, budget)
+        except Exception:
+            # Falha no resumo não deve impedir o turno: envia as mensagens pendentes literalmente
+            logger.warning(
+                "Falha ao atualizar o resumo da conversa %s", conversation.id, exc_info=True
+            )
+            return conversation.summary, pending_messages
+
+    def needs_summary_refresh(self, message_history: List[CachedMessage]) -> bool:
+        """
+        Indica se o resumo ficou para ser atualizado em segundo plano neste turno.
+
+        Chamado pelo ChatService ao salvar o turno, que enfileira a tarefa na mesma
+        transação. Enfileirar em `build_context` abriria a transação de escrita do
+        SQLite antes da chamada ao modelo, mantendo o lock durante toda a geração.
+
+        Args:
+            message_history: Mensagens retornadas por `build_context` neste turno
+
+        Returns:
+            True se as mensagens enviadas literalmente passaram da janela recente mais um lote
+        """
+        return self.enabled and self.summarize_async and len(message_history) > self.summary_threshold
+
+    async def _fold_summary(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        pending_messages: List[CachedMessage],
+        budget: int
+    ) -> Tuple[Optional[str], List[CachedMessage]]:
+        """
+        Incorpora ao resumo as mensagens pendentes fora da janela recente e salva a conversa.
+
+        Args:
+            db: Sessão do banco de dados
+            conversation: Conversa
+            pending_messages: Mensagens posteriores ao resumo atual
+            budget: Tokens disponíveis para o contexto (resumo + mensagens literais)
+
+        Returns:
+            Tupla (novo_resumo, mensagens_recentes)
+        """
+        recent_messages = self._recent_window(pending_messages, budget - self.summary_max_tokens)
+        messages_to_fold = pending_messages[:len(pending_messages) - len(recent_messages)]
+        if not messages_to_fold:
+            return conversation.summary, pending_messages
+
+        load_token = history_cache.load_token(conversation.id)
+
+        new_summary = await langchain_service.summarize_messages(
+            conversation.summary,
+            messages_to_fold,
+            conversation.user_id
+        )
+
+        conversation.summary = new_summary
+        conversation.summary_token_count = await langchain_service.count_tokens(new_summary)
+        conversation.summarized_until_id = messages_to_fold[-1].id
+        await db.commit()
+
+        history_cache.set(conversation.id, conversation.summarized_until_id, recent_messages, load_token)
+
+        return new_summary, recent_messages
+
+    async def refresh_summary(self, db: AsyncSession, payload: dict) -> None:
+        """
+        Tarefa em segundo plano (fila "conversation_summary") que atualiza o resumo de uma conversa.
+
+        Falhas são propagadas para que a fila tente novamente.
+
+        Args:
+            db: Sessão própria da tarefa
+            payload: {"conversation_id": ...}
+        """
+        conversation = await db.get(Conversation, payload["conversation_id"])
+        if conversation is None:
+            # Conversa deletada depois do enfileiramento
+            return
+
+        pending_messages = await self._get_history(db, conversation, conversation.summarized_until_id)
+        budget = self._context_budget()
+        pending_tokens = sum(msg.token_count for msg in pending_messages)
+        if (
+            len(pending_messages) <= self.summary_threshold
+            and (conversation.summary_token_count or 0) + pending_tokens <= budget
+        ):
+            return
+
+        await self._fold_summary(db, conversation, pending_messages, budget)
+
+
+# Instância única do serviço
+context_service = ContextService()
+
+job_queue.register("conversation_summary", context_service.refresh_summary)
@@ -0,0 +1,125 @@
+from datetime import datetime
+from sqlalchemy import select
+from typing import AsyncIterator, Optional
+import json
+import zlib
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Converte uma data para ISO 8601 (None se ausente)"""
+    return value.isoformat() if value is not None else None
+
+
+class ExportService:
+    """
+    Service de exportação completa das conversas de um usuário em NDJSON.
+
+    Cada linha é um objeto JSON independente:
+    - {"type": "conversation", ...}: dados da conversa, seguidos das suas mensagens
+    - {"type": "message", ...}: mensagem da conversa anterior, em ordem cronológica
+
+    A exportação é lida com um cursor no servidor (`yield_per`) e enviada em
+    blocos, sem montar a lista de conversas ou os modelos Pydantic em memória:
+    o consumo de memória é constante, independente do tamanho do histórico.
+    """
+
+    def __init__(
+        self,
+        yield_per: int = settings.export_yield_per,
+        chunk_bytes: int = settings.export_chunk_bytes
+    ):
+        """Inicializa os tamanhos de lote da leitura e dos blocos enviados"""
+        self.yield_per = yield_per
+        self.chunk_bytes = chunk_bytes
+
+    async def _iter_lines(self, user_id: int) -> AsyncIterator[str]:
+        """
+        Gera as linhas NDJSON das conversas do usuário e suas mensagens.
+
+        Usa uma sessão própria, aberta durante todo o envio da resposta. A consulta
+        seleciona apenas colunas (sem carregar entidades do ORM na sessão).
+        """
+        statement = (
+            select(
+                Conversation.id.label("conversation_id"),
+                Conversation.title,
+                Conversation.qtd_tokens,
+                Conversation.created_at.label("conversation_created_at"),
+                Message.id.label("message_id"),
+                Message.role,
+                Message.content.label("content"),
+                Message.token_count,
+                Message.created_at.label("message_created_at"),
+            )
+            .outerjoin(Message, Message.conversation_id == Conversation.id)
+            .where(Conversation.user_id == user_id)
+            .order_by(Conversation.id.asc(), Message.id.asc())
+            .execution_options(yield_per=self.yield_per)
+        )
+
+        current_conversation_id = None
+
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement)
+            async for row in result:
+                if row.conversation_id != current_conversation_id:
+                    current_conversation_id = row.conversation_id
+                    yield json.dumps({
+                        "type": "conversation",
+                        "id": row.conversation_id,
+                        "title": row.title,
+                        "qtd_tokens": row.qtd_tokens,
+                        "created_at": _isoformat(row.conversation_created_at),
+                    }, ensure_ascii=False)
+
+                # Conversa sem mensagens (outer join)
+                if row.message_id is None:
+                    continue
+
+                yield json.dumps({
+                    "type": "message",
+                    "id": row.message_id,
+                    "conversation_id": row.conversation_id,
+                    "role": row.role,
+                    "content": row.content,
+                    "token_count": row.token_count,
+                    "created_at": _isoformat(row.message_created_at),
+                }, ensure_ascii=False)
+
+    async def export_user_conversations(self, user_id: int, compress: bool = False) -> AsyncIterator[bytes]:
+        """
+        Gera a exportação NDJSON das conversas de um usuário, em blocos.
+
+        Args:
+            user_id: ID do usuário
+            compress: Se True, comprime a saída em gzip (em streaming)
+
+        Yields:
+            Blocos de bytes da exportação (com até EXPORT_CHUNK_BYTES antes da compressão)
+        """
+        # wbits=31: formato gzip (cabeçalho e checksum), compatível com gunzip
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer = bytearray()
+
+        async for line in self._iter_lines(user_id):
+            buffer += line.encode("utf-8")
+            buffer += b"\n"
+
+            if len(buffer) >= self.chunk_bytes:
+                chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+                buffer.clear()
+                if chunk:
+                    yield chunk
+
+        if compressor:
+            yield compressor.compress(bytes(buffer)) + compressor.flush()
+        elif buffer:
+            yield bytes(buffer)
+
+
+# Instância única do serviço
+export_service = ExportService()
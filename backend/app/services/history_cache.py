@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from typing import Dict, List, Optional
+import time
+from app.core.cache_invalidation import cache_invalidator
+from app.core.config import settings
+from app.models.message import Message
+
+# Custo fixo estimado (bytes) de cada mensagem em cache, além do conteúdo
+MESSAGE_OVERHEAD_BYTES = 256
+
+
+@dataclass(frozen=True)
+class CachedMessage:
+    """
+    Mensagem do histórico já convertida para o formato do LangChain.
+
+    Expõe `role`, `content` e `token_count` como o modelo Message, podendo ser
+    usada no lugar dele na montagem do contexto e no cálculo de tokens.
+    """
+    id: int
+    role: str
+    token_count: int
+    langchain_message: BaseMessage
+
+    @property
+    def content(self) -> str:
+        return self.langchain_message.content
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.content) + MESSAGE_OVERHEAD_BYTES
+
+    @classmethod
+    def from_message(cls, message: Message) -> "CachedMessage":
+        """Converte uma mensagem do banco para o formato em cache"""
+        if message.role == "user":
+            langchain_message = HumanMessage(content=message.content)
+        else:
+            langchain_message = AIMessage(content=message.content)
+
+        return cls(
+            id=message.id,
+            role=message.role,
+            token_count=message.token_count or 0,
+            langchain_message=langchain_message
+        )
+
+
+@dataclass
+class _CacheEntry:
+    """Histórico em cache de uma conversa"""
+    after_id: int  # Mensagens com id > after_id (summarized_until_id da conversa)
+    messages: List[CachedMessage]
+    expires_at: float
+    size_bytes: int = field(default=0)
+
+
+class HistoryCache:
+    """
+    Cache LRU em memória do histórico formatado de cada conversa.
+
+    Mapeia conversation_id para a lista de mensagens prontas para envio ao modelo,
+    evitando reler o histórico do banco e reconstruir as mensagens do LangChain
+    a cada turno. Limitado por quantidade de conversas, por memória total e por TTL.
+
+    É write-through: novos turnos são anexados à entrada ao serem salvos e a
+    entrada é removida quando a conversa é deletada. Com mais de um worker, as
+    escritas feitas em outro worker chegam como invalidações (cache_invalidator).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.history_cache_max_entries,
+        max_bytes: int = settings.history_cache_max_bytes,
+        ttl_seconds: float = settings.history_cache_ttl_seconds
+    ):
+        """Inicializa o cache vazio com os limites configurados"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+
+        # Versão de escrita por conversa: impede que uma leitura do banco iniciada
+        # antes de um append/evict sobrescreva o cache com dados desatualizados
+        self._write_versions: Dict[int, int] = {}
+        self._epoch = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, conversation_id: int, after_id: int) -> Optional[List[CachedMessage]]:
+        """
+        Busca o histórico em cache de uma conversa.
+
+        Args:
+            conversation_id: ID da conversa
+            after_id: Id a partir do qual o histórico é esperado (summarized_until_id)
+
+        Returns:
+            Cópia da lista de mensagens em cache, ou None se não houver entrada válida
+        """
+        entry = self._entries.get(conversation_id)
+
+        if entry is None or entry.after_id != after_id or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                self._remove(conversation_id)
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return list(entry.messages)
+
+    def load_token(self, conversation_id: int) -> tuple:
+        """
+        Retorna um marcador a ser obtido antes de ler o histórico do banco e passado
+        para `set`. Se houver escrita na conversa entre a leitura e o `set`, o
+        resultado da leitura é descartado.
+        """
+        return (self._epoch, self._write_versions.get(conversation_id, 0))
+
+    def set(
+        self,
+        conversation_id: int,
+        after_id: int,
+        messages: List[CachedMessage],
+        load_token: Optional[tuple] = None
+    ) -> None:
+        """
+        Armazena o histórico de uma conversa.
+
+        Args:
+            conversation_id: ID da conversa
+            after_id: Id a partir do qual o histórico foi lido (summarized_until_id)
+            messages: Mensagens do histórico, em ordem cronológica
+            load_token: Marcador obtido com `load_token` antes da leitura do banco
+        """
+        if load_token is not None and load_token != self.load_token(conversation_id):
+            return
+
+        self._remove(conversation_id)
+
+        entry = _CacheEntry(
+            after_id=after_id,
+            messages=list(messages),
+            expires_at=time.monotonic() + self.ttl_seconds,
+            size_bytes=sum(msg.size_bytes for msg in messages)
+        )
+
+        if entry.size_bytes > self.max_bytes:
+            return
+
+        self._entries[conversation_id] = entry
+        self._total_bytes += entry.size_bytes
+        self._enforce_limits()
+
+    def append(self, conversation_id: int, messages: List[Message]) -> None:
+        """
+        Anexa mensagens recém-salvas ao histórico em cache (write-through).
+
+        Se a conversa não estiver em cache, apenas registra a escrita.
+
+        Args:
+            conversation_id: ID da conversa
+            messages: Mensagens salvas (já com id), em ordem cronológica
+        """
+        self._bump_write_version(conversation_id)
+
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return
+
+        new_messages = [CachedMessage.from_message(msg) for msg in messages]
+        added_bytes = sum(msg.size_bytes for msg in new_messages)
+
+        entry.messages.extend(new_messages)
+        entry.size_bytes += added_bytes
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._total_bytes += added_bytes
+
+        self._entries.move_to_end(conversation_id)
+        self._enforce_limits()
+
+    def evict(self, conversation_id: int) -> None:
+        """
+        Remove o histórico de uma conversa do cache (ex: conversa deletada).
+
+        Args:
+            conversation_id: ID da conversa
+        """
+        self._bump_write_version(conversation_id)
+        self._remove(conversation_id)
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache, invalidando as leituras em andamento"""
+        self._entries.clear()
+        self._total_bytes = 0
+        self._write_versions.clear()
+        self._epoch += 1
+
+    def stats(self) -> dict:
+        """Estatísticas do cache (acertos, falhas, remoções e ocupação)"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _bump_write_version(self, conversation_id: int) -> None:
+        """Registra uma escrita na conversa, invalidando leituras em andamento"""
+        # Mantém o dicionário limitado: ao limpar, troca a época e invalida todas as leituras em andamento
+        if len(self._write_versions) >= self.max_entries * 4:
+            self._write_versions.clear()
+            self._epoch += 1
+
+        self._write_versions[conversation_id] = self._write_versions.get(conversation_id, 0) + 1
+
+    def _remove(self, conversation_id: int) -> None:
+        """Remove uma entrada, atualizando a ocupação de memória"""
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+
+    def _enforce_limits(self) -> None:
+        """Remove as entradas menos usadas até respeitar os limites de quantidade e memória"""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.size_bytes
+            self.evictions += 1
+
+
+# Instância única do cache
+history_cache = HistoryCache()
+
+# Escritas em outros workers removem a conversa do cache local
+cache_invalidator.register("conversation", history_cache.evict, history_cache.clear)
@@ -0,0 +1,347 @@
+from dataclasses import dataclass
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import random
+import time
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Função que executa uma tarefa: recebe uma sessão própria e os parâmetros da tarefa
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+# Reserva atômica da próxima tarefa: pendente e liberada, ou em execução com a
+# reserva vencida (worker que caiu ou reiniciou no meio da execução)
+_CLAIM_SQL = text(
+    """
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, locked_until = :locked_until, updated_at = :now
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE (status = 'pending' AND run_after <= :now)
+           OR (status = 'running' AND locked_until <= :now)
+        ORDER BY run_after, id
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+    """
+)
+
+# Intervalo mínimo entre duas limpezas das tarefas concluídas
+_PURGE_INTERVAL_SECONDS = 60
+
+# Tamanho máximo da mensagem de erro gravada na tarefa
+_MAX_ERROR_CHARS = 2000
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    """Tarefa reservada por um worker"""
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """
+    Fila de tarefas em segundo plano, durável no SQLite (tabela jobs).
+
+    Tarefas posteriores à resposta (título da conversa, atualização do resumo)
+    são enfileiradas na mesma transação do turno de chat e executadas por um
+    pool limitado de workers no próprio processo:
+    - A reserva de cada tarefa é um único UPDATE ... RETURNING, seguro entre
+      vários workers e processos
+    - Falhas são repetidas com backoff exponencial (com jitter) até JOB_MAX_ATTEMPTS
+    - Tarefas em execução têm uma reserva com prazo (JOB_LEASE_SECONDS): se o
+      processo cair ou reiniciar, a tarefa volta a ser executada
+    - A chave de deduplicação impede tarefas repetidas enquanto uma igual está pendente
+
+    Os handlers são registrados pelos services donos de cada tipo de tarefa.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.job_workers,
+        poll_interval: float = settings.job_poll_interval_seconds,
+        max_attempts: int = settings.job_max_attempts,
+        retry_base_delay: float = settings.job_retry_base_delay_seconds,
+        retry_max_delay: float = settings.job_retry_max_delay_seconds,
+        lease_seconds: float = settings.job_lease_seconds,
+        retention_seconds: float = settings.job_retention_seconds
+    ):
+        """Configura a fila (workers iniciados com `start`, dentro do event loop)"""
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._executing: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._last_purge = 0.0
+
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.running = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """
+        Registra o handler de um tipo de tarefa.
+
+        Args:
+            kind: Tipo da tarefa
+            handler: Função assíncrona (db, payload) que executa a tarefa
+        """
+        self._handlers[kind] = handler
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        kind: str,
+        payload: dict,
+        dedupe_key: Optional[str] = None,
+        delay_seconds: float = 0
+    ) -> bool:
+        """
+        Enfileira uma tarefa na transação da sessão (efetivada no commit de quem chamou).
+
+        Após o commit, chame `notify` para que um worker ocioso a execute imediatamente.
+
+        Args:
+            db: Sessão do banco de dados
+            kind: Tipo da tarefa
+            payload: Parâmetros da tarefa (serializáveis em JSON)
+            dedupe_key: Se informada, ignora a tarefa quando já existe outra pendente com a mesma chave
+            delay_seconds: Espera antes da primeira execução
+
+        Returns:
+            True se a tarefa foi inserida; False se foi ignorada pela deduplicação
+        """
+        now = time.time()
+        statement = insert(Job).values(
+            kind=kind,
+            payload=json.dumps(payload),
+            dedupe_key=dedupe_key,
+            status="pending",
+            attempts=0,
+            max_attempts=self.max_attempts,
+            run_after=now + delay_seconds,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_nothing(
+            # Só o conflito com o índice de deduplicação é ignorado; outras violações sobem
+            index_elements=[Job.dedupe_key],
+            index_where=Job.status.in_(["pending", "running"])
+        )
+
+        result = await db.execute(statement)
+        # rowcount 0: ignorada pelo índice de deduplicação (já existe uma igual pendente)
+        if result.rowcount:
+            self.enqueued += 1
+            return True
+
+        self.deduplicated += 1
+        return False
+
+    def notify(self) -> None:
+        """Acorda os workers ociosos (tarefas recém-commitadas)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Inicia o pool de workers (chamar dentro do event loop)"""
+        if self._tasks:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Interrompe os workers; tarefas em andamento voltam para a fila"""
+        # Só os workers executando um handler são cancelados: cancelar no meio da
+        # reserva (UPDATE ... RETURNING) deixa a conexão presa com o lock de escrita.
+        # Os demais terminam sozinhos ao ver a flag
+        self._stopping = True
+        self.notify()
+        for task in self._executing:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        """Estatísticas da fila neste processo"""
+        return {
+            "workers": len(self._tasks),
+            "running": self.running,
+            "enqueued": self.enqueued,
+            "deduplicated": self.deduplicated,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    async def _worker(self) -> None:
+        """Executa tarefas enquanto houver; quando ociosa, espera `notify` ou o próximo poll"""
+        while not self._stopping:
+            self._wakeup.clear()
+
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Falha ao consultar a fila de tarefas", exc_info=True)
+                job = None
+
+            if job is None:
+                if self._stopping:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(job)
+
+    async def _claim(self) -> Optional[ClaimedJob]:
+        """Reserva a próxima tarefa disponível (e limpa periodicamente as concluídas)"""
+        now = time.time()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                _CLAIM_SQL, {"now": now, "locked_until": now + self.lease_seconds}
+            )
+            row = result.mappings().first()
+
+            if row is None and now - self._last_purge >= _PURGE_INTERVAL_SECONDS:
+                self._last_purge = now
+                await db.execute(
+                    text("DELETE FROM jobs WHERE status = 'done' AND updated_at <= :before"),
+                    {"before": now - self.retention_seconds}
+                )
+
+            await db.commit()
+
+        if row is None:
+            return None
+
+        return ClaimedJob(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"]
+        )
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        """Executa uma tarefa reservada e registra o resultado"""
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            await self._finish(job, "failed", f"Tipo de tarefa desconhecido: {job.kind}")
+            self.failed += 1
+            return
+
+        if job.attempts > job.max_attempts:
+            # Reserva vencida na última tentativa (ex: processo reiniciado durante a execução)
+            await self._finish(job, "failed", "Tentativas esgotadas")
+            self.failed += 1
+            return
+
+        if self._stopping:
+            # Reservada durante o encerramento: devolve sem executar
+            await self._release(job)
+            return
+
+        self.running += 1
+        self._executing.add(asyncio.current_task())
+        try:
+            async with AsyncSessionLocal() as db:
+                await asyncio.wait_for(handler(db, job.payload), timeout=self.lease_seconds)
+        except asyncio.CancelledError:
+            # Encerramento do app: devolve a tarefa para a fila sem consumir a tentativa
+            await asyncio.shield(self._release(job))
+            raise
+        except Exception as e:
+            await self._handle_failure(job, e)
+        else:
+            await self._finish(job, "done")
+            self.succeeded += 1
+        finally:
+            self._executing.discard(asyncio.current_task())
+            self.running -= 1
+
+    async def _handle_failure(self, job: ClaimedJob, error: Exception) -> None:
+        """Agenda uma nova tentativa com backoff, ou marca a tarefa como falha"""
+        message = f"{type(error).__name__}: {error}"[:_MAX_ERROR_CHARS]
+
+        if job.attempts >= job.max_attempts:
+            logger.warning(
+                "Tarefa %s (%s) falhou após %s tentativas: %s", job.id, job.kind, job.attempts, message
+            )
+            await self._finish(job, "failed", message)
+            self.failed += 1
+            return
+
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (job.attempts - 1))
+        delay = random.uniform(delay / 2, delay)
+        await self._update(
+            job,
+            "UPDATE jobs SET status = 'pending', run_after = :run_after, locked_until = NULL, "
+            "last_error = :error, updated_at = :now WHERE id = :id",
+            {"run_after": time.time() + delay, "error": message}
+        )
+        self.retried += 1
+
+    async def _finish(self, job: ClaimedJob, status: str, error: Optional[str] = None) -> None:
+        """Marca a tarefa como concluída ou falha"""
+        await self._update(
+            job,
+            "UPDATE jobs SET status = :status, locked_until = NULL, last_error = :error, "
+            "updated_at = :now WHERE id = :id",
+            {"status": status, "error": error}
+        )
+
+    async def _release(self, job: ClaimedJob) -> None:
+        """Devolve uma tarefa interrompida para a fila, sem contar a tentativa"""
+        await self._update(
+            job,
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, locked_until = NULL, "
+            "updated_at = :now WHERE id = :id",
+            {}
+        )
+
+    async def _update(self, job: ClaimedJob, statement: str, params: dict) -> None:
+        """Atualiza o estado de uma tarefa em uma transação própria"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text(statement), {**params, "id": job.id, "now": time.time()})
+                await db.commit()
+        except Exception:
+            # A reserva vence e a tarefa é executada novamente
+            logger.warning("Falha ao atualizar a tarefa %s", job.id, exc_info=True)
+
+
+# Instância única da fila
+job_queue = JobQueue()
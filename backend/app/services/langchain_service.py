@@ -1,30 +1,66 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from app.core.config import settings
-from typing import List, Tuple
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+import asyncio
+import time
+from app.core.metrics import llm_request_seconds
 from app.models.message import Message
-import tiktoken
+from app.services.history_cache import CachedMessage
+from app.services.llm_call_policy import llm_call_policy
+from app.services.llm_scheduler import llm_scheduler
+from app.services.providers.base import LLMProvider
+from app.services.providers.factory import create_provider
+from app.services.response_cache import response_cache
+from app.services.tokenizer_service import tokenizer_service
+
+# Caracteres da primeira mensagem enviados ao modelo para gerar o título
+TITLE_INPUT_MAX_CHARS = 2000
+
+
+@contextmanager
+def _track_llm_call(operation: str) -> Iterator[None]:
+    """Registra a latência de uma chamada ao modelo com o resultado (ok, error, cancelled)"""
+    started_at = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        llm_request_seconds.observe(
+            time.perf_counter() - started_at, 
+            operation=operation, 
+            outcome=outcome
+        )
 
 
 class LangChainService:
     """
-    Service central para integração com Google Gemini via LangChain.
+    Service central para integração com o modelo de linguagem via LangChain.
     
     Responsável por:
-    - Configurar e gerenciar o modelo Gemini
+    - Configurar e gerenciar o provedor do modelo (Gemini ou fake, via LLM_PROVIDER)
     - Formatar histórico de mensagens
     - Enviar prompts e receber respostas
     - Calcular tokens utilizados
+    - Reaproveitar respostas de contextos idênticos (cache de respostas)
+    - Aplicar prazo, novas tentativas e hedge às chamadas (LLMCallPolicy)
     """
     
-    def __init__(self):
-        """Inicializa o modelo Gemini"""
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-lite",
-            google_api_key=settings.google_api_key,
-            temperature=0.5,
-            max_output_tokens=2048,  # Limita o tamanho da resposta (opcional)
-        )
+    def __init__(self, model: Optional[LLMProvider] = None):
+        """
+        Inicializa o provedor do modelo.
+        
+        Args:
+            model: Provedor a ser usado no lugar do configurado em LLM_PROVIDER
+                   (ex: um FakeProvider com latência controlada, para testes)
+        """
+        self.model = model or create_provider()
+        self.model_name = self.model.model_name
+        self.temperature = self.model.temperature
         self.max_tokens = settings.qtd_tokens_default
         
         # System prompt que define o comportamento do chatbot
@@ -39,21 +75,36 @@ class LangChainService:
 
             Sempre priorize a qualidade e utilidade das suas respostas."""
         
-        # Inicializa o tokenizer tiktoken
-        # Gemini usa um encoding similar ao GPT-4, usamos cl100k_base
-        try:
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        except Exception:
-            # Fallback caso não consiga carregar
-            self.tokenizer = None
+        # Mensagem do system prompt criada uma única vez e reutilizada em todos os turnos
+        self.system_message = SystemMessage(content=self.system_prompt)
+        
+        # Prompt usado para gerar o título da conversa a partir da primeira mensagem
+        self.title_prompt = """Crie um título curto para uma conversa que começa com a mensagem do usuário.
+            - Use no máximo 6 palavras, no idioma da mensagem
+            - Não use aspas, pontuação final ou emojis
+            - Responda apenas com o título"""
+        
+        # Prompt usado para atualizar o resumo incremental das mensagens antigas
+        self.summary_prompt = """Você mantém um resumo de uma conversa entre um usuário e um assistente.
+            Atualize o resumo existente incorporando as novas mensagens fornecidas.
+            - Preserve fatos, decisões, preferências do usuário e perguntas em aberto
+            - Descarte saudações e detalhes irrelevantes
+            - Escreva em texto corrido, de forma objetiva, em até 300 palavras
+            - Responda apenas com o resumo atualizado"""
     
-    def _format_message_history(self, messages: List[Message], include_system: bool = True) -> List:
+    def _format_message_history(
+        self, 
+        messages: List[Message], 
+        include_system: bool = True,
+        summary: Optional[str] = None
+    ) -> List:
         """
         Formata o histórico de mensagens do banco para o formato do LangChain.
         
         Args:
-            messages: Lista de mensagens do banco de dados
+            messages: Lista de mensagens do banco de dados (ou do cache de histórico)
             include_system: Se True, inclui o system prompt como primeira mensagem
+            summary: Resumo das mensagens antigas (enviado antes do histórico recente)
             
         Returns:
             Lista de mensagens formatadas para o LangChain (iniciando com SystemMessage)
@@ -62,11 +113,19 @@ class LangChainService:
         
         # Adiciona o system prompt como primeira mensagem (invisível para o usuário)
         if include_system:
-            formatted_messages.append(SystemMessage(content=self.system_prompt))
+            formatted_messages.append(self.system_message)
         
-        # Adiciona o histórico de mensagens
+        # Adiciona o resumo das mensagens que já saíram da janela de contexto
+        if summary:
+            formatted_messages.append(
+                SystemMessage(content=f"Resumo da conversa até aqui:\n{summary}")
+            )
+        
+        # Adiciona o histórico de mensagens (mensagens do cache já estão no formato do LangChain)
         for msg in messages:
-            if msg.role == "user":
+            if isinstance(msg, CachedMessage):
+                formatted_messages.append(msg.langchain_message)
+            elif msg.role == "user":
                 formatted_messages.append(HumanMessage(content=msg.content))
             elif msg.role == "assistant":
                 formatted_messages.append(AIMessage(content=msg.content))
@@ -80,26 +139,36 @@ class LangChainService:
         Utiliza o encoding cl100k_base (similar ao usado por GPT-4 e Gemini).
         Se tiktoken não estiver disponível, faz fallback para estimativa simples.
         
+        Versão síncrona: roda no thread atual. Em código async, use `count_tokens`.
+        
         Args:
             text: Texto para estimar tokens
             
         Returns:
             Número estimado de tokens
         """
-        if self.tokenizer:
-            try:
-                return len(self.tokenizer.encode(text))
-            except Exception:
-                # Fallback em caso de erro
-                pass
+        return tokenizer_service.count_sync(text)
+    
+    async def count_tokens(self, text: str) -> int:
+        """
+        Conta os tokens de um texto sem bloquear o event loop. Usado uma única vez,
+        ao salvar cada mensagem.
         
-        # Fallback: aproximação simples (~4 caracteres por token)
-        return len(text) // 4
+        Args:
+            text: Texto a ser contado
+            
+        Returns:
+            Número estimado de tokens
+        """
+        return await tokenizer_service.count(text)
     
     def _calculate_conversation_tokens(self, messages: List[Message]) -> int:
         """
         Calcula o total de tokens já utilizados em uma conversa.
         
+        Usa a contagem armazenada em cada mensagem (Message.token_count), sem
+        tokenizar o conteúdo novamente. Só estima mensagens sem contagem salva.
+        
         Args:
             messages: Lista de mensagens do histórico
             
@@ -108,21 +177,45 @@ class LangChainService:
         """
         total_tokens = 0
         for msg in messages:
-            total_tokens += self._estimate_tokens(msg.content)
+            if msg.token_count is not None:
+                total_tokens += msg.token_count
+            else:
+                total_tokens += self._estimate_tokens(msg.content)
         return total_tokens
     
-    def check_token_limit(self, current_tokens: int, new_message: str) -> Tuple[bool, int]:
+    def calculate_context_tokens(self, messages: List[Message], summary_tokens: int = 0) -> int:
+        """
+        Calcula os tokens do contexto enviado ao modelo (resumo + mensagens recentes).
+        
+        Args:
+            messages: Mensagens enviadas literalmente no prompt
+            summary_tokens: Tokens do resumo das mensagens antigas (já armazenados na conversa)
+            
+        Returns:
+            Total de tokens do contexto
+        """
+        return summary_tokens + self._calculate_conversation_tokens(messages)
+    
+    async def check_token_limit(
+        self, 
+        current_tokens: int, 
+        new_message: str,
+        new_message_tokens: Optional[int] = None
+    ) -> Tuple[bool, int]:
         """
         Verifica se uma nova mensagem ultrapassaria o limite de tokens.
         
         Args:
             current_tokens: Tokens já utilizados na conversa
             new_message: Nova mensagem a ser enviada
+            new_message_tokens: Tokens da nova mensagem, se já contados
             
         Returns:
             Tupla (pode_enviar: bool, tokens_estimados_nova_mensagem: int)
         """
-        estimated_new_tokens = self._estimate_tokens(new_message)
+        if new_message_tokens is None:
+            new_message_tokens = await self.count_tokens(new_message)
+        estimated_new_tokens = new_message_tokens
         
         # Estima também a resposta do modelo (aproximadamente o mesmo tamanho)
         estimated_response_tokens = estimated_new_tokens
@@ -133,56 +226,228 @@ class LangChainService:
         
         return can_send, estimated_new_tokens
     
+    def _build_prompt(
+        self, 
+        message_history: List[Message], 
+        new_message: str,
+        summary: Optional[str] = None
+    ) -> List:
+        """
+        Monta a lista de mensagens enviada ao modelo (system prompt + resumo + histórico + nova mensagem).
+        
+        Args:
+            message_history: Histórico de mensagens da conversa
+            new_message: Nova mensagem do usuário
+            summary: Resumo das mensagens antigas da conversa
+            
+        Returns:
+            Lista de mensagens formatadas para o LangChain
+        """
+        formatted_history = self._format_message_history(message_history, summary=summary)
+        formatted_history.append(HumanMessage(content=new_message))
+        return formatted_history
+    
+    def _response_cache_key(
+        self, 
+        message_history: List[Message], 
+        new_message: str,
+        summary: Optional[str] = None
+    ) -> str:
+        """
+        Calcula a chave do cache de respostas para o contexto de um turno.
+        
+        Args:
+            message_history: Histórico de mensagens da conversa
+            new_message: Nova mensagem do usuário
+            summary: Resumo das mensagens antigas da conversa
+            
+        Returns:
+            Chave do contexto no cache de respostas
+        """
+        return response_cache.build_key(
+            system_prompt=self.system_prompt,
+            model_name=self.model_name,
+            temperature=self.temperature,
+            summary=summary,
+            history=[(msg.role, msg.content) for msg in message_history],
+            new_message=new_message
+        )
+    
+    @staticmethod
+    def _extract_content(response) -> str:
+        """Extrai o texto de uma resposta (ou chunk) do modelo, que pode ser str ou list"""
+        return response.content if isinstance(response.content, str) else str(response.content)
+    
     async def generate_response(
         self, 
         message_history: List[Message], 
-        new_message: str
-    ) -> Tuple[str, int]:
+        new_message: str,
+        summary: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> str:
         """
-        Gera uma resposta do Gemini baseada no histórico e nova mensagem.
+        Gera uma resposta do modelo baseada no histórico e nova mensagem.
+        
+        A contagem de tokens não é feita aqui: cada mensagem é tokenizada uma única
+        vez, ao ser salva (ChatService._save_message).
+        
+        Com o cache de respostas ativo, um contexto idêntico a um já respondido
+        reutiliza a resposta anterior sem chamar o modelo. As chamadas ao modelo
+        passam pelo escalonador (limite de concorrência e fila por usuário).
         
         Args:
             message_history: Histórico de mensagens da conversa
             new_message: Nova mensagem do usuário
+            summary: Resumo das mensagens antigas da conversa
+            user_id: Usuário da requisição (fila do escalonador)
             
         Returns:
-            Tupla (resposta_do_modelo: str, tokens_utilizados_nesta_interacao: int)
+            Resposta do modelo
+            
+        Raises:
+            HTTPException: 503 se a fila de chamadas ao modelo estiver saturada ou o
+                           provedor seguir indisponível; 504 se o prazo se esgotar
         """
-        # Formata o histórico
-        formatted_history = self._format_message_history(message_history)
+        cache_key = None
+        if response_cache.enabled:
+            cache_key = self._response_cache_key(message_history, new_message, summary)
+            cached_response = await response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
         
-        # Adiciona a nova mensagem
-        formatted_history.append(HumanMessage(content=new_message))
+        formatted_history = self._build_prompt(message_history, new_message, summary)
         
         # Invoca o modelo (compatível com langchain-google-genai 3.0.2)
-        response = await self.model.ainvoke(formatted_history)
+        async with llm_scheduler.slot(user_id):
+            with _track_llm_call("generate"):
+                response = await llm_call_policy.run(lambda: self.model.ainvoke(formatted_history))
         
         # Extrai o conteúdo da resposta (pode ser str ou list)
-        response_content = response.content if isinstance(response.content, str) else str(response.content)
+        content = self._extract_content(response)
+        
+        if cache_key is not None:
+            await response_cache.set(cache_key, content)
+        
+        return content
+    
+    async def stream_response(
+        self, 
+        message_history: List[Message], 
+        new_message: str,
+        summary: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Gera a resposta do modelo em streaming, produzindo os trechos conforme são gerados.
+        
+        Em um acerto do cache de respostas, a resposta completa é enviada em um
+        único trecho. Só respostas transmitidas até o fim são armazenadas.
+        A vaga do escalonador fica ocupada até o fim do stream.
+        
+        Args:
+            message_history: Histórico de mensagens da conversa
+            new_message: Nova mensagem do usuário
+            summary: Resumo das mensagens antigas da conversa
+            user_id: Usuário da requisição (fila do escalonador)
+            
+        Yields:
+            Trechos (chunks) de texto da resposta do modelo
+            
+        Raises:
+            HTTPException: 503 se a fila de chamadas ao modelo estiver saturada ou o
+                           provedor seguir indisponível; 504 se o prazo se esgotar
+        """
+        cache_key = None
+        if response_cache.enabled:
+            cache_key = self._response_cache_key(message_history, new_message, summary)
+            cached_response = await response_cache.get(cache_key)
+            if cached_response is not None:
+                yield cached_response
+                return
+        
+        formatted_history = self._build_prompt(message_history, new_message, summary)
+        chunks = []
+        
+        async with llm_scheduler.slot(user_id):
+            with _track_llm_call("stream"):
+                async for chunk in llm_call_policy.stream(lambda: self.model.astream(formatted_history)):
+                    content = self._extract_content(chunk)
+                    if content:
+                        chunks.append(content)
+                        yield content
+        
+        if cache_key is not None:
+            await response_cache.set(cache_key, "".join(chunks))
+    
+    async def summarize_messages(
+        self, 
+        previous_summary: Optional[str], 
+        messages: List[Message],
+        user_id: Optional[int] = None
+    ) -> str:
+        """
+        Atualiza o resumo de uma conversa incorporando novas mensagens.
+        
+        O resumo é incremental: apenas o resumo anterior e as mensagens que saíram
+        da janela de contexto são enviados ao modelo, nunca a conversa inteira.
         
-        # Calcula tokens desta interação (mensagem do usuário + resposta)
-        tokens_used = (
-            self._estimate_tokens(new_message) + 
-            self._estimate_tokens(response_content)
+        Args:
+            previous_summary: Resumo atual da conversa (None se ainda não existir)
+            messages: Mensagens a serem incorporadas ao resumo
+            user_id: Usuário dono da conversa (fila do escalonador)
+            
+        Returns:
+            Resumo atualizado
+        """
+        role_labels = {"user": "Usuário", "assistant": "Assistente"}
+        transcript = "\n".join(
+            f"{role_labels.get(msg.role, msg.role)}: {msg.content}" for msg in messages
         )
         
-        return response_content, tokens_used
+        prompt = [
+            SystemMessage(content=self.summary_prompt),
+            HumanMessage(
+                content=f"Resumo atual:\n{previous_summary or '(vazio)'}\n\n"
+                        f"Novas mensagens:\n{transcript}"
+            ),
+        ]
+        
+        async with llm_scheduler.slot(user_id):
+            with _track_llm_call("summarize"):
+                response = await llm_call_policy.run(lambda: self.model.ainvoke(prompt))
+        return self._extract_content(response).strip()
     
-    def generate_conversation_title(self, first_message: str) -> str:
+    async def generate_conversation_title(self, first_message: str, user_id: Optional[int] = None) -> str:
         """
-        Gera um título para a conversa baseado na primeira mensagem.
+        Gera um título para a conversa com o modelo, a partir da primeira mensagem.
+        
+        Executado em segundo plano (fila de tarefas), fora do tempo da requisição.
         
         Args:
             first_message: Primeira mensagem do usuário
+            user_id: Usuário dono da conversa (fila do escalonador)
             
         Returns:
             Título gerado (limitado a 50 caracteres)
         """
-        # Usa os primeiros 50 caracteres da mensagem como título
-        # Você pode aprimorar isso usando o próprio LLM para gerar um título
-        title = first_message[:50]
-        if len(first_message) > 50:
-            title += "..."
+        prompt = [
+            SystemMessage(content=self.title_prompt),
+            HumanMessage(content=first_message[:TITLE_INPUT_MAX_CHARS]),
+        ]
+        
+        async with llm_scheduler.slot(user_id):
+            with _track_llm_call("title"):
+                response = await llm_call_policy.run(lambda: self.model.ainvoke(prompt))
+        
+        lines = self._extract_content(response).strip().splitlines()
+        title = lines[0].strip().strip('"\'*#').strip() if lines else ""
+        return self.truncate_title(title or first_message)
+    
+    @staticmethod
+    def truncate_title(title: str) -> str:
+        """Limita um título a 50 caracteres"""
+        if len(title) > 50:
+            return title[:50] + "..."
         return title
 
 
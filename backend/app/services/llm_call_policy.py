@@ -0,0 +1,300 @@
+from collections import deque
+from fastapi import HTTPException, status
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional, TypeVar
+import asyncio
+import logging
+import random
+import time
+from app.core.config import settings
+from app.services.llm_scheduler import LLMScheduler, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status HTTP (ou códigos equivalentes dos clientes do provedor) que indicam falha temporária
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Nomes das exceções transitórias dos clientes do Google (google-api-core / google-genai)
+RETRYABLE_ERROR_NAMES = {
+    "DeadlineExceeded",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServerError",
+    "ServiceUnavailable",
+    "TooManyRequests",
+}
+
+# Quantidade de latências recentes usadas no cálculo do limiar de hedge
+_LATENCY_SAMPLES = 500
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Indica se uma falha na chamada ao modelo é transitória (vale tentar novamente).
+
+    Verifica a exceção e as exceções encadeadas (o LangChain costuma embrulhar
+    os erros do cliente do provedor).
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, (asyncio.TimeoutError, ConnectionError)):
+            return True
+        if type(current).__name__ in RETRYABLE_ERROR_NAMES:
+            return True
+        for attribute in ("code", "status_code"):
+            code = getattr(current, attribute, None)
+            if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+                return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+class LLMCallPolicy:
+    """
+    Política de execução das chamadas ao modelo: prazo, novas tentativas e hedge.
+
+    - Prazo (LLM_TIMEOUT_SECONDS): cada tentativa é cancelada ao excedê-lo, liberando
+      a requisição, a sessão do banco e a vaga do escalonador
+    - Novas tentativas (LLM_MAX_RETRIES) apenas para falhas transitórias (timeout,
+      rate limit, 5xx), com backoff exponencial e jitter completo
+    - Hedge (LLM_HEDGE_ENABLED): se a tentativa passar do percentil
+      LLM_HEDGE_PERCENTILE das latências recentes, uma segunda chamada idêntica é
+      disparada e vale a que terminar primeiro (a outra é cancelada). O hedge ocupa
+      uma vaga própria do escalonador e só é disparado se houver uma livre: nunca
+      ultrapassa LLM_MAX_CONCURRENCY nem passa à frente da fila
+
+    Ao esgotar as tentativas, responde 504 (prazo excedido) ou 503 (provedor
+    indisponível). Erros não transitórios são repassados sem novas tentativas.
+    """
+
+    def __init__(
+        self,
+        timeout: float = settings.llm_timeout_seconds,
+        max_retries: int = settings.llm_max_retries,
+        retry_base_delay: float = settings.llm_retry_base_delay_seconds,
+        retry_max_delay: float = settings.llm_retry_max_delay_seconds,
+        hedge_enabled: bool = settings.llm_hedge_enabled,
+        hedge_percentile: float = settings.llm_hedge_percentile,
+        hedge_min_samples: int = settings.llm_hedge_min_samples,
+        scheduler: LLMScheduler = llm_scheduler
+    ):
+        """Inicializa a política com os limites configurados"""
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.scheduler = scheduler
+
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Executa uma chamada ao modelo aplicando prazo, novas tentativas e hedge.
+
+        Args:
+            call: Função que cria a chamada (invocada uma vez por tentativa)
+
+        Returns:
+            Resultado da chamada
+
+        Raises:
+            HTTPException: 504/503 se as tentativas se esgotarem em falhas transitórias
+        """
+        self.calls += 1
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._attempt(call)
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise self._exhausted(e)
+
+                self.retries += 1
+                logger.warning(
+                    "Falha transitória na chamada ao modelo (tentativa %s): %r", attempt + 1, e
+                )
+                await asyncio.sleep(self._backoff(attempt))
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Consome um stream do modelo aplicando prazo e novas tentativas.
+
+        Novas tentativas só acontecem antes do primeiro trecho (depois dele, o
+        cliente já recebeu parte da resposta). O prazo vale para a espera de cada
+        trecho. Streams não usam hedge.
+
+        Args:
+            open_stream: Função que abre o stream (invocada uma vez por tentativa)
+
+        Yields:
+            Trechos produzidos pelo stream
+
+        Raises:
+            HTTPException: 504/503 se as tentativas se esgotarem em falhas transitórias
+        """
+        self.calls += 1
+
+        for attempt in range(self.max_retries + 1):
+            iterator = open_stream().__aiter__()
+            started_at = time.perf_counter()
+            try:
+                first_chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout)
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                await self._close(iterator)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if not is_retryable_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise self._exhausted(e)
+
+                self.retries += 1
+                logger.warning(
+                    "Falha transitória no stream do modelo (tentativa %s): %r", attempt + 1, e
+                )
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            # Latência até o primeiro trecho
+            self._latencies.append(time.perf_counter() - started_at)
+            break
+
+        try:
+            yield first_chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError as e:
+                    self.timeouts += 1
+                    raise self._exhausted(e)
+                yield chunk
+        finally:
+            await self._close(iterator)
+
+    async def _attempt(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Executa uma tentativa dentro do prazo, com hedge se estiver ativo"""
+        started_at = time.perf_counter()
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and hedge_delay < self.timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    tasks.extend(self._start_hedge(call))
+
+            remaining = self.timeout - (time.perf_counter() - started_at)
+            result = await asyncio.wait_for(self._first_success(tasks), timeout=remaining)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        self._latencies.append(time.perf_counter() - started_at)
+        return result
+
+    def _start_hedge(self, call: Callable[[], Awaitable[T]]) -> list:
+        """Dispara o hedge em uma vaga livre do escalonador (lista vazia se não houver)"""
+        if not self.scheduler.try_acquire():
+            self.hedges_skipped += 1
+            return []
+
+        self.hedges += 1
+        hedge = asyncio.ensure_future(call())
+        # A vaga é devolvida quando o hedge termina, inclusive se for cancelado
+        hedge.add_done_callback(lambda _: self.scheduler.release())
+        return [hedge]
+
+    async def _first_success(self, tasks: list) -> T:
+        """Retorna o primeiro resultado bem-sucedido (ou a última falha, se todas falharem)"""
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        self.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+
+        raise error
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Limiar de latência para disparar o hedge (None se inativo ou sem amostras suficientes)"""
+        if not self.hedge_enabled or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))
+        return ordered[index]
+
+    def _backoff(self, attempt: int) -> float:
+        """Espera antes da próxima tentativa: backoff exponencial com jitter completo"""
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _exhausted(self, error: BaseException) -> HTTPException:
+        """Erro retornado quando as tentativas se esgotam em falhas transitórias"""
+        self.failures += 1
+        if isinstance(error, asyncio.TimeoutError):
+            return HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="O modelo demorou demais para responder. Tente novamente."
+            )
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de IA temporariamente indisponível. Tente novamente em instantes.",
+            headers={"Retry-After": str(max(1, round(self.retry_max_delay)))}
+        )
+
+    @staticmethod
+    async def _close(iterator) -> None:
+        """Fecha um stream abandonado (libera a conexão com o provedor)"""
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        """Estatísticas de chamadas, novas tentativas, timeouts e hedges"""
+        hedge_delay = self._hedge_delay()
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_seconds": round(hedge_delay, 4) if hedge_delay is not None else None,
+            "timeout_seconds": self.timeout,
+        }
+
+
+# Instância única da política
+llm_call_policy = LLMCallPolicy()
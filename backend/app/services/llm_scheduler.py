@@ -0,0 +1,213 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, status
+from typing import AsyncIterator, Deque, Hashable, Optional
+import asyncio
+import math
+import time
+from app.core.config import settings
+from app.core.metrics import llm_queue_wait_seconds
+
+# Quantidade de esperas recentes usadas no cálculo dos percentis
+_WAIT_SAMPLES = 1000
+
+
+class LLMScheduler:
+    """
+    Escalonador das chamadas ao modelo, com limite global de concorrência.
+
+    Sem ele, um pico de requisições dispara chamadas simultâneas ao provedor,
+    que responde com erros de rate limit para todos os usuários ao mesmo tempo.
+    Aqui:
+    - No máximo LLM_MAX_CONCURRENCY chamadas rodam simultaneamente
+    - As demais aguardam em filas por usuário, atendidas em round-robin: um
+      usuário com muitas requisições não impede o atendimento dos demais
+    - A fila é limitada (LLM_MAX_QUEUE) e a espera também
+      (LLM_QUEUE_TIMEOUT_SECONDS); ao exceder, responde 503 com Retry-After
+      estimado a partir da fila e da duração média das chamadas
+    - Expõe profundidade da fila, chamadas em andamento e tempos de espera
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.llm_max_concurrency,
+        max_queue: int = settings.llm_max_queue,
+        queue_timeout: float = settings.llm_queue_timeout_seconds
+    ):
+        """Inicializa o escalonador sem chamadas em andamento"""
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        # Filas de espera por usuário, na ordem do round-robin
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self._waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_call_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[int] = None) -> AsyncIterator[None]:
+        """
+        Reserva uma vaga para uma chamada ao modelo durante o bloco `async with`.
+
+        Args:
+            user_id: Usuário da requisição (define a fila usada no round-robin)
+
+        Raises:
+            HTTPException: 503 se a fila estiver cheia ou a espera exceder o limite
+        """
+        await self._acquire(user_id)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self.total_call_seconds += time.perf_counter() - started_at
+            self.release()
+
+    async def _acquire(self, user_id: Optional[int]) -> None:
+        """Aguarda a vez do usuário na fila e ocupa uma vaga"""
+        if self.in_flight < self.max_concurrency and not self._waiting:
+            self.in_flight += 1
+            self._record_wait(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            raise self._reject()
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(future)
+        self.queue_depth += 1
+        started_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # A vaga pode ter sido concedida junto com o timeout: nesse caso, usa
+            if not self._granted(future):
+                self._discard(user_id, future)
+                raise self._reject()
+        except asyncio.CancelledError:
+            # Requisição cancelada (ex: cliente desconectou) enquanto aguardava
+            if self._granted(future):
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        self._record_wait(time.perf_counter() - started_at)
+
+    def try_acquire(self) -> bool:
+        """
+        Ocupa uma vaga apenas se houver uma livre agora, sem entrar na fila.
+
+        Usado pelas chamadas opcionais (hedge), que não devem disputar vagas
+        com as requisições aguardando.
+
+        Returns:
+            True se a vaga foi ocupada (devolvê-la com `release`)
+        """
+        if self.in_flight < self.max_concurrency and not self._waiting:
+            self.in_flight += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        """Libera uma vaga e a entrega ao próximo usuário da fila"""
+        self.in_flight -= 1
+        self._grant_next()
+
+    def _grant_next(self) -> None:
+        """Concede as vagas livres em round-robin entre os usuários aguardando"""
+        while self.in_flight < self.max_concurrency and self._waiting:
+            user_id, queue = next(iter(self._waiting.items()))
+            future = queue.popleft()
+
+            # Usuário volta para o fim da fila se ainda tiver requisições aguardando
+            if queue:
+                self._waiting.move_to_end(user_id)
+            else:
+                del self._waiting[user_id]
+
+            if future.done():
+                continue
+
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _discard(self, user_id: Optional[int], future: asyncio.Future) -> None:
+        """Remove da fila uma requisição que desistiu de aguardar"""
+        queue = self._waiting.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiting[user_id]
+
+    @staticmethod
+    def _granted(future: asyncio.Future) -> bool:
+        """Indica se a vaga foi concedida à requisição"""
+        return future.done() and not future.cancelled()
+
+    def _record_wait(self, wait_seconds: float) -> None:
+        """Registra o tempo de espera de uma requisição admitida"""
+        self._waits.append(wait_seconds)
+        llm_queue_wait_seconds.observe(wait_seconds)
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def _retry_after(self) -> int:
+        """Estima em quantos segundos a fila atual deve ser atendida"""
+        avg_call_seconds = self.total_call_seconds / self.completed if self.completed else 1.0
+        estimate = (self.queue_depth + 1) / self.max_concurrency * avg_call_seconds
+        return max(1, math.ceil(estimate))
+
+    def _reject(self) -> HTTPException:
+        """Erro retornado quando a fila de chamadas ao modelo está saturada"""
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de IA sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": str(self._retry_after())}
+        )
+
+    def _wait_percentile(self, percentile: float) -> float:
+        """Percentil do tempo de espera entre as requisições recentes"""
+        if not self._waits:
+            return 0.0
+        ordered = sorted(self._waits)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile))
+        return ordered[index]
+
+    def stats(self) -> dict:
+        """Estatísticas de fila, rejeições e tempos de espera"""
+        admitted = self.completed + self.in_flight
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "waiting_users": len(self._waiting),
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_wait_seconds": round(self.total_wait_seconds / admitted, 4) if admitted else 0.0,
+            "p50_wait_seconds": round(self._wait_percentile(0.50), 4),
+            "p95_wait_seconds": round(self._wait_percentile(0.95), 4),
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "avg_call_seconds": round(self.total_call_seconds / self.completed, 4) if self.completed else 0.0,
+        }
+
+
+# Instância única do escalonador
+llm_scheduler = LLMScheduler()
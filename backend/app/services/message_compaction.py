@@ -0,0 +1,147 @@
+from sqlalchemy import text
+from typing import Optional
+import asyncio
+import logging
+from app.core.compression import compress_text
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Mensagens ainda em TEXT a partir do tamanho mínimo, em ordem de id (keyset)
+_SELECT_BATCH_SQL = text(
+    """
+    SELECT id, content FROM messages
+    WHERE id > :after_id
+      AND typeof(content) = 'text'
+      AND length(CAST(content AS BLOB)) >= :min_bytes
+    ORDER BY id
+    LIMIT :limit
+    """
+)
+
+# Só substitui se a mensagem continuar em TEXT (outro worker pode ter comprimido antes)
+_UPDATE_SQL = text(
+    "UPDATE messages SET content = :content WHERE id = :id AND typeof(content) = 'text'"
+)
+
+
+class MessageCompactionService:
+    """
+    Migração em segundo plano que comprime as mensagens gravadas sem compressão.
+
+    Mensagens novas já são comprimidas pelo modelo Message. Esta tarefa percorre
+    as antigas em lotes (keyset por id), cada lote em uma transação curta
+    executada em uma thread, com uma pausa entre lotes para não disputar o lock
+    de escrita do SQLite com as requisições. É idempotente: pode rodar em vários
+    workers ou ser interrompida e retomada em um reinício.
+
+    O arquivo do banco só diminui após um VACUUM; até lá, as páginas liberadas
+    são reaproveitadas pelas novas escritas.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.message_compaction_batch_size,
+        pause_seconds: float = settings.message_compaction_pause_ms / 1000,
+        min_bytes: int = settings.message_compression_min_bytes
+    ):
+        """Configura os lotes da migração (iniciada com `start`, dentro do event loop)"""
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.min_bytes = min_bytes
+
+        self._task: Optional[asyncio.Task] = None
+
+        self.scanned = 0
+        self.compressed = 0
+        self.bytes_saved = 0
+        self.finished = False
+
+    def start(self) -> None:
+        """Inicia a migração em segundo plano (chamar dentro do event loop)"""
+        if self._task is not None and not self._task.done():
+            return
+
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a migração (retomada no próximo início)"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        """Progresso da migração"""
+        return {
+            "finished": self.finished,
+            "scanned": self.scanned,
+            "compressed": self.compressed,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    async def _run(self) -> None:
+        """Processa os lotes até não restarem mensagens sem compressão"""
+        after_id = 0
+        try:
+            while True:
+                last_id = await asyncio.to_thread(self._compact_batch, after_id)
+                if last_id is None:
+                    break
+                after_id = last_id
+                await asyncio.sleep(self.pause_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Falha na compressão das mensagens antigas", exc_info=True)
+            return
+
+        self.finished = True
+        if self.compressed:
+            logger.info(
+                "Compressão das mensagens antigas concluída: %s mensagens, %s bytes a menos",
+                self.compressed, self.bytes_saved
+            )
+
+    def _compact_batch(self, after_id: int) -> Optional[int]:
+        """
+        Comprime um lote de mensagens (executado em uma thread, com a engine síncrona).
+
+        Args:
+            after_id: Id da última mensagem do lote anterior
+
+        Returns:
+            Id da última mensagem do lote, ou None se não houver mais mensagens
+        """
+        with engine.begin() as conn:
+            rows = conn.execute(
+                _SELECT_BATCH_SQL,
+                {"after_id": after_id, "min_bytes": self.min_bytes, "limit": self.batch_size}
+            ).fetchall()
+
+            if not rows:
+                return None
+
+            updates = []
+            for row in rows:
+                stored = compress_text(row.content, self.min_bytes)
+                if isinstance(stored, bytes):
+                    updates.append({"id": row.id, "content": stored})
+                    self.bytes_saved += len(row.content.encode("utf-8")) - len(stored)
+
+            if updates:
+                conn.execute(_UPDATE_SQL, updates)
+
+        self.scanned += len(rows)
+        self.compressed += len(updates)
+        return rows[-1].id
+
+
+# Instância única do serviço
+message_compaction = MessageCompactionService()
@@ -0,0 +1 @@
+# Providers package - Provedores de modelo de linguagem (Gemini e fake local)
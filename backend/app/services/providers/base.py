@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+
+class LLMProvider(ABC):
+    """
+    Interface dos provedores de modelo de linguagem usados pelo LangChainService.
+
+    Segue os métodos dos modelos de chat do LangChain (`ainvoke` e `astream`),
+    recebendo a lista de mensagens já formatada. Cada provedor informa o nome do
+    modelo e a temperatura, que fazem parte da chave do cache de respostas.
+
+    Os métodos são abstratos: um provedor incompleto falha ao ser instanciado,
+    na inicialização do app, e não no meio de uma requisição.
+    """
+
+    name: str = "base"
+
+    def __init__(self, model_name: str, temperature: float):
+        """
+        Args:
+            model_name: Nome do modelo
+            temperature: Temperatura de amostragem
+        """
+        self.model_name = model_name
+        self.temperature = temperature
+
+    @abstractmethod
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """
+        Gera a resposta completa para as mensagens.
+
+        Args:
+            messages: Mensagens do prompt (system, histórico e nova mensagem)
+
+        Returns:
+            Resposta do modelo
+        """
+
+    @abstractmethod
+    def astream(self, messages: List[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        """
+        Gera a resposta em streaming, trecho a trecho.
+
+        Args:
+            messages: Mensagens do prompt (system, histórico e nova mensagem)
+
+        Returns:
+            Iterador assíncrono dos trechos da resposta
+        """
+
+
+class ProviderError(Exception):
+    """Falha retornada por um provedor, com o status HTTP equivalente (usado na política de novas tentativas)"""
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
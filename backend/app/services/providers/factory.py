@@ -0,0 +1,45 @@
+from app.core.config import settings
+from app.services.providers.base import LLMProvider
+
+
+def create_provider() -> LLMProvider:
+    """
+    Cria o provedor de modelo configurado em LLM_PROVIDER.
+
+    Returns:
+        Provedor "gemini" (padrão) ou "fake" (local, para testes de carga)
+
+    Raises:
+        ValueError: Se o provedor for desconhecido ou faltar a GOOGLE_API_KEY
+    """
+    provider = settings.llm_provider.lower()
+
+    if provider == "gemini":
+        if not settings.google_api_key:
+            raise ValueError("GOOGLE_API_KEY é obrigatória com LLM_PROVIDER=gemini")
+
+        # Import tardio: o provedor fake não depende do cliente do Google
+        from app.services.providers.gemini import GeminiProvider
+        return GeminiProvider(
+            api_key=settings.google_api_key,
+            model_name=settings.llm_model,
+            temperature=settings.llm_temperature,
+            max_output_tokens=settings.llm_max_output_tokens
+        )
+
+    if provider == "fake":
+        from app.services.providers.fake import FakeProvider
+        return FakeProvider(
+            temperature=settings.llm_temperature,
+            latency_distribution=settings.fake_llm_latency_distribution,
+            latency_mean_ms=settings.fake_llm_latency_mean_ms,
+            latency_stddev_ms=settings.fake_llm_latency_stddev_ms,
+            response_tokens=settings.fake_llm_response_tokens,
+            stream_tokens_per_second=settings.fake_llm_stream_tokens_per_second,
+            stream_chunk_tokens=settings.fake_llm_stream_chunk_tokens,
+            error_rate=settings.fake_llm_error_rate,
+            hang_rate=settings.fake_llm_hang_rate,
+            seed=settings.fake_llm_seed
+        )
+
+    raise ValueError(f"LLM_PROVIDER desconhecido: {settings.llm_provider}. Use 'gemini' ou 'fake'")
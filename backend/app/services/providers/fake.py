@@ -0,0 +1,158 @@
+from typing import AsyncIterator, List, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+import asyncio
+import hashlib
+import math
+import random
+from app.services.providers.base import LLMProvider, ProviderError
+
+# Vocabulário das respostas geradas (cada palavra conta como um token)
+_VOCABULARY = (
+    "o", "modelo", "responde", "de", "forma", "clara", "e", "objetiva", "sobre",
+    "a", "pergunta", "com", "exemplos", "dados", "contexto", "resposta", "para",
+    "usuário", "sistema", "teste", "carga", "latência", "servidor", "mensagem",
+)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+class FakeProvider(LLMProvider):
+    """
+    Provedor local e determinístico, para testes de carga e benchmarks sem a API real.
+
+    A resposta é derivada do hash do prompt: o mesmo prompt gera sempre o mesmo
+    texto. Simula:
+    - Latência até o primeiro token em uma distribuição configurável
+      (fixed, uniform, normal ou lognormal, com média e desvio padrão em ms)
+    - Taxa de geração no streaming (tokens por segundo, em trechos de N tokens)
+    - Tamanho da resposta (em tokens)
+    - Falhas transitórias (ProviderError com código 503) com probabilidade configurável
+    - Travamentos (chamada que nunca responde) com probabilidade configurável
+
+    Com `seed` definido, a sequência de latências e falhas também é reprodutível.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        temperature: float = 0.5,
+        latency_distribution: str = "lognormal",
+        latency_mean_ms: float = 800,
+        latency_stddev_ms: float = 200,
+        response_tokens: int = 150,
+        stream_tokens_per_second: float = 200,
+        stream_chunk_tokens: int = 5,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            model_name: Nome do modelo (parte da chave do cache de respostas)
+            temperature: Temperatura (apenas informativa)
+            latency_distribution: Distribuição da latência até o primeiro token
+            latency_mean_ms: Latência média (ms)
+            latency_stddev_ms: Desvio padrão da latência (ms)
+            response_tokens: Tokens de cada resposta
+            stream_tokens_per_second: Velocidade de geração no streaming (0 = sem espera)
+            stream_chunk_tokens: Tokens por trecho no streaming
+            error_rate: Probabilidade (0 a 1) de uma chamada falhar com erro transitório
+            hang_rate: Probabilidade (0 a 1) de uma chamada nunca responder
+            seed: Semente do gerador aleatório (None = não reprodutível)
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Distribuição de latência inválida: {latency_distribution}. "
+                f"Use uma de: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+
+        super().__init__(model_name, temperature)
+        self.latency_distribution = latency_distribution
+        self.latency_mean = latency_mean_ms / 1000
+        self.latency_stddev = latency_stddev_ms / 1000
+        self.response_tokens = response_tokens
+        self.stream_tokens_per_second = stream_tokens_per_second
+        self.stream_chunk_tokens = max(1, stream_chunk_tokens)
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self._random = random.Random(seed)
+
+    def _sample_latency(self) -> float:
+        """Sorteia a latência até o primeiro token (segundos)"""
+        mean, stddev = self.latency_mean, self.latency_stddev
+
+        if self.latency_distribution == "fixed" or mean <= 0:
+            return max(0.0, mean)
+        if self.latency_distribution == "uniform":
+            return self._random.uniform(max(0.0, mean - stddev), mean + stddev)
+        if self.latency_distribution == "normal":
+            return max(0.0, self._random.gauss(mean, stddev))
+
+        # lognormal: parâmetros calculados para preservar a média e o desvio informados
+        sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+        mu = math.log(mean) - sigma ** 2 / 2
+        return self._random.lognormvariate(mu, sigma)
+
+    async def _wait_first_token(self) -> None:
+        """Simula a latência do provedor e as falhas injetadas"""
+        roll = self._random.random()
+        if roll < self.hang_rate:
+            # Simula uma chamada travada (só termina se for cancelada pelo prazo)
+            await asyncio.Event().wait()
+        if roll < self.hang_rate + self.error_rate:
+            await asyncio.sleep(self._sample_latency() / 2)
+            raise ProviderError("Falha simulada do provedor fake", code=503)
+
+        await asyncio.sleep(self._sample_latency())
+
+    def _generate_tokens(self, messages: List[BaseMessage]) -> List[str]:
+        """Gera os tokens da resposta a partir do hash do prompt (determinístico)"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return [
+            _VOCABULARY[(digest[index % len(digest)] + index) % len(_VOCABULARY)]
+            for index in range(self.response_tokens)
+        ]
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], output_tokens: int) -> dict:
+        """Uso de tokens no formato do LangChain (entrada estimada por palavras)"""
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Gera a resposta completa após a latência simulada e o tempo de geração"""
+        await self._wait_first_token()
+
+        tokens = self._generate_tokens(messages)
+        if self.stream_tokens_per_second > 0:
+            await asyncio.sleep(len(tokens) / self.stream_tokens_per_second)
+
+        return AIMessage(
+            content=" ".join(tokens),
+            usage_metadata=self._usage(messages, len(tokens))
+        )
+
+    async def astream(self, messages: List[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        """Gera a resposta em trechos, no ritmo configurado"""
+        await self._wait_first_token()
+
+        tokens = self._generate_tokens(messages)
+        chunk_delay = (
+            self.stream_chunk_tokens / self.stream_tokens_per_second
+            if self.stream_tokens_per_second > 0 else 0.0
+        )
+
+        for start in range(0, len(tokens), self.stream_chunk_tokens):
+            if start:
+                await asyncio.sleep(chunk_delay)
+            chunk_tokens = tokens[start:start + self.stream_chunk_tokens]
+            # Mantém o espaço entre trechos para que a concatenação seja igual ao ainvoke
+            separator = " " if start else ""
+            yield AIMessageChunk(content=separator + " ".join(chunk_tokens))
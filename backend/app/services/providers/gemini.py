@@ -0,0 +1,40 @@
+from typing import AsyncIterator, List
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_google_genai import ChatGoogleGenerativeAI
+from app.services.providers.base import LLMProvider
+
+
+class GeminiProvider(LLMProvider):
+    """Provedor Google Gemini via LangChain (ChatGoogleGenerativeAI)"""
+
+    name = "gemini"
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.5-flash-lite",
+        temperature: float = 0.5,
+        max_output_tokens: int = 2048
+    ):
+        """
+        Args:
+            api_key: Chave da API do Google
+            model_name: Nome do modelo Gemini
+            temperature: Temperatura de amostragem
+            max_output_tokens: Limite do tamanho da resposta
+        """
+        super().__init__(model_name, temperature)
+        self.model = ChatGoogleGenerativeAI(
+            model=model_name,
+            google_api_key=api_key,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Gera a resposta completa (compatível com langchain-google-genai 3.0.2)"""
+        return await self.model.ainvoke(messages)
+
+    def astream(self, messages: List[BaseMessage]) -> AsyncIterator[AIMessageChunk]:
+        """Gera a resposta em streaming"""
+        return self.model.astream(messages)
@@ -0,0 +1,270 @@
+from collections import OrderedDict
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import time
+from app.core.cache_backend import CacheBackend, cache_backend
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import llm_response_cache_lookups_total
+from app.models.response_cache import ResponseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Espaços em branco consecutivos (inclusive quebras de linha) viram um único espaço
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Quantidade de escritas no SQLite entre duas limpezas de entradas expiradas
+_PURGE_EVERY_WRITES = 100
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza um texto para a chave do cache (espaços colapsados e sem bordas)"""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Cache exact-match das respostas do modelo.
+
+    A chave é o hash do contexto completo enviado ao modelo: system prompt,
+    parâmetros do modelo (nome e temperatura), resumo, histórico normalizado e
+    nova mensagem. Só há acerto quando todo o contexto é igual, como nas
+    perguntas de abertura mais comuns (saudações, "o que você sabe fazer?").
+
+    Possui até três níveis, consultados em ordem:
+    - Memória: LRU limitado por quantidade de entradas e por TTL
+    - Backend compartilhado (com CACHE_BACKEND=redis): visível a todos os
+      workers, com o mesmo TTL
+    - SQLite (opcional): tabela llm_response_cache, compartilhada entre workers
+      e preservada entre reinícios, também com TTL
+
+    Desativado por padrão (RESPONSE_CACHE_ENABLED). Falhas nos níveis externos
+    nunca impedem a resposta: são registradas e tratadas como falha de cache.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.response_cache_enabled,
+        max_entries: int = settings.response_cache_max_entries,
+        ttl_seconds: float = settings.response_cache_ttl_seconds,
+        persistent: bool = settings.response_cache_persistent,
+        backend: CacheBackend = cache_backend
+    ):
+        """Inicializa o cache vazio com os limites configurados"""
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        # O backend só é usado como nível extra quando é compartilhado entre workers
+        self.backend = backend if backend.shared else None
+
+        # key -> (resposta, expira_em monotônico)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._writes_since_purge = 0
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    @staticmethod
+    def build_key(
+        system_prompt: str,
+        model_name: str,
+        temperature: float,
+        summary: Optional[str],
+        history: Iterable[Tuple[str, str]],
+        new_message: str
+    ) -> str:
+        """
+        Calcula a chave do cache para um contexto.
+
+        Args:
+            system_prompt: System prompt do modelo
+            model_name: Nome do modelo
+            temperature: Temperatura do modelo
+            summary: Resumo das mensagens antigas da conversa
+            history: Pares (role, conteúdo) do histórico, em ordem cronológica
+            new_message: Nova mensagem do usuário
+
+        Returns:
+            Hash SHA-256 (hex) do contexto normalizado
+        """
+        payload = {
+            "system": normalize_text(system_prompt),
+            "model": model_name,
+            "temperature": temperature,
+            "summary": normalize_text(summary) if summary else None,
+            "history": [[role, normalize_text(content)] for role, content in history],
+            "message": normalize_text(new_message),
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Busca uma resposta em cache (memória, backend compartilhado e SQLite).
+
+        Args:
+            key: Chave calculada com `build_key`
+
+        Returns:
+            Resposta em cache, ou None se não houver entrada válida
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                llm_response_cache_lookups_total.inc(result="memory")
+                return response
+            del self._entries[key]
+
+        if self.backend is not None:
+            response = await self._get_shared(key)
+            if response is not None:
+                self._set_memory(key, response)
+                self.hits += 1
+                self.shared_hits += 1
+                llm_response_cache_lookups_total.inc(result="shared")
+                return response
+
+        if self.persistent:
+            response = await self._get_persistent(key)
+            if response is not None:
+                self._set_memory(key, response)
+                if self.backend is not None:
+                    await self._set_shared(key, response)
+                self.hits += 1
+                self.persistent_hits += 1
+                llm_response_cache_lookups_total.inc(result="sqlite")
+                return response
+
+        self.misses += 1
+        llm_response_cache_lookups_total.inc(result="miss")
+        return None
+
+    async def set(self, key: str, response: str) -> None:
+        """
+        Armazena uma resposta do modelo.
+
+        Args:
+            key: Chave calculada com `build_key`
+            response: Resposta completa do modelo
+        """
+        if not response:
+            return
+
+        self._set_memory(key, response)
+        self.stores += 1
+
+        if self.backend is not None:
+            await self._set_shared(key, response)
+
+        if self.persistent:
+            await self._set_persistent(key, response)
+
+    def stats(self) -> dict:
+        """Estatísticas do cache (acertos, falhas e ocupação)"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "shared": self.backend is not None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "errors": self.errors,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def _set_memory(self, key: str, response: str) -> None:
+        """Armazena no nível em memória, removendo as entradas menos usadas"""
+        self._entries[key] = (response, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(self, key: str) -> Optional[str]:
+        """Busca uma resposta no backend de cache compartilhado"""
+        try:
+            return await self.backend.get(f"response:{key}")
+        except Exception:
+            self.errors += 1
+            logger.warning("Falha ao ler o cache compartilhado de respostas", exc_info=True)
+            return None
+
+    async def _set_shared(self, key: str, response: str) -> None:
+        """Grava uma resposta no backend de cache compartilhado, com o TTL do cache"""
+        try:
+            await self.backend.set(f"response:{key}", response, self.ttl_seconds)
+        except Exception:
+            self.errors += 1
+            logger.warning("Falha ao gravar no cache compartilhado de respostas", exc_info=True)
+
+    async def _get_persistent(self, key: str) -> Optional[str]:
+        """Busca uma resposta válida na tabela llm_response_cache"""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(ResponseCacheEntry.response).where(
+                        ResponseCacheEntry.key == key,
+                        ResponseCacheEntry.expires_at > time.time()
+                    )
+                )
+                return result.scalar_one_or_none()
+        except Exception:
+            self.errors += 1
+            logger.warning("Falha ao ler o cache persistente de respostas", exc_info=True)
+            return None
+
+    async def _set_persistent(self, key: str, response: str) -> None:
+        """Grava (ou substitui) uma resposta na tabela llm_response_cache"""
+        now = time.time()
+        statement = insert(ResponseCacheEntry).values(
+            key=key,
+            response=response,
+            created_at=now,
+            expires_at=now + self.ttl_seconds
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ResponseCacheEntry.key],
+            set_={
+                "response": statement.excluded.response,
+                "created_at": statement.excluded.created_at,
+                "expires_at": statement.excluded.expires_at,
+            }
+        )
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(statement)
+
+                # Remove periodicamente as entradas expiradas
+                self._writes_since_purge += 1
+                if self._writes_since_purge >= _PURGE_EVERY_WRITES:
+                    self._writes_since_purge = 0
+                    await db.execute(
+                        delete(ResponseCacheEntry).where(ResponseCacheEntry.expires_at <= now)
+                    )
+
+                await db.commit()
+        except Exception:
+            self.errors += 1
+            logger.warning("Falha ao gravar no cache persistente de respostas", exc_info=True)
+
+
+# Instância única do cache
+response_cache = ResponseCache()
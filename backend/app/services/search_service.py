@@ -0,0 +1,179 @@
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+import html
+import re
+from app.models.message import Message
+from app.schemas.search import SearchResult
+
+# Marcadores do snippet gerado pelo SQLite (caracteres de uso privado, nunca
+# presentes no texto). São trocados por <mark> depois de escapar o HTML.
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+# Termos da busca: sequências de letras/dígitos (o restante é ignorado)
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Quantidade máxima de termos considerados em uma busca
+_MAX_TERMS = 16
+
+# Tokens de contexto exibidos no snippet
+_SNIPPET_TOKENS = 16
+
+_SEARCH_SQL = text(
+    f"""
+    SELECT
+        m.id AS message_id,
+        m.conversation_id AS conversation_id,
+        c.title AS conversation_title,
+        m.role AS role,
+        m.created_at AS created_at,
+        snippet(messages_fts, 0, '{_MARK_START}', '{_MARK_END}', '…', {_SNIPPET_TOKENS}) AS snippet
+    FROM messages_fts
+    JOIN messages m ON m.id = messages_fts.rowid
+    JOIN conversations c ON c.id = m.conversation_id
+    WHERE messages_fts MATCH :query AND c.user_id = :user_id
+    ORDER BY messages_fts.rank, m.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+# Remoção de uma mensagem do índice (informa o texto original indexado)
+_DELETE_SQL = text(
+    "INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', :id, :content)"
+)
+
+
+class SearchService:
+    """
+    Service de busca textual no histórico de conversas (SQLite FTS5).
+
+    Responsável por:
+    - Indexar o conteúdo de cada mensagem salva (tabela virtual messages_fts)
+    - Buscar nas mensagens de um usuário, ordenando por relevância (bm25)
+    - Gerar trechos (snippets) com os termos encontrados destacados
+
+    O índice guarda apenas os termos (FTS5 com conteúdo externo): o texto dos
+    snippets é lido das próprias mensagens, descomprimido pela função SQL
+    message_text() (app.core.database). Como não há triggers, mensagens gravadas
+    ou removidas fora do ChatService precisam atualizar o índice (ou recriá-lo
+    com o comando 'rebuild').
+    """
+
+    @staticmethod
+    def build_match_query(query: str) -> Optional[str]:
+        """
+        Converte o texto digitado pelo usuário em uma consulta FTS5 segura.
+
+        Cada termo vira uma frase entre aspas (operadores e sintaxe do FTS5 não
+        são interpretados) e todos os termos precisam aparecer na mensagem. O
+        último termo busca por prefixo, para resultados enquanto o usuário digita.
+
+        Args:
+            query: Texto da busca
+
+        Returns:
+            Consulta para o MATCH, ou None se não houver termos
+        """
+        terms = _TERM_RE.findall(query)[:_MAX_TERMS]
+        if not terms:
+            return None
+
+        phrases = [f'"{term}"' for term in terms]
+        phrases[-1] += "*"
+        return " ".join(phrases)
+
+    @staticmethod
+    def _highlight(snippet: str) -> str:
+        """Escapa o HTML do snippet e troca os marcadores por <mark>"""
+        return (
+            html.escape(snippet)
+            .replace(_MARK_START, "<mark>")
+            .replace(_MARK_END, "</mark>")
+        )
+
+    async def index_message(self, db: AsyncSession, message: Message) -> None:
+        """
+        Indexa o texto original de uma mensagem (na mesma transação em que é salva).
+
+        Args:
+            db: Sessão do banco de dados
+            message: Mensagem já com id (após o flush)
+        """
+        await db.execute(
+            text("INSERT INTO messages_fts (rowid, content) VALUES (:id, :content)"),
+            {"id": message.id, "content": message.content}
+        )
+
+    async def remove_conversation(self, db: AsyncSession, conversation_id: int) -> None:
+        """
+        Remove do índice as mensagens de uma conversa (na transação que a deleta).
+
+        O comando 'delete' do FTS5 com conteúdo externo precisa do texto indexado,
+        então as mensagens são lidas antes de serem removidas.
+
+        Args:
+            db: Sessão do banco de dados
+            conversation_id: ID da conversa
+        """
+        result = await db.execute(
+            select(Message.id, Message.content).where(Message.conversation_id == conversation_id)
+        )
+        rows = [{"id": row.id, "content": row.content} for row in result]
+        if rows:
+            await db.execute(_DELETE_SQL, rows)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        query: str,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[SearchResult], Optional[int]]:
+        """
+        Busca nas mensagens das conversas de um usuário.
+
+        Args:
+            db: Sessão do banco de dados
+            user_id: ID do usuário
+            query: Texto da busca
+            limit: Limite de resultados
+            offset: Resultados já retornados nas páginas anteriores
+
+        Returns:
+            Tupla (resultados por relevância, offset da próxima página ou None)
+        """
+        match_query = self.build_match_query(query)
+        if match_query is None:
+            return [], None
+
+        # Busca um resultado a mais para saber se existe próxima página
+        result = await db.execute(
+            _SEARCH_SQL,
+            {"query": match_query, "user_id": user_id, "limit": limit + 1, "offset": offset}
+        )
+        rows = result.mappings().all()
+
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+
+        results = [
+            SearchResult(
+                message_id=row["message_id"],
+                conversation_id=row["conversation_id"],
+                conversation_title=row["conversation_title"],
+                role=row["role"],
+                snippet=self._highlight(row["snippet"]),
+                created_at=row["created_at"]
+            )
+            for row in rows
+        ]
+        return results, next_offset
+
+
+# Instância única do serviço
+search_service = SearchService()
@@ -0,0 +1,159 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import asyncio
+from app.core.config import settings
+import tiktoken
+
+
+class TokenizerService:
+    """
+    Service de tokenização (tiktoken) fora do event loop.
+
+    Responsável por:
+    - Contar tokens de textos grandes em um pool de threads dedicado
+      (o tiktoken libera o GIL durante o encode)
+    - Agrupar requisições concorrentes em um único lote (uma tarefa do pool)
+    - Contar textos pequenos diretamente, onde o custo do pool não compensa
+    - Manter o fallback `len(text) // 4` quando o cl100k_base não pode ser carregado
+    """
+
+    def __init__(self):
+        """Inicializa o encoding cl100k_base e o pool de threads"""
+        # Gemini usa um encoding similar ao GPT-4, usamos cl100k_base
+        try:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # Fallback caso não consiga carregar
+            self.encoding = None
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.tokenizer_workers,
+            thread_name_prefix="tokenizer"
+        )
+        self.inline_max_chars = settings.tokenizer_inline_max_chars
+        self.batch_window = settings.tokenizer_batch_window_ms / 1000
+        self.max_batch_size = settings.tokenizer_max_batch_size
+
+        # Requisições aguardando o próximo lote: (texto, future)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def _fallback_count(text: str) -> int:
+        """Aproximação simples (~4 caracteres por token)"""
+        return len(text) // 4
+
+    def count_sync(self, text: str) -> int:
+        """
+        Conta os tokens de um texto de forma síncrona.
+
+        Args:
+            text: Texto para contar tokens
+
+        Returns:
+            Número estimado de tokens
+        """
+        if self.encoding:
+            try:
+                return len(self.encoding.encode(text, disallowed_special=()))
+            except Exception:
+                # Fallback em caso de erro
+                pass
+
+        return self._fallback_count(text)
+
+    def count_batch_sync(self, texts: List[str]) -> List[int]:
+        """
+        Conta os tokens de vários textos de uma vez (executado em uma thread do pool).
+
+        Usa `encode_ordinary` texto a texto em vez de `encode_batch`, que criaria
+        um pool de threads interno a cada lote, dentro da thread do próprio pool.
+
+        Args:
+            texts: Textos para contar tokens
+
+        Returns:
+            Número estimado de tokens de cada texto, na mesma ordem
+        """
+        if self.encoding:
+            try:
+                return [len(self.encoding.encode_ordinary(text)) for text in texts]
+            except Exception:
+                # Se o lote falhar, conta individualmente (com fallback por texto)
+                return [self.count_sync(text) for text in texts]
+
+        return [self._fallback_count(text) for text in texts]
+
+    async def count(self, text: str) -> int:
+        """
+        Conta os tokens de um texto sem bloquear o event loop.
+
+        Textos pequenos são contados diretamente. Textos grandes entram no lote
+        atual, enviado ao pool após TOKENIZER_BATCH_WINDOW_MS ou quando atinge
+        TOKENIZER_MAX_BATCH_SIZE textos.
+
+        Args:
+            text: Texto para contar tokens
+
+        Returns:
+            Número estimado de tokens
+        """
+        if self.encoding is None or len(text) <= self.inline_max_chars:
+            return self.count_sync(text)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    async def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Conta os tokens de vários textos sem bloquear o event loop.
+
+        Args:
+            texts: Textos para contar tokens
+
+        Returns:
+            Número estimado de tokens de cada texto, na mesma ordem
+        """
+        return list(await asyncio.gather(*(self.count(text) for text in texts)))
+
+    def _flush(self) -> None:
+        """Envia o lote pendente para o pool de threads"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        loop = asyncio.get_running_loop()
+        work = self.executor.submit(self.count_batch_sync, [text for text, _ in batch])
+        work.add_done_callback(
+            lambda done: loop.call_soon_threadsafe(self._resolve_batch, batch, done)
+        )
+
+    @staticmethod
+    def _resolve_batch(batch: List[Tuple[str, asyncio.Future]], done: Future) -> None:
+        """Entrega o resultado do lote para cada requisição (executado no event loop)"""
+        error = done.exception()
+        counts = done.result() if error is None else None
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(counts[index])
+
+
+# Instância única do serviço
+tokenizer_service = TokenizerService()
@@ -1,32 +1,37 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.auth.jwt import get_password_hash, verify_password
+from app.auth.password_pool import password_pool
 
 
-def get_user_by_email(db: Session, email: str) -> User | None:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Busca usuário por email"""
-    return db.query(User).filter(User.email == email.strip().lower()).first()
+    result = await db.execute(select(User).where(User.email == email.strip().lower()))
+    return result.scalar_one_or_none()
 
 
-def get_user_by_id(db: Session, user_id: int) -> User | None:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     """Busca usuário por ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalar_one_or_none()
 
 
-def create_user(db: Session, user_data: UserCreate) -> User:
+async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     """
     Cria um novo usuário no banco de dados.
     
+    O hash da senha roda no pool de processos dedicado ao bcrypt.
+    
     Raises:
-        HTTPException: Se o email já estiver cadastrado
+        HTTPException: Se o email já estiver cadastrado ou o pool de hash estiver saturado (503)
     """
     # Normalizar email
     normalized_email = user_data.email.strip().lower()
     
     # Verificar se já existe usuário com este email
-    existing_user = get_user_by_email(db, normalized_email)
+    existing_user = await get_user_by_email(db, normalized_email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,7 +39,7 @@ def create_user(db: Session, user_data: UserCreate) -> User:
         )
     
     # Criar hash da senha
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_pool.hash_password(user_data.password)
     
     # Criar novo usuário
     new_user = User(
@@ -43,21 +48,23 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> User:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
     """
     Autentica um usuário verificando email e senha.
     
+    A verificação da senha roda no pool de processos dedicado ao bcrypt.
+    
     Raises:
-        HTTPException: Se as credenciais forem inválidas
+        HTTPException: Se as credenciais forem inválidas ou o pool de hash estiver saturado (503)
     """
     # Buscar usuário
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     
     if not user:
         raise HTTPException(
@@ -66,7 +73,7 @@ def authenticate_user(db: Session, email: str, password: str) -> User:
         )
     
     # Verificar senha
-    if not verify_password(password, getattr(user, "hashed_password")):
+    if not await password_pool.verify_password(password, getattr(user, "hashed_password")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos"
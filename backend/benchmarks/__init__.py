@@ -0,0 +1 @@
+# Benchmarks package - Medições de desempenho do backend (não são testes)
@@ -0,0 +1,158 @@
+"""
+Configuração e utilitários compartilhados pelos benchmarks.
+
+Este módulo deve ser importado antes de qualquer módulo de `app`: as variáveis de
+ambiente abaixo são lidas pelo Settings no momento do import. Os benchmarks usam
+um banco SQLite temporário e o provedor fake sem latência (nenhuma chamada ao Gemini).
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCHMARKS_DIR.parent
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+
+# Diretório de onde o benchmark foi chamado (caminhos relativos da linha de comando)
+INVOCATION_DIR = Path.cwd()
+
+_WORK_DIR = tempfile.mkdtemp(prefix="genai-bench-")
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_WORK_DIR}/bench.db")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_DISTRIBUTION", "fixed")
+os.environ.setdefault("FAKE_LLM_LATENCY_MEAN_MS", "0")
+os.environ.setdefault("FAKE_LLM_STREAM_TOKENS_PER_SECOND", "0")
+os.environ.setdefault("FAKE_LLM_SEED", "42")
+# Sem cache de respostas: cada requisição percorre o pipeline completo
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+
+# database.py cria o diretório "data" relativo ao diretório atual
+os.chdir(_WORK_DIR)
+
+# Tamanhos de conversa usados nos micro-benchmarks
+CONVERSATION_SIZES = (10, 100, 1000)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Resume uma lista de durações (segundos) em estatísticas (microssegundos).
+
+    Args:
+        samples: Duração de cada execução, em segundos
+
+    Returns:
+        Dicionário com execuções, média, mediana, p95, p99, mínimo, máximo e ops/s
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(count - 1, int(count * p))]
+
+    mean = statistics.fmean(ordered)
+    return {
+        "runs": count,
+        "mean_us": round(mean * 1e6, 3),
+        "p50_us": round(percentile(0.50) * 1e6, 3),
+        "p95_us": round(percentile(0.95) * 1e6, 3),
+        "p99_us": round(percentile(0.99) * 1e6, 3),
+        "min_us": round(ordered[0] * 1e6, 3),
+        "max_us": round(ordered[-1] * 1e6, 3),
+        "ops_per_sec": round(1 / mean, 2) if mean > 0 else 0.0,
+    }
+
+
+def bench(func: Callable[[], object], runs: int = 200, warmup: int = 10) -> Dict[str, float]:
+    """Mede uma função síncrona"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return summarize(samples)
+
+
+async def bench_async(
+    func: Callable[[], Awaitable[object]],
+    runs: int = 200,
+    warmup: int = 10
+) -> Dict[str, float]:
+    """Mede uma função assíncrona (execuções sequenciais)"""
+    for _ in range(warmup):
+        await func()
+
+    samples = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started_at)
+    return summarize(samples)
+
+
+def run_async(coroutine):
+    """Executa uma corrotina em um event loop novo"""
+    return asyncio.run(coroutine)
+
+
+def _git_commit() -> Optional[str]:
+    """Commit atual do repositório (None fora de um repositório git)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def environment_info() -> dict:
+    """Metadados da execução, gravados junto com os resultados"""
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(results: dict, output: Optional[Path] = None) -> Path:
+    """
+    Grava os resultados em JSON.
+
+    Args:
+        results: Resultados por benchmark
+        output: Arquivo de saída (padrão: benchmarks/results/<timestamp>-<commit>.json)
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    info = environment_info()
+
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = info["timestamp"].replace(":", "").replace("-", "")[:15]
+        output = RESULTS_DIR / f"{stamp}-{info['commit'] or 'local'}.json"
+
+    output = INVOCATION_DIR / output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"environment": info, "results": results}, indent=2, ensure_ascii=False),
+        encoding="utf-8"
+    )
+    return output
@@ -0,0 +1,124 @@
+"""Benchmarks das consultas ao SQLite: autenticação e histórico de mensagens"""
+from benchmarks.common import CONVERSATION_SIZES, bench_async, run_async
+
+from starlette.requests import Request
+from app.auth.dependencies import get_current_user
+from app.auth.jwt import create_access_token, get_password_hash
+from app.auth.user_cache import auth_cache
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.core.migrations import run_migrations
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.user import User
+from app.services.chat_service import chat_service
+
+# Conversas extras por usuário, para que as consultas não rodem em tabelas quase vazias
+_FILLER_CONVERSATIONS = 200
+_FILLER_MESSAGES = 20
+
+
+def populate() -> dict:
+    """
+    Cria um usuário com conversas de vários tamanhos no banco do benchmark.
+
+    Returns:
+        Dicionário com o id do usuário, o token e o id da conversa de cada tamanho
+    """
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench-db@example.com", hashed_password=get_password_hash("Senha@123"))
+        db.add(user)
+        db.flush()
+
+        conversation_ids = {}
+        for size in CONVERSATION_SIZES:
+            conversation = Conversation(user_id=user.id, title=f"bench {size}", qtd_tokens=0)
+            db.add(conversation)
+            db.flush()
+            conversation_ids[size] = conversation.id
+            db.add_all(
+                Message(
+                    conversation_id=conversation.id,
+                    role="user" if index % 2 == 0 else "assistant",
+                    content=f"mensagem {index} " * 20,
+                    token_count=60
+                )
+                for index in range(size)
+            )
+
+        for index in range(_FILLER_CONVERSATIONS):
+            conversation = Conversation(user_id=user.id, title=f"filler {index}", qtd_tokens=0)
+            db.add(conversation)
+            db.flush()
+            db.add_all(
+                Message(conversation_id=conversation.id, role="user", content="oi", token_count=1)
+                for _ in range(_FILLER_MESSAGES)
+            )
+
+        db.commit()
+        return {
+            "user_id": user.id,
+            "token": create_access_token({"sub": str(user.id)}),
+            "conversation_ids": conversation_ids,
+        }
+    finally:
+        db.close()
+
+
+def _request_with_cookie(token: str) -> Request:
+    """Cria uma requisição ASGI mínima com o cookie de autenticação"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/auth/me",
+        "headers": [(b"cookie", f"access_token={token}".encode())],
+    })
+
+
+async def _run(fixture: dict, runs: int) -> dict:
+    """Executa os benchmarks com uma sessão assíncrona por execução (como nas rotas)"""
+    results = {}
+    request = _request_with_cookie(fixture["token"])
+
+    async def current_user_cold():
+        auth_cache.clear()
+        async with AsyncSessionLocal() as db:
+            await get_current_user(request, db)
+
+    async def current_user_warm():
+        async with AsyncSessionLocal() as db:
+            await get_current_user(request, db)
+
+    results["get_current_user[cold]"] = await bench_async(current_user_cold, runs=runs)
+    results["get_current_user[cached]"] = await bench_async(current_user_warm, runs=runs)
+
+    for size, conversation_id in fixture["conversation_ids"].items():
+        async def messages_all():
+            async with AsyncSessionLocal() as db:
+                await chat_service.get_conversation_messages(db, conversation_id)
+
+        async def messages_page():
+            async with AsyncSessionLocal() as db:
+                await chat_service.get_conversation_messages_page(db, conversation_id, limit=50)
+
+        results[f"get_conversation_messages[{size}]"] = await bench_async(messages_all, runs=runs)
+        results[f"get_conversation_messages_page[{size}]"] = await bench_async(messages_page, runs=runs)
+
+    # Conexões do pool assíncrono ficam presas a este event loop
+    await async_engine.dispose()
+    return results
+
+
+def run(runs: int = 200) -> dict:
+    """
+    Popula o banco e executa os benchmarks de consultas.
+
+    Args:
+        runs: Execuções medidas por benchmark
+
+    Returns:
+        Resultados por nome de benchmark
+    """
+    fixture = populate()
+    return run_async(_run(fixture, runs))
@@ -0,0 +1,118 @@
+"""Benchmark ponta a ponta: POST /chat e GET /conversations/{id} pelo app ASGI, com o provedor fake"""
+from benchmarks.common import run_async, summarize
+
+from typing import Awaitable, Callable, List
+import asyncio
+import time
+import httpx
+from app.auth.jwt import create_access_token, get_password_hash
+from app.core.database import SessionLocal, async_engine
+from app.main import app
+from app.models.conversation import Conversation
+from app.models.user import User
+
+
+def create_clients_fixture(workers: int) -> List[dict]:
+    """Cria um usuário e uma conversa por worker (sem passar pelo bcrypt das rotas)"""
+    db = SessionLocal()
+    try:
+        hashed_password = get_password_hash("Senha@123")
+        fixtures = []
+        for index in range(workers):
+            user = User(email=f"bench-e2e-{time.time_ns()}-{index}@example.com", hashed_password=hashed_password)
+            db.add(user)
+            db.flush()
+            conversation = Conversation(user_id=user.id, title="bench e2e", qtd_tokens=0)
+            db.add(conversation)
+            db.flush()
+            fixtures.append({
+                "token": create_access_token({"sub": str(user.id)}),
+                "conversation_id": conversation.id,
+            })
+        db.commit()
+        return fixtures
+    finally:
+        db.close()
+
+
+async def _drive(
+    clients: List[httpx.AsyncClient],
+    requests_per_worker: int,
+    request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+) -> dict:
+    """
+    Dispara requisições com um worker concorrente por cliente.
+
+    Returns:
+        Latências (estatísticas), vazão total e contagem de status HTTP
+    """
+    samples: List[float] = []
+    status_codes: dict = {}
+
+    async def worker(client: httpx.AsyncClient, worker_index: int) -> None:
+        for _ in range(requests_per_worker):
+            started_at = time.perf_counter()
+            response = await request(client, worker_index)
+            samples.append(time.perf_counter() - started_at)
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(client, index) for index, client in enumerate(clients)))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        **summarize(samples),
+        "concurrency": len(clients),
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+    }
+
+
+async def _run(concurrency: int, requests_per_worker: int) -> dict:
+    """Executa os cenários de /chat e de leitura da conversa"""
+    fixtures = create_clients_fixture(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    clients = [
+        httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={"access_token": fixture["token"]}
+        )
+        for fixture in fixtures
+    ]
+
+    async def post_chat(client: httpx.AsyncClient, worker_index: int) -> httpx.Response:
+        return await client.post("/chat", json={
+            "conversation_id": fixtures[worker_index]["conversation_id"],
+            "message": "o que é ia generativa e como ela pode ajudar no atendimento?",
+        })
+
+    async def get_conversation(client: httpx.AsyncClient, worker_index: int) -> httpx.Response:
+        return await client.get(f"/conversations/{fixtures[worker_index]['conversation_id']}")
+
+    try:
+        results = {
+            f"post_chat[c={concurrency}]": await _drive(clients, requests_per_worker, post_chat),
+            f"get_conversation[c={concurrency}]": await _drive(clients, requests_per_worker, get_conversation),
+        }
+    finally:
+        for client in clients:
+            await client.aclose()
+        await async_engine.dispose()
+
+    return results
+
+
+def run(concurrency: int = 8, requests_per_worker: int = 25) -> dict:
+    """
+    Executa o benchmark ponta a ponta.
+
+    Args:
+        concurrency: Clientes (usuários) simultâneos
+        requests_per_worker: Requisições sequenciais de cada cliente por cenário
+
+    Returns:
+        Resultados por nome de benchmark
+    """
+    return run_async(_run(concurrency, requests_per_worker))
@@ -0,0 +1,76 @@
+"""Micro-benchmarks das funções do caminho crítico do /chat (sem banco de dados)"""
+from benchmarks.common import CONVERSATION_SIZES, bench, bench_async, run_async
+
+# Importar todos os modelos (registra os mapeamentos do SQLAlchemy)
+from app.models.user import User
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.services.history_cache import CachedMessage
+from app.services.langchain_service import langchain_service
+
+# Mensagens de tamanhos variados, repetidas para montar as conversas
+_SAMPLE_CONTENTS = (
+    "o que é ia generativa?",
+    "IA Generativa é uma categoria de inteligência artificial que cria conteúdo novo "
+    "e original, como textos, imagens e código, a partir de padrões aprendidos. " * 3,
+    "pode me dar um exemplo prático de uso em atendimento ao cliente?",
+    "Claro! Um exemplo comum é um assistente que responde dúvidas frequentes, "
+    "resume o histórico do cliente e sugere respostas para o atendente humano. " * 6,
+)
+
+
+def build_conversation(size: int) -> list:
+    """Monta uma conversa em memória com `size` mensagens alternando usuário e assistente"""
+    messages = []
+    for index in range(size):
+        content = _SAMPLE_CONTENTS[index % len(_SAMPLE_CONTENTS)]
+        messages.append(Message(
+            id=index + 1,
+            conversation_id=1,
+            role="user" if index % 2 == 0 else "assistant",
+            content=content,
+            token_count=langchain_service._estimate_tokens(content)
+        ))
+    return messages
+
+
+def run(runs: int = 200) -> dict:
+    """
+    Executa os micro-benchmarks para cada tamanho de conversa.
+
+    Args:
+        runs: Execuções medidas por benchmark
+
+    Returns:
+        Resultados por nome de benchmark
+    """
+    results = {}
+    new_message = "e quais são os principais riscos dessa tecnologia?"
+
+    for size in CONVERSATION_SIZES:
+        messages = build_conversation(size)
+        cached_messages = [CachedMessage.from_message(msg) for msg in messages]
+        current_tokens = langchain_service.calculate_context_tokens(messages)
+
+        results[f"format_message_history[{size}]"] = bench(
+            lambda: langchain_service._format_message_history(messages),
+            runs=runs
+        )
+        results[f"format_message_history_cached[{size}]"] = bench(
+            lambda: langchain_service._format_message_history(cached_messages),
+            runs=runs
+        )
+        results[f"estimate_tokens[{size}]"] = bench(
+            lambda: [langchain_service._estimate_tokens(msg.content) for msg in messages],
+            runs=runs
+        )
+        results[f"calculate_conversation_tokens[{size}]"] = bench(
+            lambda: langchain_service._calculate_conversation_tokens(messages),
+            runs=runs
+        )
+        results[f"check_token_limit[{size}]"] = run_async(bench_async(
+            lambda: langchain_service.check_token_limit(current_tokens, new_message),
+            runs=runs
+        ))
+
+    return results
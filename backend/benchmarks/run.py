@@ -0,0 +1,118 @@
+"""
+Executa a suíte de benchmarks e grava os resultados em JSON.
+
+Uso (a partir de backend/):
+    python -m benchmarks.run                      # todas as suítes
+    python -m benchmarks.run --suite micro db     # apenas algumas suítes
+    python -m benchmarks.run --quick              # menos execuções (verificação rápida)
+    python -m benchmarks.run --compare benchmarks/results/<baseline>.json
+"""
+from benchmarks.common import write_results, INVOCATION_DIR
+
+from pathlib import Path
+from typing import Optional
+import argparse
+import json
+import sys
+
+SUITES = ("micro", "db", "e2e")
+
+# Métricas comparadas entre execuções (menor é melhor)
+_COMPARED_METRICS = ("mean_us", "p95_us")
+
+
+def run_suites(suites, quick: bool = False, concurrency: int = 8) -> dict:
+    """Executa as suítes escolhidas e retorna os resultados agrupados por suíte"""
+    runs = 30 if quick else 200
+    results = {}
+
+    # Imports tardios: cada suíte carrega apenas o que usa
+    if "micro" in suites:
+        from benchmarks import micro
+        results["micro"] = micro.run(runs=runs)
+
+    if "db" in suites:
+        from benchmarks import db
+        results["db"] = db.run(runs=runs)
+
+    if "e2e" in suites:
+        from benchmarks import e2e
+        results["e2e"] = e2e.run(
+            concurrency=concurrency,
+            requests_per_worker=5 if quick else 25
+        )
+
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """
+    Compara os resultados com uma execução anterior e imprime as diferenças.
+
+    Args:
+        current: Resultados desta execução
+        baseline: Resultados da execução de referência
+        threshold: Piora relativa (ex: 0.2 = 20%) considerada regressão
+
+    Returns:
+        Quantidade de regressões encontradas
+    """
+    regressions = 0
+    print(f"\n{'benchmark':<55} {'métrica':<8} {'antes':>12} {'agora':>12} {'variação':>9}")
+
+    for suite, benchmarks in current.items():
+        for name, metrics in benchmarks.items():
+            previous = baseline.get(suite, {}).get(name)
+            if previous is None:
+                continue
+            for metric in _COMPARED_METRICS:
+                before, after = previous.get(metric), metrics.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before
+                flag = ""
+                if change > threshold:
+                    regressions += 1
+                    flag = "  REGRESSÃO"
+                print(
+                    f"{suite + '.' + name:<55} {metric:<8} {before:>12.1f} {after:>12.1f} "
+                    f"{change:>+8.1%}{flag}"
+                )
+
+    return regressions
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmarks do backend do GenAI Chatbot")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="Menos execuções por benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultâneos no e2e")
+    parser.add_argument("--output", type=Path, help="Arquivo JSON de saída")
+    parser.add_argument("--compare", type=Path, help="JSON de uma execução anterior para comparar")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="Piora relativa considerada regressão na comparação (padrão: 0.2)"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suites(args.suite, quick=args.quick, concurrency=args.concurrency)
+    output = write_results(results, args.output)
+    print(f"Resultados gravados em {output}")
+
+    for suite, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            extra = f"  {metrics['throughput_rps']} req/s" if "throughput_rps" in metrics else ""
+            print(f"{suite + '.' + name:<55} mean={metrics['mean_us']:>12.1f}us p95={metrics['p95_us']:>12.1f}us{extra}")
+
+    if args.compare:
+        baseline_path = INVOCATION_DIR / args.compare
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
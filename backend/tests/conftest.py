@@ -0,0 +1,36 @@
+import os
+import tempfile
+import pytest
+
+# Configuração mínima antes de importar o app: banco SQLite temporário e
+# provedor de modelo local (os testes nunca chamam o Gemini)
+_tmp_dir = tempfile.mkdtemp(prefix="genai-chatbot-tests-")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-with-at-least-32-chars")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/test.db")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+# Respostas do provedor fake sem latência simulada
+os.environ.setdefault("FAKE_LLM_LATENCY_DISTRIBUTION", "fixed")
+os.environ.setdefault("FAKE_LLM_LATENCY_MEAN_MS", "0")
+os.environ.setdefault("FAKE_LLM_STREAM_TOKENS_PER_SECOND", "0")
+
+
+@pytest.fixture
+def anyio_backend():
+    """Testes assíncronos (pytest.mark.anyio) rodam no asyncio, como o app"""
+    return "asyncio"
+
+
+@pytest.fixture
+def client():
+    """Cliente HTTP do app (com lifespan) autenticado com um usuário novo"""
+    import uuid
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        credentials = {"email": f"{uuid.uuid4().hex}@example.com", "password": "Senha@123"}
+        test_client.post("/auth/register", json=credentials)
+        response = test_client.post("/auth/login", json=credentials)
+        assert response.status_code == 200
+        yield test_client
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from app.core.cache_backend import CacheBackend, InProcessCacheBackend, RedisCacheBackend
+from app.core.cache_invalidation import CacheInvalidator
+from tests.utils import wait_until
+
+fakeredis = pytest.importorskip("fakeredis")
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyPubSubRedis(fakeredis.FakeAsyncRedis):
+    """Cliente fakeredis cuja primeira assinatura cai com erro de conexão quando solicitado"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drop = asyncio.Event()
+        self.pubsub_count = 0
+
+    def pubsub(self, **kwargs):
+        pubsub = super().pubsub(**kwargs)
+        self.pubsub_count += 1
+        if self.pubsub_count > 1:
+            return pubsub
+
+        drop = self.drop
+        original_listen = pubsub.listen
+
+        async def listen():
+            messages = original_listen().__aiter__()
+            while True:
+                next_message = asyncio.ensure_future(messages.__anext__())
+                dropped = asyncio.ensure_future(drop.wait())
+                done, _ = await asyncio.wait({next_message, dropped}, return_when=asyncio.FIRST_COMPLETED)
+                if dropped in done:
+                    next_message.cancel()
+                    raise ConnectionError("Conexão perdida")
+                dropped.cancel()
+                yield next_message.result()
+
+        pubsub.listen = listen
+        return pubsub
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_backend(server, **kwargs) -> RedisCacheBackend:
+    client_class = kwargs.pop("client_class", fakeredis.FakeAsyncRedis)
+    return RedisCacheBackend(
+        client=client_class(server=server, decode_responses=True),
+        key_prefix="test",
+        reconnect_delay=0.01,
+        **kwargs
+    )
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+async def test_in_process_backend_ttl_and_lru():
+    backend = InProcessCacheBackend(max_entries=2)
+
+    await backend.set("a", "1")
+    await backend.set("b", "2", ttl_seconds=0.01)
+    await backend.set("c", "3")
+
+    assert await backend.get("a") is None  # Removida pelo LRU
+    await asyncio.sleep(0.02)
+    assert await backend.get("b") is None  # Expirada
+    assert await backend.get("c") == "3"
+
+    await backend.delete("c")
+    assert await backend.get("c") is None
+
+
+async def test_redis_backend_shares_values_between_instances(server):
+    first = make_backend(server)
+    second = make_backend(server)
+
+    await first.set("key", "value", ttl_seconds=60)
+    assert await second.get("key") == "value"
+
+    await second.delete("key")
+    assert await first.get("key") is None
+
+    await first.close()
+    await second.close()
+
+
+async def test_invalidation_reaches_other_workers_only(server):
+    backends = [make_backend(server), make_backend(server)]
+    invalidators = [CacheInvalidator(backend) for backend in backends]
+    received = [[], []]
+    for invalidator, keys in zip(invalidators, received):
+        invalidator.register("user", keys.append)
+        await invalidator.start()
+
+    await invalidators[0].publish("user", 42)
+    await wait_until(lambda: received[1] == [42])
+
+    # O worker de origem ignora a própria mensagem
+    assert received[0] == []
+    assert invalidators[0].published == 1
+    assert invalidators[1].received == 1
+
+    for invalidator, backend in zip(invalidators, backends):
+        await invalidator.stop()
+        await backend.close()
+
+
+async def test_reconnect_clears_local_caches(server):
+    publisher = make_backend(server)
+    subscriber = make_backend(server, client_class=FlakyPubSubRedis)
+    invalidator = CacheInvalidator(subscriber)
+    received, cleared = [], []
+    invalidator.register("conversation", received.append, clear=lambda: cleared.append(True))
+    await invalidator.start()
+
+    subscriber.client.drop.set()
+    await wait_until(lambda: subscriber.reconnects == 1)
+
+    # Mensagens perdidas durante a queda: os caches locais são descartados
+    assert subscriber.errors == 1
+    assert cleared == [True]
+    assert invalidator.resets == 1
+
+    # A nova assinatura volta a receber invalidações
+    await CacheInvalidator(publisher).publish("conversation", 7)
+    await wait_until(lambda: received == [7])
+
+    await invalidator.stop()
+    await subscriber.close()
+    await publisher.close()
+
+
+async def test_in_process_backend_is_not_shared():
+    backend = InProcessCacheBackend()
+    invalidator = CacheInvalidator(backend)
+    received = []
+    invalidator.register("user", received.append)
+    await invalidator.start()
+
+    await invalidator.publish("user", 1)
+
+    assert received == []
+    assert invalidator.published == 0
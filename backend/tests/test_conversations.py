@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.fixture
+def conversation_ids(client) -> list:
+    """Três conversas do usuário, da mais recente para a mais antiga"""
+    ids = [
+        client.post("/conversations", json={"title": f"Conversa {index}"}).json()["id"]
+        for index in range(3)
+    ]
+    return ids[::-1]
+
+
+def listed_ids(response) -> list:
+    assert response.status_code == 200
+    return [conversation["id"] for conversation in response.json()]
+
+
+def test_cursor_pages_cover_the_whole_list(client, conversation_ids):
+    first = client.get("/conversations", params={"limit": 2})
+    assert listed_ids(first) == conversation_ids[:2]
+
+    second = client.get("/conversations", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert listed_ids(second) == conversation_ids[2:]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_legacy_skip_and_limit_keep_their_semantics(client, conversation_ids):
+    assert listed_ids(client.get("/conversations", params={"skip": 1, "limit": 1})) == conversation_ids[1:2]
+    # limit acima de 100 continua aceito, e limit 0 continua devolvendo uma lista vazia
+    assert listed_ids(client.get("/conversations", params={"limit": 500})) == conversation_ids
+    assert listed_ids(client.get("/conversations", params={"limit": 0})) == []
+
+
+def test_cursor_cannot_be_combined_with_skip(client, conversation_ids):
+    cursor = client.get("/conversations", params={"limit": 1}).headers["X-Next-Cursor"]
+
+    assert client.get("/conversations", params={"skip": 1, "cursor": cursor}).status_code == 400
+    assert client.get("/conversations", params={"limit": 0, "cursor": cursor}).status_code == 400
+    assert client.get("/conversations", params={"cursor": "invalido"}).status_code == 400
+
+
+def test_conversation_etag_answers_304_until_it_changes(client, conversation_ids):
+    path = f"/conversations/{conversation_ids[0]}"
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    # Um novo turno de chat muda a versão da conversa
+    response = client.post("/chat", json={"conversation_id": conversation_ids[0], "message": "Olá"})
+    assert response.status_code == 200
+
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [message["role"] for message in changed.json()["messages"]] == ["user", "assistant"]
+
+
+def test_list_etag_answers_304_until_a_conversation_is_created(client, conversation_ids):
+    first = client.get("/conversations")
+    etag, last_modified = first.headers["ETag"], first.headers["Last-Modified"]
+
+    assert client.get("/conversations", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/conversations", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # Outra página da mesma lista tem outra ETag
+    assert client.get("/conversations", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+    created = client.post("/conversations", json={"title": "Nova"}).json()["id"]
+
+    changed = client.get("/conversations", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert listed_ids(changed) == [created] + conversation_ids
@@ -0,0 +1,204 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app.core.database import AsyncSessionLocal, async_engine, engine
+from app.core.migrations import run_migrations
+from app.services.job_queue import JobQueue
+from tests.utils import wait_until
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+async def jobs_table():
+    """Tabela jobs vazia em cada teste; conexões async descartadas ao final"""
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM jobs"))
+    yield
+    await async_engine.dispose()
+
+
+def make_queue(**kwargs) -> JobQueue:
+    """Fila com um worker, poll curto e backoff desprezível"""
+    options = {
+        "workers": 1,
+        "poll_interval": 0.01,
+        "max_attempts": 3,
+        "retry_base_delay": 0.01,
+        "retry_max_delay": 0.01,
+        "lease_seconds": 5,
+        "retention_seconds": 3600,
+    }
+    options.update(kwargs)
+    return JobQueue(**options)
+
+
+async def enqueue(queue: JobQueue, kind: str, payload: dict, **kwargs) -> bool:
+    """Enfileira uma tarefa e efetiva a transação"""
+    async with AsyncSessionLocal() as db:
+        inserted = await queue.enqueue(db, kind, payload, **kwargs)
+        await db.commit()
+    queue.notify()
+    return inserted
+
+
+async def job_rows() -> list:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text("SELECT kind, status, attempts, last_error FROM jobs ORDER BY id"))
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def test_dedupe_key_skips_duplicates_while_pending():
+    queue = make_queue()
+
+    assert await enqueue(queue, "k", {"n": 1}, dedupe_key="same")
+    assert not await enqueue(queue, "k", {"n": 2}, dedupe_key="same")
+    assert await enqueue(queue, "k", {"n": 3}, dedupe_key="other")
+
+    assert len(await job_rows()) == 2
+    assert queue.stats()["enqueued"] == 2
+    assert queue.stats()["deduplicated"] == 1
+
+
+async def test_other_constraint_violations_are_not_ignored():
+    queue = make_queue()
+
+    # Só o índice de deduplicação é tratado como conflito esperado
+    with pytest.raises(IntegrityError):
+        await enqueue(queue, None, {}, dedupe_key="same")
+    assert queue.stats()["deduplicated"] == 0
+
+
+async def test_dedupe_key_is_free_again_after_the_job_runs():
+    queue = make_queue()
+    queue.register("k", lambda db, payload: _noop())
+    queue.start()
+    try:
+        assert await enqueue(queue, "k", {}, dedupe_key="same")
+        await wait_until(lambda: queue.succeeded == 1)
+        assert await enqueue(queue, "k", {}, dedupe_key="same")
+    finally:
+        await queue.stop()
+
+
+async def test_failed_job_is_retried_until_it_succeeds():
+    queue = make_queue()
+    calls = []
+
+    async def flaky(db, payload):
+        calls.append(payload)
+        if len(calls) < 2:
+            raise RuntimeError("falha temporária")
+
+    queue.register("flaky", flaky)
+    queue.start()
+    try:
+        await enqueue(queue, "flaky", {"id": 1})
+        await wait_until(lambda: queue.succeeded == 1)
+    finally:
+        await queue.stop()
+
+    assert calls == [{"id": 1}, {"id": 1}]
+    assert queue.retried == 1
+    [row] = await job_rows()
+    assert row["status"] == "done"
+    assert row["attempts"] == 2
+
+
+async def test_job_fails_after_max_attempts():
+    queue = make_queue(max_attempts=2)
+
+    async def broken(db, payload):
+        raise ValueError("sempre falha")
+
+    queue.register("broken", broken)
+    queue.start()
+    try:
+        await enqueue(queue, "broken", {})
+        await wait_until(lambda: queue.failed == 1)
+    finally:
+        await queue.stop()
+
+    [row] = await job_rows()
+    assert row["status"] == "failed"
+    assert row["attempts"] == 2
+    assert "sempre falha" in row["last_error"]
+
+
+async def test_expired_lease_is_claimed_again():
+    queue = make_queue()
+    calls = []
+
+    async def handler(db, payload):
+        calls.append(payload["id"])
+
+    queue.register("k", handler)
+
+    # Tarefas de um worker que caiu: uma com a reserva vencida e outra ainda válida
+    now = time.time()
+    with engine.begin() as conn:
+        for job_id, locked_until in ((1, now - 1), (2, now + 60)):
+            conn.execute(
+                text(
+                    "INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, "
+                    "locked_until, created_at, updated_at) "
+                    "VALUES ('k', :payload, 'running', 1, 3, :now, :locked_until, :now, :now)"
+                ),
+                {"payload": f'{{"id": {job_id}}}', "now": now, "locked_until": locked_until}
+            )
+
+    queue.start()
+    try:
+        await wait_until(lambda: queue.succeeded == 1)
+        assert await queue._claim() is None
+    finally:
+        await queue.stop()
+
+    assert calls == [1]
+    rows = await job_rows()
+    assert [row["status"] for row in rows] == ["done", "running"]
+    assert rows[0]["attempts"] == 2
+
+
+async def test_unknown_kind_is_marked_failed():
+    queue = make_queue()
+    queue.start()
+    try:
+        await enqueue(queue, "missing", {})
+        await wait_until(lambda: queue.failed == 1)
+    finally:
+        await queue.stop()
+
+    [row] = await job_rows()
+    assert row["status"] == "failed"
+
+
+async def test_stop_returns_running_job_to_the_queue():
+    queue = make_queue()
+    started = []
+
+    async def slow(db, payload):
+        started.append(True)
+        await _sleep_forever()
+
+    queue.register("slow", slow)
+    queue.start()
+    await enqueue(queue, "slow", {})
+    await wait_until(lambda: started)
+    await queue.stop()
+
+    # Interrompida pelo encerramento: volta para a fila sem consumir a tentativa
+    [row] = await job_rows()
+    assert row["status"] == "pending"
+    assert row["attempts"] == 0
+
+
+async def _noop() -> None:
+    return None
+
+
+async def _sleep_forever() -> None:
+    await asyncio.Event().wait()
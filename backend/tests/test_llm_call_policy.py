@@ -0,0 +1,205 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.llm_call_policy import LLMCallPolicy, is_retryable_error
+from app.services.llm_scheduler import LLMScheduler
+from app.services.providers.base import ProviderError
+from tests.utils import wait_until
+
+pytestmark = pytest.mark.anyio
+
+
+def make_policy(**kwargs) -> LLMCallPolicy:
+    """Política sem espera entre tentativas e sem hedge, salvo indicação"""
+    options = {
+        "timeout": 1.0,
+        "max_retries": 2,
+        "retry_base_delay": 0,
+        "retry_max_delay": 0,
+        "hedge_enabled": False,
+        "hedge_percentile": 0.9,
+        "hedge_min_samples": 5,
+    }
+    options.update(kwargs)
+    return LLMCallPolicy(**options)
+
+
+class ScriptedCall:
+    """Chamada que executa, a cada tentativa, o próximo passo do roteiro"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.attempts = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        step = self.steps[min(self.attempts, len(self.steps) - 1)]
+        self.attempts += 1
+        try:
+            return await step()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def fail(error: Exception):
+    async def step():
+        raise error
+    return step
+
+
+def succeed(value: str, delay: float = 0):
+    async def step():
+        await asyncio.sleep(delay)
+        return value
+    return step
+
+
+def test_retryable_errors():
+    assert is_retryable_error(asyncio.TimeoutError())
+    assert is_retryable_error(ConnectionError())
+    assert is_retryable_error(ProviderError("rate limit", code=429))
+
+    # Erro do provedor embrulhado por outra exceção (como faz o LangChain)
+    try:
+        try:
+            raise ProviderError("indisponível", code=503)
+        except ProviderError as cause:
+            raise RuntimeError("falha na chamada") from cause
+    except RuntimeError as wrapped:
+        assert is_retryable_error(wrapped)
+
+    assert not is_retryable_error(ProviderError("requisição inválida", code=400))
+    assert not is_retryable_error(ValueError())
+
+
+async def test_transient_failures_are_retried():
+    policy = make_policy()
+    call = ScriptedCall(fail(ProviderError("503")), fail(ProviderError("503")), succeed("ok"))
+
+    assert await policy.run(call) == "ok"
+    assert call.attempts == 3
+    assert policy.retries == 2
+    assert policy.failures == 0
+
+
+async def test_non_retryable_error_is_raised_immediately():
+    policy = make_policy()
+    call = ScriptedCall(fail(ValueError("bug")))
+
+    with pytest.raises(ValueError):
+        await policy.run(call)
+    assert call.attempts == 1
+    assert policy.retries == 0
+
+
+async def test_exhausted_transient_failures_return_503_with_retry_after():
+    policy = make_policy(max_retries=1, retry_max_delay=3)
+    call = ScriptedCall(fail(ProviderError("503")))
+
+    with pytest.raises(HTTPException) as error:
+        await policy.run(call)
+
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "3"
+    assert call.attempts == 2
+    assert policy.failures == 1
+
+
+async def test_deadline_cancels_the_call_and_returns_504():
+    policy = make_policy(timeout=0.05, max_retries=1)
+    call = ScriptedCall(succeed("tarde demais", delay=10))
+
+    with pytest.raises(HTTPException) as error:
+        await policy.run(call)
+
+    # O cancelamento das tentativas é entregue na próxima iteração do event loop
+    await asyncio.sleep(0)
+    assert error.value.status_code == 504
+    assert call.attempts == 2
+    assert call.cancelled == 2
+    assert policy.timeouts == 2
+
+
+async def test_slow_call_is_hedged_and_fastest_wins():
+    policy = make_policy(hedge_enabled=True, hedge_min_samples=5)
+    policy._latencies.extend([0.01] * 5)
+    call = ScriptedCall(succeed("lenta", delay=10), succeed("hedge"))
+
+    assert await policy.run(call) == "hedge"
+    assert policy.hedges == 1
+    assert policy.hedge_wins == 1
+    # A chamada original é cancelada
+    await asyncio.sleep(0)
+    assert call.cancelled == 1
+
+
+async def test_hedge_waits_for_enough_samples():
+    policy = make_policy(hedge_enabled=True, hedge_min_samples=5)
+    policy._latencies.extend([0.01] * 4)
+    call = ScriptedCall(succeed("ok", delay=0.05))
+
+    assert await policy.run(call) == "ok"
+    assert policy.hedges == 0
+    assert call.attempts == 1
+
+
+async def test_hedge_never_exceeds_the_scheduler_concurrency():
+    scheduler = LLMScheduler(max_concurrency=3, max_queue=10, queue_timeout=5)
+    policy = make_policy(hedge_enabled=True, hedge_min_samples=5, scheduler=scheduler)
+    policy._latencies.extend([0.01] * 5)
+    peak = 0
+
+    async def slow_call():
+        nonlocal peak
+        peak = max(peak, scheduler.in_flight)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def request():
+        async with scheduler.slot():
+            return await policy.run(slow_call)
+
+    # Duas requisições ocupam 2 das 3 vagas: só um dos hedges encontra vaga livre
+    assert await asyncio.gather(request(), request()) == ["ok", "ok"]
+    assert peak == scheduler.max_concurrency
+    assert policy.hedges == 1
+    assert policy.hedges_skipped == 1
+
+    # Vagas devolvidas, inclusive a do hedge cancelado
+    await wait_until(lambda: scheduler.in_flight == 0)
+
+
+async def test_stream_retries_before_the_first_chunk():
+    policy = make_policy()
+    opened = []
+
+    async def open_stream():
+        opened.append(True)
+        if len(opened) == 1:
+            raise ProviderError("503")
+        for chunk in ["a", "b", "c"]:
+            yield chunk
+
+    chunks = [chunk async for chunk in policy.stream(open_stream)]
+
+    assert chunks == ["a", "b", "c"]
+    assert len(opened) == 2
+    assert policy.retries == 1
+
+
+async def test_stream_stalled_after_first_chunk_returns_504():
+    policy = make_policy(timeout=0.05)
+
+    async def open_stream():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    chunks = []
+    with pytest.raises(HTTPException) as error:
+        async for chunk in policy.stream(open_stream):
+            chunks.append(chunk)
+
+    assert chunks == ["a"]
+    assert error.value.status_code == 504
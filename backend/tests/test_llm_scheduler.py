@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.llm_scheduler import LLMScheduler
+
+pytestmark = pytest.mark.anyio
+
+
+async def hold_slot(scheduler: LLMScheduler, user_id, release: asyncio.Event, order: list) -> None:
+    """Ocupa uma vaga do escalonador até `release` ser sinalizado"""
+    async with scheduler.slot(user_id):
+        order.append(user_id)
+        await release.wait()
+
+
+async def test_concurrency_is_capped():
+    scheduler = LLMScheduler(max_concurrency=2, max_queue=10, queue_timeout=5)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with scheduler.slot(1):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert scheduler.completed == 6
+    assert scheduler.in_flight == 0
+    assert scheduler.queue_depth == 0
+
+
+async def test_waiting_users_are_served_round_robin():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=10, queue_timeout=5)
+    order = []
+    release = asyncio.Event()
+    release.set()
+
+    blocker_release = asyncio.Event()
+    blocker = asyncio.create_task(hold_slot(scheduler, "blocker", blocker_release, order))
+    await asyncio.sleep(0)
+
+    # Usuário "a" enfileira três chamadas antes de "b" enfileirar uma
+    tasks = [asyncio.create_task(hold_slot(scheduler, "a", release, order)) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(hold_slot(scheduler, "b", release, order)))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 4
+
+    blocker_release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert order == ["blocker", "a", "b", "a", "a"]
+
+
+async def test_full_queue_is_rejected_with_retry_after():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+    order = []
+
+    holder = asyncio.create_task(hold_slot(scheduler, 1, release, order))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold_slot(scheduler, 2, release, order))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as error:
+        async with scheduler.slot(3):
+            pass
+
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert scheduler.rejected == 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert order == [1, 2]
+
+
+async def test_queue_timeout_is_rejected_and_leaves_no_waiter():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=10, queue_timeout=0.05)
+    release = asyncio.Event()
+
+    holder = asyncio.create_task(hold_slot(scheduler, 1, release, []))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as error:
+        async with scheduler.slot(2):
+            pass
+
+    assert error.value.status_code == 503
+    assert "Retry-After" in error.value.headers
+    assert scheduler.queue_depth == 0
+    assert scheduler.stats()["waiting_users"] == 0
+
+    release.set()
+    await holder
+    assert scheduler.in_flight == 0
+
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=10, queue_timeout=5)
+    release = asyncio.Event()
+    order = []
+
+    holder = asyncio.create_task(hold_slot(scheduler, 1, release, order))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold_slot(scheduler, 2, release, order))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    await holder
+
+    assert order == [1]
+    assert scheduler.in_flight == 0
+    assert scheduler.queue_depth == 0
+
+    # A vaga continua disponível para as próximas chamadas
+    async with scheduler.slot(3):
+        assert scheduler.in_flight == 1
+
+
+def test_saturated_scheduler_returns_503_from_chat(client, monkeypatch):
+    from app.services.llm_scheduler import llm_scheduler
+
+    conversation_id = client.post("/conversations", json={"title": "t"}).json()["id"]
+
+    # Todas as vagas ocupadas e nenhuma espera permitida
+    monkeypatch.setattr(llm_scheduler, "max_queue", 0)
+    monkeypatch.setattr(llm_scheduler, "in_flight", llm_scheduler.max_concurrency)
+
+    # Mensagem única: não pode ser atendida pelo cache de respostas
+    message = f"pergunta {conversation_id} sem cache"
+    response = client.post("/chat", json={"conversation_id": conversation_id, "message": message})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
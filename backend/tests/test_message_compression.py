@@ -0,0 +1,118 @@
+import secrets
+import uuid
+import pytest
+from sqlalchemy import select, text
+from app.core.compression import compress_text, decompress_text
+from app.core.database import AsyncSessionLocal, async_engine, engine
+from app.core.migrations import run_migrations
+# Modelos referenciados pelos relacionamentos de Message
+from app.models import conversation, user  # noqa: F401
+from app.models.message import Message
+from app.services.message_compaction import MessageCompactionService
+from tests.utils import wait_until
+
+pytestmark = pytest.mark.anyio
+
+MIN_BYTES = 64
+
+
+def long_text(size: int) -> str:
+    """Texto compressível com exatamente `size` bytes em UTF-8"""
+    return ("mensagem " * size)[:size]
+
+
+@pytest.fixture
+async def conversation_id():
+    """Conversa de um usuário novo; conexões async descartadas ao final"""
+    run_migrations(engine)
+    with engine.begin() as conn:
+        user_id = conn.execute(
+            text("INSERT INTO users (email, hashed_password) VALUES (:email, 'hash') RETURNING id"),
+            {"email": f"{uuid.uuid4().hex}@example.com"}
+        ).scalar()
+        conversation = conn.execute(
+            text("INSERT INTO conversations (user_id, title, qtd_tokens) VALUES (:user_id, 'Compressão', 0) RETURNING id"),
+            {"user_id": user_id}
+        ).scalar()
+    yield conversation
+    await async_engine.dispose()
+
+
+async def stored_types(conversation_id: int) -> dict:
+    """Tipo SQLite (text ou blob) gravado para cada mensagem da conversa"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text("SELECT id, typeof(content) AS kind FROM messages WHERE conversation_id = :id"),
+            {"id": conversation_id}
+        )
+        return {row.id: row.kind for row in result}
+
+
+def test_compression_threshold_boundary():
+    below, at = long_text(MIN_BYTES - 1), long_text(MIN_BYTES)
+    assert len(at.encode("utf-8")) == MIN_BYTES
+
+    assert compress_text(below, MIN_BYTES) == below
+    stored = compress_text(at, MIN_BYTES)
+    assert isinstance(stored, bytes)
+    assert decompress_text(stored) == at
+
+    # Texto que não diminui com a compressão continua em TEXT
+    incompressible = secrets.token_urlsafe(48)
+    assert compress_text(incompressible, MIN_BYTES) == incompressible
+    assert compress_text(at, MIN_BYTES, enabled=False) == at
+
+
+async def test_message_content_round_trip(conversation_id):
+    short, large = "oi", long_text(4096)
+
+    async with AsyncSessionLocal() as db:
+        messages = [
+            Message(conversation_id=conversation_id, role="user", content=content)
+            for content in (short, large)
+        ]
+        db.add_all(messages)
+        await db.commit()
+        ids = [message.id for message in messages]
+
+    assert await stored_types(conversation_id) == {ids[0]: "text", ids[1]: "blob"}
+
+    async with AsyncSessionLocal() as db:
+        loaded = (await db.execute(select(Message).where(Message.id.in_(ids)).order_by(Message.id))).scalars().all()
+        assert [message.content for message in loaded] == [short, large]
+
+        # Em consultas, Message.content é o texto original (inclusive em filtros)
+        result = await db.execute(select(Message.id, Message.content).where(Message.content == large))
+        assert [tuple(row) for row in result] == [(ids[1], large)]
+
+
+async def test_background_compaction_compresses_old_messages(conversation_id):
+    contents = [long_text(MIN_BYTES - 1), long_text(MIN_BYTES), long_text(2048)]
+    with engine.begin() as conn:
+        # Gravadas como TEXT, como antes da compressão
+        ids = [
+            conn.execute(
+                text("INSERT INTO messages (conversation_id, role, content) VALUES (:id, 'user', :content) RETURNING id"),
+                {"id": conversation_id, "content": content}
+            ).scalar()
+            for content in contents
+        ]
+
+    service = MessageCompactionService(batch_size=2, pause_seconds=0, min_bytes=MIN_BYTES)
+    service.start()
+    try:
+        await wait_until(lambda: service.finished)
+    finally:
+        await service.stop()
+
+    assert await stored_types(conversation_id) == dict(zip(ids, ["text", "blob", "blob"]))
+    assert service.compressed >= 2
+    assert service.bytes_saved > 0
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Message.content).where(Message.id.in_(ids)).order_by(Message.id))
+        assert result.scalars().all() == contents
+
+    # Idempotente: uma nova execução não encontra mais nada a comprimir
+    again = MessageCompactionService(batch_size=2, pause_seconds=0, min_bytes=MIN_BYTES)
+    assert again._compact_batch(ids[-1]) is None
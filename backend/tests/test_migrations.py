@@ -0,0 +1,83 @@
+from sqlalchemy import create_engine, event, inspect, text
+from app.core.database import _register_sqlite_functions
+from app.core.migrations import MIGRATIONS, _create_baseline_schema, run_migrations
+from app.services.tokenizer_service import tokenizer_service
+
+MESSAGES = ["receita de pão caseiro", "Misture farinha, água e fermento."]
+
+
+def make_legacy_engine(tmp_path):
+    """Banco no esquema original (antes das migrações), com dados"""
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    # Mesmas funções SQL das conexões do app (usadas pelo índice de busca)
+    event.listen(engine, "connect", _register_sqlite_functions)
+
+    with engine.begin() as conn:
+        _create_baseline_schema(conn)
+        conn.execute(text(
+            "INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'hash')"
+        ))
+        conn.execute(text(
+            "INSERT INTO conversations (id, user_id, title, qtd_tokens) VALUES (1, 1, 'Pão', 8192)"
+        ))
+        for index, content in enumerate(MESSAGES):
+            conn.execute(
+                text("INSERT INTO messages (conversation_id, role, content) VALUES (1, :role, :content)"),
+                {"role": "user" if index % 2 == 0 else "assistant", "content": content}
+            )
+    return engine
+
+
+def snapshot(conn) -> dict:
+    """Estado do banco comparado entre duas execuções das migrações"""
+    return {
+        "version": conn.exec_driver_sql("PRAGMA user_version").scalar(),
+        "messages": conn.execute(text("SELECT id, content, token_count FROM messages ORDER BY id")).fetchall(),
+        "conversations": conn.execute(text("SELECT * FROM conversations")).fetchall(),
+        "fts_rows": conn.execute(text("SELECT count(*) FROM messages_fts")).scalar(),
+    }
+
+
+def test_baseline_database_is_upgraded_and_migrations_are_idempotent(tmp_path):
+    engine = make_legacy_engine(tmp_path)
+
+    run_migrations(engine)
+    with engine.connect() as conn:
+        first = snapshot(conn)
+    run_migrations(engine)
+    with engine.connect() as conn:
+        second = snapshot(conn)
+
+    assert first == second
+    assert first["version"] == MIGRATIONS[-1][0]
+
+    inspector = inspect(engine)
+    message_columns = {column["name"] for column in inspector.get_columns("messages")}
+    conversation_columns = {column["name"] for column in inspector.get_columns("conversations")}
+    assert "token_count" in message_columns
+    assert {"summary", "summarized_until_id", "summary_token_count", "version", "updated_at"} <= conversation_columns
+    assert {"llm_response_cache", "jobs", "messages_fts"} <= set(inspector.get_table_names())
+
+    indexes = {index["name"] for table in ("messages", "conversations", "jobs") for index in inspector.get_indexes(table)}
+    assert {
+        "ix_messages_conversation_id_created_at",
+        "ix_messages_conversation_id_id",
+        "ix_conversations_user_id_created_at",
+        "ix_conversations_user_id_id",
+        "ux_jobs_dedupe_key_active",
+    } <= indexes
+
+    with engine.connect() as conn:
+        # Backfill da contagem de tokens e da data de alteração
+        assert [row.token_count for row in first["messages"]] == [
+            tokenizer_service.count_sync(content) for content in MESSAGES
+        ]
+        conversation = conn.execute(text("SELECT version, updated_at, created_at FROM conversations")).one()
+        assert conversation.version == 1
+        assert conversation.updated_at == conversation.created_at
+
+        # Mensagens existentes indexadas para a busca
+        matches = conn.execute(text("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'pao'")).fetchall()
+        assert [row.rowid for row in matches] == [first["messages"][0].id]
+
+    engine.dispose()
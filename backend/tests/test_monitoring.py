@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+
+ENDPOINTS = ["/stats", "/metrics"]
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    token = "token-de-teste"
+    monkeypatch.setattr(settings, "metrics_token", token)
+    return token
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_anonymous_access_is_rejected(path):
+    with TestClient(app) as anonymous:
+        assert anonymous.get(path).status_code == 401
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_authenticated_user_has_access_without_metrics_token(client, path):
+    assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_metrics_token_is_required_when_configured(client, metrics_token, path):
+    # O cookie de usuário não basta: só o token configurado dá acesso
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer errado"}).status_code == 401
+
+    response = client.get(path, headers={"Authorization": f"Bearer {metrics_token}"})
+    assert response.status_code == 200
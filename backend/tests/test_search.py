@@ -0,0 +1,50 @@
+import uuid
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def send_message(client, content: str) -> int:
+    """Cria uma conversa com uma mensagem do usuário (e a resposta do modelo)"""
+    conversation_id = client.post("/conversations", json={"title": "Receitas"}).json()["id"]
+    response = client.post("/chat", json={"conversation_id": conversation_id, "message": content})
+    assert response.status_code == 200
+    return conversation_id
+
+
+def search(client, query: str) -> list:
+    response = client.get("/conversations/search", params={"q": query})
+    assert response.status_code == 200
+    return response.json()["items"]
+
+
+def test_search_finds_messages_of_the_user_only(client):
+    conversation_id = send_message(client, "Receita de pão caseiro com fermento natural")
+
+    # Sem acento e por prefixo do último termo
+    [item] = search(client, "pao ferm")
+    assert item["conversation_id"] == conversation_id
+    assert item["role"] == "user"
+    assert "<mark>pão</mark>" in item["snippet"]
+
+    # Outro usuário não encontra as mensagens do primeiro
+    credentials = {"email": f"{uuid.uuid4().hex}@example.com", "password": "Senha@123"}
+    client.post("/auth/register", json=credentials)
+    assert client.post("/auth/login", json=credentials).status_code == 200
+    assert search(client, "pao") == []
+
+
+def test_deleted_conversation_leaves_the_index(client):
+    kept = send_message(client, "Bolo de cenoura com cobertura")
+    deleted = send_message(client, "Bolo de chocolate com cobertura")
+    assert {item["conversation_id"] for item in search(client, "cobertura")} == {kept, deleted}
+
+    assert client.delete(f"/conversations/{deleted}").status_code == 204
+
+    assert [item["conversation_id"] for item in search(client, "cobertura")] == [kept]
+    assert search(client, "chocolate") == []
+
+    with engine.begin() as conn:
+        # As mensagens removidas também saem do índice (não só dos resultados)
+        stale = conn.execute(text("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'chocolate'"))
+        assert stale.fetchall() == []
+        conn.execute(text("INSERT INTO messages_fts (messages_fts) VALUES ('integrity-check')"))
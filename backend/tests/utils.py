@@ -0,0 +1,18 @@
+import asyncio
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    """Espera até a condição ser verdadeira (trabalho feito por tasks em segundo plano)"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await _evaluate(condition):
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Condição não atingida dentro do prazo")
+        await asyncio.sleep(0.01)
+
+
+async def _evaluate(condition) -> bool:
+    """Avalia uma condição síncrona ou assíncrona"""
+    result = condition()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return bool(result)